@@ -1,16 +1,39 @@
 """Simple REST API for testing Milvus data retrieval."""
-from flask import Flask, request, jsonify
+import hmac
+import json
+import os
+import tempfile
+from functools import wraps
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
+from werkzeug.exceptions import HTTPException
+from werkzeug.utils import secure_filename
 from config import get_settings
-from services import AzureOpenAIEmbeddingService, MilvusVectorStore
+from services import (
+    AzureOpenAIEmbeddingService,
+    MilvusVectorStore,
+    DocumentChunker,
+    GoogleVisionAnalyzer,
+    LocalFileReader,
+    IngestionManifest
+)
+from services.metrics import MetricsRegistry, metrics, render_prometheus
+from workflows import DocumentIngestor
 from query import RAGQueryService
 
-app = Flask(__name__)
-CORS(app)  # Enable CORS for all routes
-
 # Initialize services
 settings = get_settings()
 
+app = Flask(__name__)
+CORS(app, origins=[origin.strip() for origin in settings.api_cors_origins.split(",") if origin.strip()])
+# Larger requests are rejected with 413 before they are read
+app.config['MAX_CONTENT_LENGTH'] = int(settings.api_max_request_mb * 1024 * 1024) or None
+
+# POST/DELETE /api/documents change the collection, so they need API_WRITE_ENABLED and a bearer token
+write_enabled = settings.api_write_enabled and bool(settings.api_token)
+if settings.api_write_enabled and not settings.api_token:
+    print("Warning: API_WRITE_ENABLED needs API_TOKEN; /api/documents stays disabled")
+
 embedding_service = AzureOpenAIEmbeddingService(
     api_key=settings.azure_openai_api_key,
     endpoint=settings.azure_openai_endpoint,
@@ -18,11 +41,15 @@ embedding_service = AzureOpenAIEmbeddingService(
     api_version=settings.azure_openai_api_version
 )
 
+# Documents posted to /api/documents are searchable right away: no forced flush,
+# and queries see this server's own writes
 vector_store = MilvusVectorStore(
     uri=settings.milvus_uri,
     token=settings.milvus_token,
     collection_name=settings.milvus_collection_name,
-    embedding_dimension=settings.embedding_dimension
+    embedding_dimension=settings.embedding_dimension,
+    flush_writes=False,
+    consistency_level="Session"
 )
 
 query_service = RAGQueryService(
@@ -30,6 +57,66 @@ query_service = RAGQueryService(
     vector_store=vector_store
 )
 
+# Uploaded images, diagrams and documents are read like local files
+local_file_reader = None
+if write_enabled and settings.process_local_files:
+    try:
+        local_file_reader = LocalFileReader(
+            vision_analyzer=GoogleVisionAnalyzer(
+                credentials_path=settings.google_application_credentials,
+                max_results=settings.google_vision_max_results
+            ),
+            **settings.local_file_reader_options()
+        )
+    except Exception as e:
+        print(f"Warning: Failed to initialize Google Vision API: {str(e)}")
+        print("Only text documents can be posted to /api/documents")
+
+document_ingestor = None
+if write_enabled:
+    document_ingestor = DocumentIngestor(
+        document_chunker=DocumentChunker(
+            chunk_size=settings.chunk_size,
+            chunk_overlap=settings.chunk_overlap
+        ),
+        embedding_service=embedding_service,
+        vector_store=vector_store,
+        local_file_reader=local_file_reader,
+        manifest=IngestionManifest(
+            manifest_path=settings.manifest_path,
+            embedding_model=settings.azure_openai_embedding_deployment
+        ) if settings.manifest_enabled else None
+    )
+
+
+def require_write_access(view):
+    """Reject document writes unless enabled and authorized with Authorization: Bearer <API_TOKEN>."""
+    @wraps(view)
+    def guarded(*args, **kwargs):
+        if not write_enabled:
+            return jsonify({
+                'success': False,
+                'error': 'Document writes are disabled (set API_WRITE_ENABLED=true and API_TOKEN)'
+            }), 403
+        scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+        if scheme.lower() != 'bearer' or not hmac.compare_digest(token.strip().encode(), settings.api_token.encode()):
+            return jsonify({
+                'success': False,
+                'error': 'Missing or invalid bearer token'
+            }), 401
+        return view(*args, **kwargs)
+
+    return guarded
+
+
+@app.errorhandler(413)
+def request_too_large(error):
+    """JSON response for requests above API_MAX_REQUEST_MB."""
+    return jsonify({
+        'success': False,
+        'error': f'Request is larger than {settings.api_max_request_mb:g} MB (API_MAX_REQUEST_MB)'
+    }), 413
+
 
 @app.route('/health', methods=['GET'])
 def health_check():
@@ -90,6 +177,97 @@ def query():
         }), 500
 
 
+@app.route('/api/documents', methods=['POST'])
+@require_write_access
+def add_document():
+    """
+    Add or replace one document, synchronously.
+
+    Either a JSON body:
+    {
+        "file_path": "design/payments.md",  # identifier of the document
+        "content": "# Payments ..."         # markdown or plain text
+    }
+    or a multipart upload with a "file" field (image, .drawio, .docx, .xlsx,
+    .md or .txt) and an optional "file_path" form field (default: file name).
+    The document is searchable once the response is returned. Needs
+    API_WRITE_ENABLED and an Authorization: Bearer <API_TOKEN> header.
+    """
+    try:
+        upload = request.files.get('file')
+        if upload is not None:
+            file_path = request.form.get('file_path') or upload.filename
+            if not file_path:
+                return jsonify({'error': 'Missing file name: set the file_path form field'}), 400
+            with tempfile.TemporaryDirectory() as upload_dir:
+                # The reader is chosen by extension, so the saved file keeps it
+                disk_path = os.path.join(upload_dir, secure_filename(os.path.basename(file_path)) or 'upload')
+                upload.save(disk_path)
+                outcome = document_ingestor.ingest_file(file_path, disk_path)
+        else:
+            data = request.get_json(silent=True)
+            if not data or not data.get('file_path') or not isinstance(data.get('content'), str):
+                return jsonify({
+                    'error': 'Missing required fields: file_path, content (or upload a file)',
+                    'example': {
+                        'file_path': 'design/payments.md',
+                        'content': '# Payments service ...'
+                    }
+                }), 400
+            outcome = document_ingestor.ingest_text(data['file_path'], data['content'])
+
+        return jsonify({'success': True, **outcome}), 201 if outcome['status'] == 'created' else 200
+
+    except HTTPException:
+        # e.g. 413 above MAX_CONTENT_LENGTH
+        raise
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 422
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/api/documents', methods=['DELETE'])
+@require_write_access
+def delete_document():
+    """
+    Delete a document added through POST /api/documents.
+
+    The file_path is given as query parameter (?file_path=design/payments.md)
+    or in a JSON body. Needs the same authorization as POST.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        file_path = request.args.get('file_path') or data.get('file_path')
+        if not file_path:
+            return jsonify({'error': 'Missing required parameter: file_path'}), 400
+
+        deleted_chunks = document_ingestor.delete(file_path)
+        if deleted_chunks == 0:
+            return jsonify({
+                'success': False,
+                'error': f'Document "{file_path}" was not added through the API'
+            }), 404
+
+        return jsonify({
+            'success': True,
+            'file_path': file_path,
+            'deleted_chunks': deleted_chunks
+        })
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
 @app.route('/api/stats', methods=['GET'])
 def stats():
     """Get collection statistics."""
@@ -176,6 +354,26 @@ def test_retrieval():
         }), 500
 
 
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """
+    Prometheus metrics.
+
+    Serves this server's own counters (source="api") and those of the
+    last indexing run, read from its JSON run report (source="ingestion").
+    """
+    registries = [(metrics, {'source': 'api'})]
+    if os.path.exists(settings.run_report_path):
+        try:
+            with open(settings.run_report_path, 'r', encoding='utf-8') as f:
+                report = json.load(f)
+            registries.append((MetricsRegistry.from_snapshot(report.get('metrics', {})), {'source': 'ingestion'}))
+        except (OSError, ValueError) as e:
+            print(f"Warning: Could not read run report: {str(e)}")
+
+    return Response(render_prometheus(registries), mimetype='text/plain; version=0.0.4')
+
+
 @app.route('/', methods=['GET'])
 def index():
     """API documentation."""
@@ -187,12 +385,18 @@ def index():
             'GET /': 'API documentation (this page)',
             'GET /api/test-retrieval': 'Test data retrieval from Milvus',
             'GET /api/stats': 'Get collection statistics',
+            'GET /metrics': 'Prometheus metrics (this server and the last indexing run)',
             'POST /api/query': 'Query the RAG system',
+            'POST /api/documents': 'Add or replace a document (JSON text or file upload), searchable immediately; '
+                                   'needs API_WRITE_ENABLED and a bearer token',
+            'DELETE /api/documents': 'Delete a document added through the API (?file_path=...); same authorization',
         },
         'examples': {
             'test_retrieval': 'curl http://localhost:5000/api/test-retrieval',
             'stats': 'curl http://localhost:5000/api/stats',
-            'query': 'curl -X POST http://localhost:5000/api/query -H "Content-Type: application/json" -d \'{"query": "What is the architecture?", "top_k": 5}\''
+            'query': 'curl -X POST http://localhost:5000/api/query -H "Content-Type: application/json" -d \'{"query": "What is the architecture?", "top_k": 5}\'',
+            'add_document': 'curl -X POST http://localhost:5000/api/documents -H "Authorization: Bearer $API_TOKEN" -F "file=@diagrams/payments.drawio"',
+            'delete_document': 'curl -X DELETE "http://localhost:5000/api/documents?file_path=payments.drawio" -H "Authorization: Bearer $API_TOKEN"'
         }
     })
 
@@ -208,7 +412,11 @@ if __name__ == '__main__':
     print("  GET  http://localhost:5000/health        - Health check")
     print("  GET  http://localhost:5000/api/test-retrieval - Test data retrieval")
     print("  GET  http://localhost:5000/api/stats     - Collection statistics")
+    print("  GET  http://localhost:5000/metrics       - Prometheus metrics")
     print("  POST http://localhost:5000/api/query     - Query the RAG system")
+    if write_enabled:
+        print("  POST http://localhost:5000/api/documents - Add or replace a document")
+        print("  DELETE http://localhost:5000/api/documents?file_path=... - Delete a document")
     print("\n" + "="*80)
     print("Press CTRL+C to stop the server")
     print("="*80 + "\n")
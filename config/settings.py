@@ -1,5 +1,6 @@
 """Configuration module for the RAG application."""
 from pydantic_settings import BaseSettings
+from typing import List
 from pydantic import Field
 
 
@@ -23,23 +24,107 @@ class Settings(BaseSettings):
     # GitHub Repository Configuration
     github_repo_url: str = Field(default="", alias="GITHUB_REPO_URL")
     github_token: str = Field(default="", alias="GITHUB_TOKEN")
+    github_repo_urls: str = Field(default="", alias="GITHUB_REPO_URLS")
+    repositories_file: str = Field(default="", alias="REPOSITORIES_FILE")
+    max_concurrent_repos: int = Field(default=4, alias="MAX_CONCURRENT_REPOS")
+    max_concurrent_clones: int = Field(default=2, alias="MAX_CONCURRENT_CLONES")
+    repo_cache_dir: str = Field(default="./.cache/repos", alias="REPO_CACHE_DIR")
+    git_native_reads: bool = Field(default=True, alias="GIT_NATIVE_READS")
+    repo_include_globs: str = Field(default="*.md", alias="REPO_INCLUDE_GLOBS")
+    repo_partial_clone: bool = Field(default=True, alias="REPO_PARTIAL_CLONE")
 
     # Application Configuration
     chunk_size: int = Field(default=1000, alias="CHUNK_SIZE")
     chunk_overlap: int = Field(default=200, alias="CHUNK_OVERLAP")
     embedding_dimension: int = Field(default=1536, alias="EMBEDDING_DIMENSION")
+    embedding_max_concurrency: int = Field(default=8, alias="EMBEDDING_MAX_CONCURRENCY")
 
     # Google Vision API Configuration
     google_application_credentials: str = Field(..., alias="GOOGLE_APPLICATION_CREDENTIALS")
     google_vision_max_results: int = Field(default=10, alias="GOOGLE_VISION_MAX_RESULTS")
+    vision_cache_enabled: bool = Field(default=True, alias="VISION_CACHE_ENABLED")
+    vision_cache_path: str = Field(default="./.cache/vision_cache.sqlite3", alias="VISION_CACHE_PATH")
+    vision_cache_max_mb: int = Field(default=512, alias="VISION_CACHE_MAX_MB")
+    image_preprocessing_enabled: bool = Field(default=True, alias="IMAGE_PREPROCESSING_ENABLED")
+    image_max_dimension: int = Field(default=3072, alias="IMAGE_MAX_DIMENSION")
+    image_output_format: str = Field(default="PNG", alias="IMAGE_OUTPUT_FORMAT")
+    image_dedup_enabled: bool = Field(default=True, alias="IMAGE_DEDUP_ENABLED")
+    phash_index_path: str = Field(default="./.cache/phash_index.sqlite3", alias="PHASH_INDEX_PATH")
+    phash_max_distance: int = Field(default=5, alias="PHASH_MAX_DISTANCE")
 
     # Local Data Directory Configuration
     data_directory: str = Field(default="./data/diagrams", alias="DATA_DIRECTORY")
     process_local_files: bool = Field(default=True, alias="PROCESS_LOCAL_FILES")
+    parallel_local_processing: bool = Field(default=False, alias="PARALLEL_LOCAL_PROCESSING")
+    local_parser_workers: int = Field(default=0, alias="LOCAL_PARSER_WORKERS")
+    vision_max_concurrency: int = Field(default=8, alias="VISION_MAX_CONCURRENCY")
+    spreadsheet_max_rows: int = Field(default=100, alias="SPREADSHEET_MAX_ROWS")
+    drawio_include_raw_xml: bool = Field(default=False, alias="DRAWIO_INCLUDE_RAW_XML")
+    docx_streaming: bool = Field(default=True, alias="DOCX_STREAMING")
+    local_ignore_file: str = Field(default=".ragignore", alias="LOCAL_IGNORE_FILE")
+    local_ignore_patterns: str = Field(default="", alias="LOCAL_IGNORE_PATTERNS")
+    max_image_file_mb: float = Field(default=20, alias="MAX_IMAGE_FILE_MB")
+    max_diagram_file_mb: float = Field(default=50, alias="MAX_DIAGRAM_FILE_MB")
+    max_document_file_mb: float = Field(default=100, alias="MAX_DOCUMENT_FILE_MB")
+    max_spreadsheet_file_mb: float = Field(default=100, alias="MAX_SPREADSHEET_FILE_MB")
+    watch_poll_seconds: float = Field(default=2.0, alias="WATCH_POLL_SECONDS")
+    watch_debounce_seconds: float = Field(default=1.0, alias="WATCH_DEBOUNCE_SECONDS")
 
     # Processing Control Configuration
     skip_existing_documents: bool = Field(default=True, alias="SKIP_EXISTING_DOCUMENTS")
     force_reprocess: bool = Field(default=False, alias="FORCE_REPROCESS")
+    manifest_enabled: bool = Field(default=True, alias="MANIFEST_ENABLED")
+    manifest_path: str = Field(default="./.cache/ingestion_manifest.sqlite3", alias="MANIFEST_PATH")
+    streaming_mode: bool = Field(default=False, alias="STREAMING_MODE")
+    stream_queue_size: int = Field(default=4, alias="STREAM_QUEUE_SIZE")
+    stream_read_batch_files: int = Field(default=16, alias="STREAM_READ_BATCH_FILES")
+    stream_embed_batch_chunks: int = Field(default=64, alias="STREAM_EMBED_BATCH_CHUNKS")
+    stream_embed_workers: int = Field(default=2, alias="STREAM_EMBED_WORKERS")
+    checkpoint_path: str = Field(default="./.cache/checkpoints.sqlite3", alias="CHECKPOINT_PATH")
+    run_report_path: str = Field(default="./.cache/run_report.json", alias="RUN_REPORT_PATH")
+    dead_letter_path: str = Field(default="./.cache/dead_letters.sqlite3", alias="DEAD_LETTER_PATH")
+
+    # API Server Configuration
+    api_write_enabled: bool = Field(default=False, alias="API_WRITE_ENABLED")
+    api_token: str = Field(default="", alias="API_TOKEN")
+    api_max_request_mb: float = Field(default=100, alias="API_MAX_REQUEST_MB")
+    api_cors_origins: str = Field(default="*", alias="API_CORS_ORIGINS")
+
+    def repository_urls(self) -> List[str]:
+        """
+        All repositories to index.
+
+        Combines GITHUB_REPO_URL, the comma-separated GITHUB_REPO_URLS and
+        REPOSITORIES_FILE (one URL per line, '#' starts a comment), in that
+        order and without duplicates.
+        """
+        urls = [self.github_repo_url]
+        urls.extend(self.github_repo_urls.split(","))
+        if self.repositories_file:
+            with open(self.repositories_file, 'r', encoding='utf-8') as f:
+                urls.extend(line.split("#", 1)[0] for line in f)
+        return list(dict.fromkeys(url.strip() for url in urls if url and url.strip()))
+
+    def local_file_reader_options(self) -> dict:
+        """LocalFileReader options (everything but the Vision analyzer and phash index)."""
+        return dict(
+            parallel=self.parallel_local_processing,
+            parser_workers=self.local_parser_workers,
+            vision_workers=self.vision_max_concurrency,
+            spreadsheet_max_rows=self.spreadsheet_max_rows,
+            drawio_include_raw_xml=self.drawio_include_raw_xml,
+            docx_streaming=self.docx_streaming,
+            ignore_patterns=[
+                pattern.strip() for pattern in self.local_ignore_patterns.split(",") if pattern.strip()
+            ],
+            ignore_file=self.local_ignore_file,
+            max_file_sizes_mb={
+                "image": self.max_image_file_mb,
+                "drawio": self.max_diagram_file_mb,
+                "word_document": self.max_document_file_mb,
+                "spreadsheet": self.max_spreadsheet_file_mb
+            }
+        )
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,74 @@
+"""
+Coordinator for sharded ingestion.
+
+Runs `main.py --shard i/N` workers and merges their manifests and run
+reports into the unsharded MANIFEST_PATH and RUN_REPORT_PATH:
+
+    python coordinator.py run --shards 4 [--resume]   # N worker processes on this host
+    python coordinator.py merge --shards 4            # after workers ran on several hosts
+
+For multi-host runs, start `python main.py --shard i/N` on each host
+against the same collection, copy the per-shard manifest and report
+files (e.g. ingestion_manifest.shard-0-of-4.sqlite3) next to the
+configured paths and run the merge command.
+"""
+import argparse
+import subprocess
+import sys
+
+from config import get_settings
+from workflows.sharding import merge_manifests, merge_reports, shard_paths
+
+
+def merge(settings, shards: int) -> int:
+    """Merge the shard manifests and reports and print the outcome."""
+    if settings.manifest_enabled:
+        files = merge_manifests(
+            settings.manifest_path,
+            shard_paths(settings.manifest_path, shards),
+            embedding_model=settings.azure_openai_embedding_deployment
+        )
+        print(f"Merged manifest: {settings.manifest_path} ({files} files)")
+
+    report = merge_reports(settings.run_report_path, shard_paths(settings.run_report_path, shards))
+    print(f"Merged run report: {settings.run_report_path} ({report['wall_seconds']:.1f}s wall time)")
+    for shard, outcome in report["shards"].items():
+        print(f"  - shard {shard}: {outcome['status']}")
+    for stage, stats in report["stages"].items():
+        print(f"  - {stage}: {stats['seconds']:.1f}s over all shards")
+    return 0 if report["status"] == "completed" else 1
+
+
+def run(settings, shards: int, worker_args: list) -> int:
+    """Run one main.py worker per shard on this host, then merge."""
+    print(f"Starting {shards} shard workers...")
+    workers = [
+        subprocess.Popen([sys.executable, "main.py", "--shard", f"{index}/{shards}", *worker_args])
+        for index in range(shards)
+    ]
+    failed = [index for index, worker in enumerate(workers) if worker.wait() != 0]
+    if failed:
+        print(f"Shards failed: {', '.join(str(index) for index in failed)}")
+
+    status = merge(settings, shards)
+    return 1 if failed else status
+
+
+def main():
+    """Main function of the coordinator."""
+    parser = argparse.ArgumentParser(description="Run and merge sharded ingestion")
+    parser.add_argument("command", choices=["run", "merge"], help="Run shard workers here and merge, or only merge")
+    parser.add_argument("--shards", type=int, required=True, help="Number of shards")
+    # Other options (e.g. --resume, --async) are passed on to the main.py workers
+    args, worker_args = parser.parse_known_args()
+    if args.shards < 1:
+        parser.error("--shards must be at least 1")
+
+    settings = get_settings()
+    if args.command == "run":
+        return run(settings, args.shards, worker_args)
+    return merge(settings, args.shards)
+
+
+if __name__ == "__main__":
+    exit(main())
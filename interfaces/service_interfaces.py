@@ -1,7 +1,7 @@
 """Abstract interfaces for the RAG application (Interface Segregation Principle)."""
 from abc import ABC, abstractmethod
-from typing import List
-from models.data_models import Document, Chunk, EmbeddedChunk
+from typing import Dict, List, Optional, Tuple
+from models.data_models import Document, Chunk, EmbeddedChunk, ChunkBatch
 
 
 class IRepositoryReader(ABC):
@@ -13,8 +13,28 @@ class IRepositoryReader(ABC):
         pass
 
     @abstractmethod
-    def get_markdown_files(self, repo_path: str) -> List[Document]:
-        """Get all markdown files from the repository."""
+    def list_markdown_blobs(self, repo_path: str) -> Optional[Dict[str, str]]:
+        """List markdown paths with their content hashes (git blob SHAs), or None if unsupported."""
+        pass
+
+    @abstractmethod
+    def list_markdown_files(self, repo_path: str) -> List[str]:
+        """List markdown files in the repository as paths relative to its root."""
+        pass
+
+    @abstractmethod
+    def get_markdown_files(self, repo_path: str, file_paths: Optional[List[str]] = None) -> List[Document]:
+        """Get all (or only the given) markdown files from the repository."""
+        pass
+
+    @abstractmethod
+    def head_commit(self, repo_path: str) -> str:
+        """Get the commit checked out in a clone."""
+        pass
+
+    @abstractmethod
+    def diff_markdown_files(self, repo_path: str, since_commit: str) -> Optional[Tuple[List[str], List[str]]]:
+        """List (changed, deleted) markdown files since a commit, or None if unknown."""
         pass
 
     @abstractmethod
@@ -31,15 +51,43 @@ class ILocalFileReader(ABC):
         """Read all supported files from a directory recursively."""
         pass
 
+    @abstractmethod
+    def list_files(self, directory_path: str) -> List[str]:
+        """List the supported files of a directory recursively."""
+        pass
+
+    @abstractmethod
+    def read_files(self, file_paths: List[str]) -> List[Document]:
+        """Read the given files."""
+        pass
+
+    @abstractmethod
+    async def aread_files(self, file_paths: List[str]) -> List[Document]:
+        """Read the given files, generating Vision summaries asynchronously."""
+        pass
+
     @abstractmethod
     def read_file(self, file_path: str) -> Document:
         """Read a single file."""
         pass
 
+    @abstractmethod
+    def read_file_documents(self, file_path: str) -> List[Document]:
+        """Read a single file into one or more documents."""
+        pass
+
+    @abstractmethod
+    def size_limit(self, file_path: str) -> Optional[int]:
+        """Maximum size in bytes of a file of this type, or None if unlimited."""
+        pass
+
 
 class IVisionAnalyzer(ABC):
     """Interface for analyzing images and diagrams."""
 
+    # Summary (body) of an image that could not be analysed, followed by the error message
+    ERROR_PREFIX = "Error analyzing image: "
+
     @abstractmethod
     def analyze_image(self, image_path: str) -> str:
         """Analyze an image and return a comprehensive description."""
@@ -55,12 +103,27 @@ class IVisionAnalyzer(ABC):
         """Generate a comprehensive summary of an image or diagram."""
         pass
 
+    @abstractmethod
+    def generate_summaries(self, image_paths: List[str]) -> List[str]:
+        """Generate summaries for several images, in the same order."""
+        pass
+
+    @abstractmethod
+    async def agenerate_summary(self, image_path: str) -> str:
+        """Generate a summary of an image or diagram without blocking the event loop."""
+        pass
+
+    @abstractmethod
+    async def agenerate_summaries(self, image_paths: List[str]) -> List[str]:
+        """Generate summaries for several images concurrently, in the same order."""
+        pass
+
 
 class IDocumentChunker(ABC):
     """Interface for chunking documents."""
 
     @abstractmethod
-    def chunk_document(self, document: Document) -> List[Chunk]:
+    def chunk_document(self, document: Document, start_index: int = 0) -> List[Chunk]:
         """Chunk a document into smaller pieces."""
         pass
 
@@ -69,6 +132,11 @@ class IDocumentChunker(ABC):
         """Chunk multiple documents."""
         pass
 
+    @abstractmethod
+    def chunk_documents_to_batch(self, documents: List[Document]) -> ChunkBatch:
+        """Chunk multiple documents into a columnar batch."""
+        pass
+
 
 class IEmbeddingService(ABC):
     """Interface for creating embeddings."""
@@ -83,6 +151,26 @@ class IEmbeddingService(ABC):
         """Create embeddings for multiple texts."""
         pass
 
+    @abstractmethod
+    def embed_batch(self, batch: ChunkBatch) -> ChunkBatch:
+        """Embed the contents of a chunk batch and return it with its embedding matrix."""
+        pass
+
+    @abstractmethod
+    async def acreate_embedding(self, text: str) -> List[float]:
+        """Create an embedding for a text without blocking the event loop."""
+        pass
+
+    @abstractmethod
+    async def acreate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Create embeddings for multiple texts with concurrent requests."""
+        pass
+
+    @abstractmethod
+    async def aembed_batch(self, batch: ChunkBatch) -> ChunkBatch:
+        """Embed a chunk batch with concurrent requests."""
+        pass
+
 
 class IVectorStore(ABC):
     """Interface for vector storage operations."""
@@ -97,11 +185,47 @@ class IVectorStore(ABC):
         """Insert embeddings into the vector store."""
         pass
 
+    @abstractmethod
+    def insert_batch(self, batch: ChunkBatch) -> List[int]:
+        """Insert an embedded chunk batch into the vector store and return the new ids."""
+        pass
+
+    @abstractmethod
+    def delete_chunks(self, chunk_ids: List[int]) -> None:
+        """Delete chunks by id."""
+        pass
+
+    @abstractmethod
+    def delete_by_file_paths(
+        self,
+        file_paths: List[str],
+        repository_url: Optional[str] = None,
+        include_legacy: bool = False,
+        keep_ids: Optional[Dict[str, List[int]]] = None
+    ) -> int:
+        """Delete all chunks of the given files (optionally of one repository only); returns the number deleted."""
+        pass
+
     @abstractmethod
     def search(self, query_embedding: List[float], top_k: int = 5) -> List[dict]:
         """Search for similar embeddings."""
         pass
 
+    @abstractmethod
+    async def ainsert_embeddings(self, embedded_chunks: List[EmbeddedChunk]) -> None:
+        """Insert embeddings without blocking the event loop."""
+        pass
+
+    @abstractmethod
+    async def ainsert_batch(self, batch: ChunkBatch) -> List[int]:
+        """Insert an embedded chunk batch without blocking the event loop and return the new ids."""
+        pass
+
+    @abstractmethod
+    async def asearch(self, query_embedding: List[float], top_k: int = 5) -> List[dict]:
+        """Search for similar embeddings without blocking the event loop."""
+        pass
+
     @abstractmethod
     def delete_collection(self) -> None:
         """Delete the collection."""
@@ -114,7 +238,7 @@ class IVectorStore(ABC):
 
     @abstractmethod
     def get_existing_file_paths(self) -> set:
-        """Get set of file paths that already exist in the collection."""
+        """Get the (repository_url, file_path) pairs that already exist in the collection."""
         pass
 
     @abstractmethod
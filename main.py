@@ -1,4 +1,8 @@
 """Main application entry point for the RAG system."""
+import argparse
+import asyncio
+import os
+from typing import List, Optional
 from config import get_settings
 from services import (
     GitHubRepositoryReader,
@@ -6,23 +10,283 @@ from services import (
     AzureOpenAIEmbeddingService,
     MilvusVectorStore,
     GoogleVisionAnalyzer,
-    LocalFileReader
+    VisionCache,
+    ImagePreprocessor,
+    PerceptualHashIndex,
+    LocalFileReader,
+    IngestionManifest,
+    CheckpointJournal,
+    DeadLetterStore
 )
-from workflows import RAGWorkflow
+from services.directory_watcher import DirectoryWatcher
+from services.metrics import metrics
+from workflows import RAGWorkflow, StreamingPipeline
+from workflows.dry_run import DryRunPlanner, DryRunVisionAnalyzer, estimate, load_api_latencies
+from workflows.sharding import ShardSpec, seed_shard_manifest
+
+
+def shard_arg(text: str) -> ShardSpec:
+    """argparse type of --shard."""
+    try:
+        return ShardSpec.parse(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def parse_args():
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Index repository and local documents into Milvus")
+    parser.add_argument(
+        "command",
+        nargs="?",
+        choices=["run", "retry-failed"],
+        default="run",
+        help="Index everything that changed (default), or only reprocess the files recorded in DEAD_LETTER_PATH"
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue an interrupted run from its last committed batch (implies streaming mode)"
+    )
+    parser.add_argument(
+        "--async",
+        dest="use_async",
+        action="store_true",
+        help="Run a single repository on an event loop with the async OpenAI, Milvus and Vision clients"
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Report files, chunks, tokens, API calls and estimated time without calling or writing anything"
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep DATA_DIRECTORY indexed: process it once, then index changed files as they appear"
+    )
+    parser.add_argument(
+        "--shard",
+        type=shard_arg,
+        metavar="INDEX/COUNT",
+        help="Only process the files of shard INDEX (0-based) out of COUNT, partitioned by a hash of their path; "
+             "see coordinator.py"
+    )
+    return parser.parse_args()
+
+
+def write_run_report(settings, status: str, sources: dict, shard: Optional[ShardSpec] = None) -> None:
+    """Write the JSON run report and print where it went."""
+    try:
+        report = metrics.write_report(
+            settings.run_report_path, status=status, sources=sources, shard=str(shard) if shard else ""
+        )
+    except OSError as e:
+        print(f"Warning: Could not write run report: {str(e)}")
+        return
+
+    print(f"\n⏱️  Run report: {settings.run_report_path}")
+    for stage, stats in report["stages"].items():
+        print(f"  - {stage}: {stats['seconds']:.1f}s ({stats['items_per_second']:.1f} items/s)")
+    for api, stats in report["apis"].items():
+        print(f"  - {api}: {stats['calls']} calls, avg {stats['latency_avg_seconds'] * 1000:.0f} ms, "
+              f"{stats['errors']} errors, {stats['retries']} retries")
+
+
+def dry_run(settings, args, repository_reader, document_chunker) -> int:
+    """
+    Plan a run without side effects: Vision is stubbed, Azure OpenAI and Milvus are
+    not contacted, and the manifest and Vision cache are only read if they exist.
+    """
+    print("Dry run: Vision, Azure OpenAI and Milvus will not be called")
+
+    vision_analyzer = None
+    local_file_reader = None
+    if settings.process_local_files:
+        vision_cache = None
+        if settings.vision_cache_enabled and os.path.exists(settings.vision_cache_path):
+            vision_cache = VisionCache(cache_path=settings.vision_cache_path)
+        variant = ""
+        if settings.image_preprocessing_enabled:
+            variant = ImagePreprocessor(
+                max_dimension=settings.image_max_dimension,
+                output_format=settings.image_output_format
+            ).signature()
+        vision_analyzer = DryRunVisionAnalyzer(
+            cache=vision_cache,
+            max_results=settings.google_vision_max_results,
+            variant=variant
+        )
+        # Without the perceptual hash index near-duplicate images are counted as well
+        local_file_reader = LocalFileReader(vision_analyzer=vision_analyzer, **settings.local_file_reader_options())
+
+    manifest = None
+    if settings.manifest_enabled and os.path.exists(settings.manifest_path):
+        manifest = IngestionManifest(
+            manifest_path=settings.manifest_path,
+            embedding_model=settings.azure_openai_embedding_deployment
+        )
+
+    planner = DryRunPlanner(
+        repository_reader=repository_reader,
+        document_chunker=document_chunker,
+        local_file_reader=local_file_reader,
+        vision_analyzer=vision_analyzer,
+        manifest=manifest,
+        embedding_model=settings.azure_openai_embedding_deployment,
+        shard=args.shard
+    )
+    report = planner.plan(
+        repository_urls=settings.repository_urls(),
+        local_data_dir=settings.data_directory,
+        process_local_files=settings.process_local_files,
+        skip_existing_documents=settings.skip_existing_documents,
+        force_reprocess=settings.force_reprocess
+    )
+
+    streaming = settings.streaming_mode or args.resume
+    if streaming:
+        embed_concurrency = settings.stream_embed_workers
+    elif args.use_async:
+        embed_concurrency = settings.embedding_max_concurrency
+    else:
+        embed_concurrency = 1
+    estimate(
+        report,
+        load_api_latencies(settings.run_report_path),
+        streaming=streaming,
+        embed_concurrency=embed_concurrency,
+        vision_concurrency=settings.vision_max_concurrency if settings.parallel_local_processing else 1,
+        insert_batch_chunks=settings.stream_embed_batch_chunks if streaming else 0
+    )
+    report.print_summary()
+    return 0
+
+
+def retry_failed(settings, args, workflow: RAGWorkflow, dead_letters: DeadLetterStore) -> int:
+    """Reprocess the files recorded in the dead-letter store and report what is still failing."""
+    entries = dead_letters.entries()
+    print(f"\nRetrying {len(entries)} failed files from {settings.dead_letter_path}")
+    for entry in entries:
+        print(f"  - [{entry['stage']}, {entry['attempts']} attempts] {entry['file_path']}: {entry['reason']}")
+
+    results = workflow.retry_failed()
+    failed = any(state.get("error") for state in results.values())
+    write_run_report(settings, "failed" if failed else "completed", {
+        name: RAGWorkflow.run_summary(state) for name, state in results.items()
+    }, args.shard)
+
+    remaining = dead_letters.entries()
+    if remaining:
+        print(f"\n⚠️  {len(remaining)} files still failing (see {settings.dead_letter_path})")
+    return 1 if failed or remaining else 0
+
+
+def watch(settings, args, workflow: RAGWorkflow, local_file_reader: Optional[LocalFileReader]) -> int:
+    """Index DATA_DIRECTORY, then index every settled burst of changes until interrupted."""
+    if not local_file_reader:
+        print("\n❌ --watch needs local file processing (PROCESS_LOCAL_FILES=true and Google Vision)")
+        return 1
+    if not workflow.manifest:
+        # Without chunk ids per file, modified files could not replace their old chunks
+        print("\n❌ --watch needs the ingestion manifest (MANIFEST_ENABLED=true)")
+        return 1
+
+    local_dir = settings.data_directory
+    source = f"local:{local_dir}"
+    watcher = DirectoryWatcher(
+        local_dir,
+        local_file_reader.scanner,
+        poll_interval=settings.watch_poll_seconds,
+        debounce=settings.watch_debounce_seconds
+    )
+    try:
+        # Baseline first, so changes made during the catch-up run are picked up afterwards
+        watcher.snapshot()
+        state = workflow.run(
+            repository_url="",
+            local_data_dir=local_dir,
+            process_local_files=True,
+            skip_existing_documents=settings.skip_existing_documents,
+            force_reprocess=settings.force_reprocess,
+            resume=args.resume
+        )
+        write_run_report(settings, state["status"], {source: RAGWorkflow.run_summary(state)}, args.shard)
+        # The watcher's snapshot has already moved past the files of a failed run, so they are
+        # carried into the next run (all files if the catch-up run itself failed)
+        rescan = bool(state.get("error"))
+        pending: List[str] = []
+
+        while True:
+            print(f"\n👀 Watching {local_dir} ({watcher.mode}); press Ctrl+C to stop")
+            changed, deleted = watcher.wait_for_changes()
+            print(f"\nDetected {len(changed)} added or modified and {len(deleted)} deleted files")
+            file_paths = list(dict.fromkeys(pending + changed + deleted))
+            if pending and not rescan:
+                print(f"Retrying {len(pending)} files of the previous failed run")
+            state = workflow.run(
+                repository_url="",
+                local_data_dir=local_dir,
+                process_local_files=True,
+                only_files=None if rescan else {source: file_paths}
+            )
+            write_run_report(settings, state["status"], {source: RAGWorkflow.run_summary(state)}, args.shard)
+            if state.get("error"):
+                pending = file_paths
+                if rescan:
+                    print("Run failed; all files will be checked again with the next change")
+                else:
+                    print(f"Run failed; its {len(pending)} files will be retried with the next change")
+            else:
+                rescan = False
+                pending = []
+    except KeyboardInterrupt:
+        print("\nStopped watching")
+    finally:
+        watcher.close()
+    return 0
 
 
 def main():
     """Main function to run the RAG application."""
+    args = parse_args()
+
     # Load settings from .env file
     print("Loading configuration...")
     settings = get_settings()
+    if args.shard:
+        # Every shard keeps its own manifest, checkpoints, run report and clones; coordinator.py merges them
+        shard_settings = settings.model_copy(update={
+            "manifest_path": args.shard.path_for(settings.manifest_path),
+            "checkpoint_path": args.shard.path_for(settings.checkpoint_path),
+            "run_report_path": args.shard.path_for(settings.run_report_path),
+            "dead_letter_path": args.shard.path_for(settings.dead_letter_path),
+            # Workers updating the same cached clone would race on its index.lock
+            "repo_cache_dir": args.shard.path_for(settings.repo_cache_dir) if settings.repo_cache_dir else ""
+        })
+        if settings.manifest_enabled and args.dry_run:
+            if not os.path.exists(shard_settings.manifest_path):
+                # A dry run writes nothing, so plan against the merged manifest the worker would be seeded from
+                shard_settings = shard_settings.model_copy(update={"manifest_path": settings.manifest_path})
+        elif settings.manifest_enabled:
+            seeded = seed_shard_manifest(
+                args.shard, settings.manifest_path, shard_settings.manifest_path,
+                embedding_model=settings.azure_openai_embedding_deployment
+            )
+            if seeded is not None:
+                print(f"Shard {args.shard}: seeded manifest with {seeded} files from {settings.manifest_path}")
+        settings = shard_settings
+        print(f"Shard {args.shard}: manifest {settings.manifest_path}")
 
     # Initialize services (Dependency Injection - following SOLID principles)
     print("Initializing services...")
 
     # Repository reader service
     repository_reader = GitHubRepositoryReader(
-        github_token=settings.github_token
+        github_token=settings.github_token,
+        cache_dir=settings.repo_cache_dir,
+        git_native=settings.git_native_reads,
+        include_globs=[glob.strip() for glob in settings.repo_include_globs.split(",") if glob.strip()],
+        partial_clone=settings.repo_partial_clone
     )
 
     # Document chunker service
@@ -31,12 +295,16 @@ def main():
         chunk_overlap=settings.chunk_overlap
     )
 
+    if args.dry_run:
+        return dry_run(settings, args, repository_reader, document_chunker)
+
     # Embedding service
     embedding_service = AzureOpenAIEmbeddingService(
         api_key=settings.azure_openai_api_key,
         endpoint=settings.azure_openai_endpoint,
         deployment_name=settings.azure_openai_embedding_deployment,
-        api_version=settings.azure_openai_api_version
+        api_version=settings.azure_openai_api_version,
+        max_concurrency=settings.embedding_max_concurrency
     )
 
     # Vector store service
@@ -54,20 +322,70 @@ def main():
     if settings.process_local_files:
         try:
             print("Initializing Google Vision API service...")
+            vision_cache = None
+            if settings.vision_cache_enabled:
+                vision_cache = VisionCache(
+                    cache_path=settings.vision_cache_path,
+                    max_bytes=settings.vision_cache_max_mb * 1024 * 1024
+                )
+            image_preprocessor = None
+            if settings.image_preprocessing_enabled:
+                image_preprocessor = ImagePreprocessor(
+                    max_dimension=settings.image_max_dimension,
+                    output_format=settings.image_output_format
+                )
+            phash_index = None
+            if settings.image_dedup_enabled:
+                phash_index = PerceptualHashIndex(
+                    index_path=settings.phash_index_path,
+                    max_distance=settings.phash_max_distance
+                )
             vision_analyzer = GoogleVisionAnalyzer(
                 credentials_path=settings.google_application_credentials,
-                max_results=settings.google_vision_max_results
+                max_results=settings.google_vision_max_results,
+                cache=vision_cache,
+                preprocessor=image_preprocessor,
+                phash_index=phash_index,
+                max_concurrency=settings.vision_max_concurrency
             )
 
             # Local file reader service (uses Vision API for images)
             local_file_reader = LocalFileReader(
-                vision_analyzer=vision_analyzer
+                vision_analyzer=vision_analyzer,
+                phash_index=phash_index,
+                **settings.local_file_reader_options()
             )
             print("✓ Google Vision API and Local File Reader initialized")
         except Exception as e:
             print(f"Warning: Failed to initialize Google Vision API: {str(e)}")
             print("Continuing without local file processing...")
 
+    # Ingestion manifest (stat/hash change detection between runs)
+    manifest = None
+    if settings.manifest_enabled:
+        manifest = IngestionManifest(
+            manifest_path=settings.manifest_path,
+            embedding_model=settings.azure_openai_embedding_deployment
+        )
+
+    # Streaming pipeline (stages run concurrently on micro-batches, checkpointed per batch)
+    streaming_pipeline = None
+    checkpoint_journal = None
+    if settings.streaming_mode or args.resume:
+        streaming_pipeline = StreamingPipeline(
+            document_chunker=document_chunker,
+            embedding_service=embedding_service,
+            vector_store=vector_store,
+            queue_size=settings.stream_queue_size,
+            read_batch_files=settings.stream_read_batch_files,
+            embed_batch_chunks=settings.stream_embed_batch_chunks,
+            embed_workers=settings.stream_embed_workers
+        )
+        checkpoint_journal = CheckpointJournal(journal_path=settings.checkpoint_path)
+
+    # Dead-letter store (files that failed to read, analyse or embed, for retry-failed)
+    dead_letters = DeadLetterStore(store_path=settings.dead_letter_path)
+
     # Create workflow
     print("Creating RAG workflow...")
     workflow = RAGWorkflow(
@@ -75,17 +393,58 @@ def main():
         document_chunker=document_chunker,
         embedding_service=embedding_service,
         vector_store=vector_store,
-        local_file_reader=local_file_reader
+        local_file_reader=local_file_reader,
+        manifest=manifest,
+        max_concurrent_clones=settings.max_concurrent_clones,
+        streaming_pipeline=streaming_pipeline,
+        checkpoint_journal=checkpoint_journal,
+        shard=args.shard,
+        dead_letters=dead_letters
     )
 
-    # Run workflow
-    final_state = workflow.run(
-        repository_url=settings.github_repo_url,
+    if args.command == "retry-failed":
+        return retry_failed(settings, args, workflow, dead_letters)
+    if args.watch:
+        return watch(settings, args, workflow, local_file_reader)
+
+    # Run workflow (several repositories run concurrently and share the clients above)
+    repository_urls = settings.repository_urls()
+    if len(repository_urls) > 1:
+        results = workflow.run_many(
+            repository_urls=repository_urls,
+            local_data_dir=settings.data_directory,
+            process_local_files=settings.process_local_files,
+            skip_existing_documents=settings.skip_existing_documents,
+            force_reprocess=settings.force_reprocess,
+            max_workers=settings.max_concurrent_repos,
+            resume=args.resume
+        )
+        if vision_analyzer and vision_analyzer.cache:
+            vision_analyzer.cache.print_stats()
+        failed = any(state.get("error") for state in results.values())
+        write_run_report(settings, "failed" if failed else "completed", {
+            name: RAGWorkflow.run_summary(state) for name, state in results.items()
+        }, args.shard)
+        return 1 if failed else 0
+
+    run_options = dict(
+        repository_url=repository_urls[0] if repository_urls else "",
         local_data_dir=settings.data_directory,
         process_local_files=settings.process_local_files,
         skip_existing_documents=settings.skip_existing_documents,
-        force_reprocess=settings.force_reprocess
+        force_reprocess=settings.force_reprocess,
+        resume=args.resume
     )
+    if args.use_async:
+        final_state = asyncio.run(workflow.arun(**run_options))
+    else:
+        final_state = workflow.run(**run_options)
+
+    if vision_analyzer and vision_analyzer.cache:
+        vision_analyzer.cache.print_stats()
+    write_run_report(settings, final_state["status"], {
+        repository_urls[0] if repository_urls else "local": RAGWorkflow.run_summary(final_state)
+    }, args.shard)
 
     # Display results
     if final_state["status"] == "completed":
@@ -1,5 +1,5 @@
 """Models package."""
-from .data_models import Document, Chunk, EmbeddedChunk, WorkflowState, DocumentType
+from .data_models import Document, Chunk, EmbeddedChunk, ChunkBatch, WorkflowState, DocumentType
 
-__all__ = ["Document", "Chunk", "EmbeddedChunk", "WorkflowState", "DocumentType"]
+__all__ = ["Document", "Chunk", "EmbeddedChunk", "ChunkBatch", "WorkflowState", "DocumentType"]
 
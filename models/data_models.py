@@ -1,9 +1,11 @@
 """Data models for the RAG application."""
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import List, Optional
 from datetime import datetime
 from enum import Enum
 
+import numpy as np
+
 
 class DocumentType(Enum):
     """Type of document."""
@@ -23,6 +25,7 @@ class Document:
     repository_url: str
     document_type: DocumentType = DocumentType.MARKDOWN
     metadata: Optional[dict] = None
+    content_hash: Optional[str] = None  # Git blob SHA or SHA-256 of the source file
 
     def __post_init__(self):
         if self.metadata is None:
@@ -57,6 +60,134 @@ class EmbeddedChunk:
             self.created_at = datetime.utcnow()
 
 
+@dataclass
+class ChunkBatch:
+    """
+    Columnar batch of chunks for the chunk -> embed -> store path.
+
+    Holds one parallel column per chunk attribute instead of a list of
+    Chunk/EmbeddedChunk objects, so the vector store insert payload can be
+    built without walking per-row Python objects. Embeddings are kept as a
+    2-D float32 matrix with one row per chunk.
+    """
+    contents: List[str] = field(default_factory=list)
+    file_paths: List[str] = field(default_factory=list)
+    repository_urls: List[str] = field(default_factory=list)
+    chunk_indices: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+    document_types: List[str] = field(default_factory=list)
+    embeddings: Optional[np.ndarray] = None
+
+    def __post_init__(self):
+        self.chunk_indices = np.asarray(self.chunk_indices, dtype=np.int64)
+        if self.embeddings is not None:
+            self.embeddings = np.asarray(self.embeddings, dtype=np.float32)
+            if self.embeddings.ndim != 2 or self.embeddings.shape[0] != len(self.contents):
+                raise ValueError(
+                    f"Embedding matrix shape {self.embeddings.shape} does not match "
+                    f"{len(self.contents)} chunks"
+                )
+
+    def __len__(self) -> int:
+        return len(self.contents)
+
+    @property
+    def is_embedded(self) -> bool:
+        """Whether the batch carries an embedding matrix."""
+        return self.embeddings is not None
+
+    @classmethod
+    def from_chunks(cls, chunks: List[Chunk]) -> "ChunkBatch":
+        """Build a batch from Chunk objects."""
+        return cls(
+            contents=[chunk.content for chunk in chunks],
+            file_paths=[chunk.source_file_path for chunk in chunks],
+            repository_urls=[chunk.repository_url for chunk in chunks],
+            chunk_indices=np.fromiter((chunk.chunk_index for chunk in chunks), dtype=np.int64, count=len(chunks)),
+            document_types=[chunk.document_type.value for chunk in chunks]
+        )
+
+    @classmethod
+    def from_embedded_chunks(cls, embedded_chunks: List[EmbeddedChunk]) -> "ChunkBatch":
+        """Build an embedded batch from EmbeddedChunk objects."""
+        batch = cls.from_chunks([ec.chunk for ec in embedded_chunks])
+        if embedded_chunks:
+            return batch.with_embeddings(np.asarray([ec.embedding for ec in embedded_chunks], dtype=np.float32))
+        return batch
+
+    @classmethod
+    def concat(cls, batches: List["ChunkBatch"]) -> "ChunkBatch":
+        """Concatenate several batches into one."""
+        batches = [batch for batch in batches if len(batch)]
+        if not batches:
+            return cls()
+
+        embedded = all(batch.is_embedded for batch in batches)
+        return cls(
+            contents=[value for batch in batches for value in batch.contents],
+            file_paths=[value for batch in batches for value in batch.file_paths],
+            repository_urls=[value for batch in batches for value in batch.repository_urls],
+            chunk_indices=np.concatenate([batch.chunk_indices for batch in batches]),
+            document_types=[value for batch in batches for value in batch.document_types],
+            embeddings=np.vstack([batch.embeddings for batch in batches]) if embedded else None
+        )
+
+    def with_embeddings(self, embeddings: np.ndarray) -> "ChunkBatch":
+        """Return a copy of this batch carrying the given embedding matrix."""
+        return ChunkBatch(
+            contents=self.contents,
+            file_paths=self.file_paths,
+            repository_urls=self.repository_urls,
+            chunk_indices=self.chunk_indices,
+            document_types=self.document_types,
+            embeddings=embeddings
+        )
+
+    def slice(self, start: int, stop: int) -> "ChunkBatch":
+        """Return the rows in [start, stop) as a new batch (numeric columns are views)."""
+        return ChunkBatch(
+            contents=self.contents[start:stop],
+            file_paths=self.file_paths[start:stop],
+            repository_urls=self.repository_urls[start:stop],
+            chunk_indices=self.chunk_indices[start:stop],
+            document_types=self.document_types[start:stop],
+            embeddings=self.embeddings[start:stop] if self.embeddings is not None else None
+        )
+
+    def take(self, indices: List[int]) -> "ChunkBatch":
+        """Return the rows at the given positions as a new batch."""
+        positions = np.asarray(indices, dtype=np.int64)
+        return ChunkBatch(
+            contents=[self.contents[index] for index in indices],
+            file_paths=[self.file_paths[index] for index in indices],
+            repository_urls=[self.repository_urls[index] for index in indices],
+            chunk_indices=self.chunk_indices[positions],
+            document_types=[self.document_types[index] for index in indices],
+            embeddings=self.embeddings[positions] if self.embeddings is not None else None
+        )
+
+    def without_files(self, file_paths: set) -> "ChunkBatch":
+        """Return the rows whose file is not in file_paths."""
+        if not file_paths:
+            return self
+        return self.take([index for index, file_path in enumerate(self.file_paths) if file_path not in file_paths])
+
+    def to_chunks(self) -> List[Chunk]:
+        """Materialize the batch back into Chunk objects."""
+        return [
+            Chunk(
+                content=content,
+                chunk_index=int(chunk_index),
+                source_file_path=file_path,
+                repository_url=repository_url,
+                document_type=DocumentType(document_type)
+            )
+            for content, file_path, repository_url, chunk_index, document_type in zip(
+                self.contents, self.file_paths, self.repository_urls,
+                self.chunk_indices, self.document_types
+            )
+        ]
+
+
 @dataclass
 class WorkflowState:
     """State for the LangGraph workflow."""
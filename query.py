@@ -43,6 +43,20 @@ class RAGQueryService:
 
         return results
 
+    async def aquery(self, query_text: str, top_k: int = 5) -> List[Dict]:
+        """
+        Query the RAG system with the async embedding and Milvus clients.
+
+        Args:
+            query_text: Query text
+            top_k: Number of results to return
+
+        Returns:
+            List of search results
+        """
+        query_embedding = await self.embedding_service.acreate_embedding(query_text)
+        return await self.vector_store.asearch(query_embedding, top_k=top_k)
+
     def display_results(self, results: List[Dict]) -> None:
         """
         Display search results in a readable format.
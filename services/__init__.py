@@ -4,7 +4,13 @@ from .document_chunker import DocumentChunker
 from .embedding_service import AzureOpenAIEmbeddingService
 from .vector_store import MilvusVectorStore
 from .vision_analyzer import GoogleVisionAnalyzer
+from .vision_cache import VisionCache
+from .image_preprocessor import ImagePreprocessor
+from .perceptual_hash import PerceptualHashIndex
 from .local_file_reader import LocalFileReader
+from .ingestion_manifest import IngestionManifest
+from .checkpoint_journal import CheckpointJournal
+from .dead_letter_store import DeadLetterStore
 
 __all__ = [
     "GitHubRepositoryReader",
@@ -12,6 +18,12 @@ __all__ = [
     "AzureOpenAIEmbeddingService",
     "MilvusVectorStore",
     "GoogleVisionAnalyzer",
-    "LocalFileReader"
+    "VisionCache",
+    "ImagePreprocessor",
+    "PerceptualHashIndex",
+    "LocalFileReader",
+    "IngestionManifest",
+    "CheckpointJournal",
+    "DeadLetterStore"
 ]
 
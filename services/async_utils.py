@@ -0,0 +1,16 @@
+"""Asyncio helpers that also run on Python 3.8."""
+import asyncio
+import contextvars
+import functools
+
+
+async def to_thread(func, *args, **kwargs):
+    """
+    Run a blocking function in the event loop's default executor.
+
+    Same as asyncio.to_thread (Python 3.9+): the call sees the caller's
+    context variables and its result or exception is returned to the awaiting task.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(None, functools.partial(context.run, func, *args, **kwargs))
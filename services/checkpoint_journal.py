@@ -0,0 +1,133 @@
+"""Durable journal of stored micro-batches for resuming interrupted runs."""
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+
+class CheckpointJournal:
+    """
+    SQLite journal of the chunks a streaming run has written so far.
+
+    A file is journaled before its chunks are inserted ("intent"), its
+    chunk ids right after every insert ("inserted"), and it is marked
+    "committed" once every chunk of its read micro-batch is stored. A later
+    run rolls back uncommitted files: their journaled chunk ids, and by file
+    path the chunks of an insert that crashed before its ids were journaled,
+    so a crash between insert and commit never leaves orphans. With
+    --resume it keeps committed files and only reads what is left. Entries
+    of a source are discarded once its run has completed.
+    """
+
+    def __init__(self, journal_path: str):
+        """
+        Initialize the checkpoint journal.
+
+        Args:
+            journal_path: Path to the SQLite journal file
+        """
+        self.journal_path = journal_path
+        self._lock = threading.Lock()
+
+        journal_dir = os.path.dirname(os.path.abspath(journal_path))
+        os.makedirs(journal_dir, exist_ok=True)
+
+        self._connection = sqlite3.connect(journal_path, check_same_thread=False)
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS files (
+                source TEXT NOT NULL,
+                file_path TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                chunk_ids TEXT NOT NULL,
+                committed INTEGER NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (source, file_path)
+            )
+            """
+        )
+        self._connection.commit()
+
+    def record_intent(self, source: str, file_paths: Iterable[str]) -> None:
+        """Journal files (as uncommitted, without chunk ids) before chunks of them are inserted."""
+        now = time.time()
+        with self._lock:
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO files "
+                "(source, file_path, content_hash, chunk_ids, committed, updated_at) VALUES (?, ?, '', '[]', 0, ?)",
+                [(source, file_path, now) for file_path in file_paths]
+            )
+            self._connection.commit()
+
+    def record_inserted(self, source: str, files: Dict[str, List[int]]) -> None:
+        """Journal chunk ids right after they were inserted, before their batch is committed."""
+        now = time.time()
+        with self._lock:
+            for file_path, chunk_ids in files.items():
+                row = self._connection.execute(
+                    "SELECT chunk_ids FROM files WHERE source = ? AND file_path = ? AND committed = 0",
+                    (source, file_path)
+                ).fetchone()
+                known_ids = json.loads(row[0]) if row else []
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO files "
+                    "(source, file_path, content_hash, chunk_ids, committed, updated_at) VALUES (?, ?, '', ?, 0, ?)",
+                    (source, file_path, json.dumps(known_ids + list(chunk_ids)), now)
+                )
+            self._connection.commit()
+
+    def commit(self, source: str, files: Dict[str, List[int]], content_hashes: Dict[str, str]) -> None:
+        """
+        Mark the files of a fully stored micro-batch as committed.
+
+        Args:
+            source: Source the files belong to
+            files: File path -> ids of all of its stored chunks
+            content_hashes: File path -> content hash the file was read with
+        """
+        now = time.time()
+        with self._lock:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO files "
+                "(source, file_path, content_hash, chunk_ids, committed, updated_at) VALUES (?, ?, ?, ?, 1, ?)",
+                [
+                    (source, file_path, content_hashes.get(file_path, ""), json.dumps(chunk_ids), now)
+                    for file_path, chunk_ids in files.items()
+                ]
+            )
+            self._connection.commit()
+
+    def entries(self, source: str) -> Dict[str, dict]:
+        """Journaled files of a source with content_hash, chunk_ids and committed."""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT file_path, content_hash, chunk_ids, committed FROM files WHERE source = ?",
+                (source,)
+            ).fetchall()
+        return {
+            file_path: {
+                "content_hash": content_hash,
+                "chunk_ids": json.loads(chunk_ids),
+                "committed": bool(committed)
+            }
+            for file_path, content_hash, chunk_ids, committed in rows
+        }
+
+    def discard(self, source: str, file_paths: Optional[Iterable[str]] = None) -> None:
+        """Forget journaled files of a source (all of them when file_paths is None)."""
+        with self._lock:
+            if file_paths is None:
+                self._connection.execute("DELETE FROM files WHERE source = ?", (source,))
+            else:
+                self._connection.executemany(
+                    "DELETE FROM files WHERE source = ? AND file_path = ?",
+                    [(source, file_path) for file_path in file_paths]
+                )
+            self._connection.commit()
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,113 @@
+"""Persistent dead-letter store of files that failed to ingest."""
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+
+class DeadLetterStore:
+    """
+    SQLite store of files that could not be read, analysed or embedded.
+
+    Failed files are left out of the vector store (and the manifest)
+    instead of being indexed as error text, and recorded here with the
+    stage and reason of their last failure. `python main.py retry-failed`
+    reprocesses exactly these files; an entry is resolved once its file
+    has been stored or no longer exists.
+    """
+
+    def __init__(self, store_path: str):
+        """
+        Initialize the dead-letter store.
+
+        Args:
+            store_path: Path to the SQLite store file
+        """
+        self.store_path = store_path
+        self._lock = threading.Lock()
+
+        store_dir = os.path.dirname(os.path.abspath(store_path))
+        os.makedirs(store_dir, exist_ok=True)
+
+        self._connection = sqlite3.connect(store_path, check_same_thread=False)
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS dead_letters (
+                source TEXT NOT NULL,
+                file_path TEXT NOT NULL,
+                stage TEXT NOT NULL,
+                reason TEXT NOT NULL,
+                attempts INTEGER NOT NULL,
+                first_failed_at REAL NOT NULL,
+                last_failed_at REAL NOT NULL,
+                PRIMARY KEY (source, file_path)
+            )
+            """
+        )
+        self._connection.commit()
+
+    def record(self, source: str, file_path: str, stage: str, reason: str) -> None:
+        """
+        Record a failed file, counting repeated failures.
+
+        Args:
+            source: Source the file belongs to (repository URL or "local:<dir>")
+            file_path: Recorded file path
+            stage: Stage that failed ("read", "vision", "embed")
+            reason: Error message
+        """
+        now = time.time()
+        with self._lock:
+            self._connection.execute(
+                "INSERT INTO dead_letters "
+                "(source, file_path, stage, reason, attempts, first_failed_at, last_failed_at) "
+                "VALUES (?, ?, ?, ?, 1, ?, ?) "
+                "ON CONFLICT (source, file_path) DO UPDATE SET "
+                "stage = excluded.stage, reason = excluded.reason, attempts = attempts + 1, "
+                "last_failed_at = excluded.last_failed_at",
+                (source, file_path, stage, reason, now, now)
+            )
+            self._connection.commit()
+
+    def resolve(self, source: str, file_paths: Iterable[str]) -> None:
+        """Forget files that have been stored since (or no longer exist)."""
+        with self._lock:
+            self._connection.executemany(
+                "DELETE FROM dead_letters WHERE source = ? AND file_path = ?",
+                [(source, file_path) for file_path in file_paths]
+            )
+            self._connection.commit()
+
+    def entries(self, source: Optional[str] = None) -> List[dict]:
+        """Failed files (of one source) with stage, reason and attempts."""
+        query = "SELECT source, file_path, stage, reason, attempts, last_failed_at FROM dead_letters"
+        parameters = ()
+        if source is not None:
+            query += " WHERE source = ?"
+            parameters = (source,)
+        with self._lock:
+            rows = self._connection.execute(query + " ORDER BY source, file_path", parameters).fetchall()
+        return [
+            {
+                "source": row_source,
+                "file_path": file_path,
+                "stage": stage,
+                "reason": reason,
+                "attempts": attempts,
+                "last_failed_at": last_failed_at
+            }
+            for row_source, file_path, stage, reason, attempts, last_failed_at in rows
+        ]
+
+    def files_by_source(self) -> Dict[str, List[str]]:
+        """Source -> failed file paths."""
+        files: Dict[str, List[str]] = {}
+        for entry in self.entries():
+            files.setdefault(entry["source"], []).append(entry["file_path"])
+        return files
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,315 @@
+"""Fast directory walker with .gitignore-style filtering."""
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+# Directories that never contain documents worth indexing
+DEFAULT_IGNORE_PATTERNS = [
+    ".git/",
+    ".hg/",
+    ".svn/",
+    "node_modules/",
+    "__pycache__/",
+    ".venv/",
+    "venv/",
+    ".tox/",
+    ".cache/",
+    "~$*",
+]
+
+
+def _translate(pattern: str) -> str:
+    """Translate a gitignore glob (without leading/trailing slash) into a regex."""
+    parts = []
+    i, n = 0, len(pattern)
+    while i < n:
+        char = pattern[i]
+        if char == "*":
+            if pattern.startswith("**", i):
+                segment_start = i == 0 or pattern[i - 1] == "/"
+                after = i + 2
+                if segment_start and after < n and pattern[after] == "/":
+                    # "**/" matches zero or more directories
+                    parts.append("(?:.*/)?")
+                    i = after + 1
+                    continue
+                if segment_start and after == n:
+                    # Trailing "/**" matches everything inside
+                    parts.append(".*")
+                    i = after
+                    continue
+                parts.append("[^/]*")
+                i = after
+                continue
+            parts.append("[^/]*")
+        elif char == "?":
+            parts.append("[^/]")
+        elif char == "[":
+            end = pattern.find("]", i + 2)
+            if end == -1:
+                parts.append(re.escape(char))
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                parts.append("[" + body.replace("\\", "\\\\") + "]")
+                i = end + 1
+                continue
+        elif char == "\\" and i + 1 < n:
+            parts.append(re.escape(pattern[i + 1]))
+            i += 2
+            continue
+        else:
+            parts.append(re.escape(char))
+        i += 1
+    return "".join(parts)
+
+
+@dataclass
+class IgnoreRule:
+    """One compiled .gitignore-style pattern."""
+    base: str  # Directory the pattern is relative to ("" for the scan root)
+    regex: "re.Pattern"
+    negated: bool
+    directory_only: bool
+
+    @classmethod
+    def parse(cls, line: str, base: str = "") -> Optional["IgnoreRule"]:
+        """
+        Compile a pattern line, or return None for blank lines and comments.
+
+        Args:
+            line: Pattern as written in an ignore file
+            base: Relative directory of the ignore file, with forward slashes
+        """
+        line = line.rstrip("\n\r")
+        if not line.strip() or line.startswith("#"):
+            return None
+        if not line.endswith("\\ "):
+            line = line.rstrip()
+
+        negated = line.startswith("!")
+        if negated:
+            line = line[1:]
+        elif line.startswith("\\"):
+            line = line[1:]
+
+        directory_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            return None
+
+        # A slash anywhere but the end anchors the pattern to the ignore file's directory
+        anchored = "/" in line
+        line = line.lstrip("/")
+        prefix = "" if anchored else "(?:.*/)?"
+        return cls(
+            base=base,
+            regex=re.compile(prefix + _translate(line) + r"\Z", re.DOTALL),
+            negated=negated,
+            directory_only=directory_only
+        )
+
+
+class IgnoreRules:
+    """Ordered set of ignore rules where the last matching rule wins, as in git."""
+
+    def __init__(self, rules: Optional[List[IgnoreRule]] = None):
+        self.rules = rules or []
+
+    @classmethod
+    def from_patterns(cls, patterns: Iterable[str], base: str = "") -> "IgnoreRules":
+        """Compile pattern lines relative to base."""
+        return cls([rule for rule in (IgnoreRule.parse(line, base) for line in patterns) if rule])
+
+    def extended(self, patterns: Iterable[str], base: str) -> "IgnoreRules":
+        """Rules with the patterns of a nested ignore file appended (they take precedence)."""
+        added = IgnoreRules.from_patterns(patterns, base).rules
+        return IgnoreRules(self.rules + added) if added else self
+
+    def is_ignored(self, relative_path: str, is_dir: bool) -> bool:
+        """
+        Check a path against the rules.
+
+        Args:
+            relative_path: Path relative to the scan root, with forward slashes
+            is_dir: Whether the path is a directory
+        """
+        ignored = False
+        for rule in self.rules:
+            if rule.directory_only and not is_dir:
+                continue
+            if rule.base:
+                if not relative_path.startswith(rule.base + "/"):
+                    continue
+                candidate = relative_path[len(rule.base) + 1:]
+            else:
+                candidate = relative_path
+            if rule.regex.match(candidate):
+                ignored = not rule.negated
+        return ignored
+
+
+@dataclass
+class ScanResult:
+    """Files found by a scan, plus counters for the throughput report."""
+    file_paths: List[str] = field(default_factory=list)
+    file_types: Dict[str, str] = field(default_factory=dict)
+    # File path -> (size, mtime in ns), from the stat taken for the size limit
+    file_stats: Dict[str, Tuple[int, int]] = field(default_factory=dict)
+    # Directories that were listed (not pruned), e.g. to watch them for changes
+    directory_paths: List[str] = field(default_factory=list)
+    entries: int = 0
+    directories: int = 0
+    pruned_directories: int = 0
+    ignored_files: int = 0
+    unsupported_files: int = 0
+    oversized_files: List[Tuple[str, int]] = field(default_factory=list)
+    errors: int = 0
+    elapsed: float = 0.0
+
+    def print_summary(self) -> None:
+        """Print scan throughput and what was filtered out."""
+        rate = self.entries / self.elapsed if self.elapsed > 0 else 0.0
+        print(f"Scanned {self.entries} entries in {self.directories} directories "
+              f"in {self.elapsed:.2f}s ({rate:.0f} entries/s)")
+        print(f"  - Matched: {len(self.file_paths)} files")
+        if self.pruned_directories or self.ignored_files:
+            print(f"  - Ignored: {self.pruned_directories} directories, {self.ignored_files} files")
+        if self.unsupported_files:
+            print(f"  - Unsupported: {self.unsupported_files} files")
+        for file_path, size in self.oversized_files:
+            print(f"  - Too large, skipped: {file_path} ({size / (1024 * 1024):.1f} MB)")
+        if self.errors:
+            print(f"  - Unreadable: {self.errors} directories")
+
+
+class DirectoryScanner:
+    """
+    Walks a directory tree with os.scandir and returns indexable files.
+
+    Ignored directories are pruned before they are opened, and files are
+    filtered by extension using the directory entry name alone, so only
+    supported files are ever stat'ed (for the size limit). Patterns follow
+    .gitignore syntax; ignore files found in any directory apply to that
+    directory's subtree, like nested .gitignore files.
+    """
+
+    def __init__(
+        self,
+        extensions: Dict[str, str],
+        ignore_patterns: Optional[Sequence[str]] = None,
+        ignore_files: Sequence[str] = (".gitignore", ".ragignore"),
+        size_limits: Optional[Dict[str, int]] = None,
+        use_default_ignores: bool = True
+    ):
+        """
+        Initialize the directory scanner.
+
+        Args:
+            extensions: Mapping of lower-case extension (e.g. '.png') to file type label
+            ignore_patterns: Extra .gitignore-style patterns relative to the scan root
+            ignore_files: Names of ignore files read from every scanned directory
+            size_limits: Maximum size in bytes per file type label (missing or 0 = no limit)
+            use_default_ignores: Also prune VCS, dependency and cache directories
+        """
+        self.extensions = extensions
+        self.ignore_files = [name for name in ignore_files if name]
+        self.size_limits = size_limits or {}
+
+        patterns = list(DEFAULT_IGNORE_PATTERNS) if use_default_ignores else []
+        patterns.extend(ignore_patterns or [])
+        self.rules = IgnoreRules.from_patterns(patterns)
+
+    def scan(self, root: str) -> ScanResult:
+        """
+        Find all supported files below root.
+
+        Args:
+            root: Directory to scan
+
+        Returns:
+            ScanResult with sorted file paths and scan counters
+        """
+        result = ScanResult()
+        started = time.perf_counter()
+        stack: List[Tuple[str, str, IgnoreRules]] = [(root, "", self.rules)]
+
+        while stack:
+            directory, relative_dir, rules = stack.pop()
+
+            try:
+                with os.scandir(directory) as entries:
+                    entries = list(entries)
+            except OSError as e:
+                result.errors += 1
+                print(f"Warning: Cannot read directory {directory}: {str(e)}")
+                continue
+            result.directories += 1
+            result.directory_paths.append(directory)
+
+            ignore_files = [entry.path for entry in entries if entry.name in self.ignore_files]
+            if ignore_files:
+                rules = rules.extended(self._read_ignore_files(ignore_files), relative_dir)
+
+            for entry in entries:
+                result.entries += 1
+                relative_path = f"{relative_dir}/{entry.name}" if relative_dir else entry.name
+
+                try:
+                    # d_type from the directory listing; no stat for regular entries
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                except OSError:
+                    continue
+
+                if is_dir:
+                    if rules.is_ignored(relative_path, True):
+                        result.pruned_directories += 1
+                    else:
+                        stack.append((entry.path, relative_path, rules))
+                    continue
+
+                file_type = self.extensions.get(os.path.splitext(entry.name)[1].lower())
+                if file_type is None:
+                    result.unsupported_files += 1
+                    continue
+                if rules.is_ignored(relative_path, False):
+                    result.ignored_files += 1
+                    continue
+
+                try:
+                    if not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                except OSError:
+                    continue
+
+                limit = self.size_limits.get(file_type)
+                if limit and stat.st_size > limit:
+                    result.oversized_files.append((entry.path, stat.st_size))
+                    continue
+
+                result.file_paths.append(entry.path)
+                result.file_types[entry.path] = file_type
+                result.file_stats[entry.path] = (stat.st_size, stat.st_mtime_ns)
+
+        # Sorted so that output order does not depend on the filesystem
+        result.file_paths.sort()
+        result.oversized_files.sort()
+        result.elapsed = time.perf_counter() - started
+        return result
+
+    def _read_ignore_files(self, paths: List[str]) -> List[str]:
+        """Pattern lines of the given ignore files, in the configured order."""
+        order = {name: index for index, name in enumerate(self.ignore_files)}
+        lines = []
+        for path in sorted(paths, key=lambda path: order[os.path.basename(path)]):
+            try:
+                with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+                    lines.extend(f.readlines())
+            except OSError:
+                continue
+        return lines
@@ -0,0 +1,168 @@
+"""Change detection for a watched directory (inotify, or mtime polling)."""
+import ctypes
+import errno
+import os
+import select
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from .directory_scanner import DirectoryScanner
+
+try:
+    _libc = ctypes.CDLL(None, use_errno=True)
+    _libc.inotify_init1
+    _libc.inotify_add_watch
+except (OSError, AttributeError, TypeError):
+    # No inotify (not Linux): the watcher polls file mtimes instead
+    _libc = None
+
+# inotify events that can add, change or remove an indexable file
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_WATCH_MASK = (_IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO
+               | _IN_CREATE | _IN_DELETE | _IN_DELETE_SELF)
+
+
+class DirectoryWatcher:
+    """
+    Waits for files below a directory to be added, modified or deleted.
+
+    On Linux the watcher sleeps in select() on an inotify descriptor with
+    a watch per (non-ignored) directory, so an idle directory costs no
+    CPU; elsewhere, or when the inotify watch limit is reached, it wakes
+    up every poll_interval instead. Either way a wake-up only triggers a
+    rescan with the DirectoryScanner (one stat per supported file, no
+    reads), which is diffed against the previous scan by size and mtime.
+
+    Bursts are debounced: changes are returned once nothing has changed
+    for debounce seconds, so copying a folder of diagrams (or a file
+    being written in pieces) yields one batch of complete files.
+    """
+
+    # With inotify, rescan this often anyway in case the kernel dropped events (queue overflow)
+    INOTIFY_RESCAN_SECONDS = 60.0
+
+    def __init__(
+        self,
+        root: str,
+        scanner: DirectoryScanner,
+        poll_interval: float = 2.0,
+        debounce: float = 1.0,
+        use_inotify: bool = True
+    ):
+        """
+        Initialize the directory watcher.
+
+        Args:
+            root: Directory to watch (recursively)
+            scanner: Scanner that decides which files are indexable (extensions, ignore rules, size limits)
+            poll_interval: Seconds between rescans when inotify is not available
+            debounce: Seconds without changes before a burst of changes is returned
+            use_inotify: Use inotify when available instead of polling
+        """
+        self.root = root
+        self.scanner = scanner
+        self.poll_interval = max(0.1, poll_interval)
+        self.debounce = max(0.0, debounce)
+        self._files: Dict[str, Tuple[int, int]] = {}
+        self._inotify_fd: Optional[int] = None
+        if use_inotify and _libc is not None:
+            fd = _libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+            if fd >= 0:
+                self._inotify_fd = fd
+            else:
+                print(f"Warning: inotify unavailable ({os.strerror(ctypes.get_errno())}), polling instead")
+
+    @property
+    def mode(self) -> str:
+        """How changes are detected, for log messages."""
+        if self._inotify_fd is not None:
+            return "inotify"
+        return f"polling every {self.poll_interval:g}s"
+
+    def snapshot(self) -> List[str]:
+        """Scan the directory and remember its files as the baseline; returns them."""
+        self._rescan()
+        return sorted(self._files)
+
+    def wait_for_changes(self) -> Tuple[List[str], List[str]]:
+        """
+        Block until files changed and the changes have settled.
+
+        Returns:
+            (added or modified file paths, deleted file paths) since the previous call
+        """
+        while True:
+            if self._inotify_fd is not None:
+                if self._wait(self.INOTIFY_RESCAN_SECONDS):
+                    # Keep draining events until the directory has been quiet for debounce seconds
+                    while self._wait(self.debounce):
+                        pass
+                changed, deleted = self._rescan()
+            else:
+                time.sleep(self.poll_interval)
+                changed, deleted = self._rescan()
+                # Rescan until nothing moves any more, so files still being written are picked up complete
+                while changed or deleted:
+                    time.sleep(self.debounce)
+                    more_changed, more_deleted = self._rescan()
+                    if not more_changed and not more_deleted:
+                        break
+                    changed = (changed | more_changed) - more_deleted
+                    deleted = (deleted | more_deleted) - more_changed
+
+            if changed or deleted:
+                return sorted(changed), sorted(deleted)
+
+    def close(self) -> None:
+        """Release the inotify descriptor."""
+        if self._inotify_fd is not None:
+            os.close(self._inotify_fd)
+            self._inotify_fd = None
+
+    def _rescan(self) -> Tuple[Set[str], Set[str]]:
+        """Scan the directory, diff it with the previous scan and watch any new directories."""
+        if not os.path.isdir(self.root):
+            scan_files, directories = {}, []
+        else:
+            scan = self.scanner.scan(self.root)
+            scan_files, directories = scan.file_stats, scan.directory_paths
+
+        changed = {file_path for file_path, stat in scan_files.items() if self._files.get(file_path) != stat}
+        deleted = set(self._files) - set(scan_files)
+        self._files = scan_files
+        self._add_watches(directories)
+        return changed, deleted
+
+    def _add_watches(self, directories: List[str]) -> None:
+        """Watch every listed directory (adding an existing watch again is a no-op)."""
+        if self._inotify_fd is None:
+            return
+        for directory in directories:
+            if _libc.inotify_add_watch(self._inotify_fd, os.fsencode(directory), _WATCH_MASK) < 0:
+                error = ctypes.get_errno()
+                if error in (errno.ENOENT, errno.ENOTDIR):
+                    # Removed since the scan; the parent's watch reports it
+                    continue
+                print(f"Warning: Cannot watch {directory} ({os.strerror(error)}), "
+                      f"polling every {self.poll_interval:g}s instead")
+                self.close()
+                return
+
+    def _wait(self, timeout: float) -> bool:
+        """Wait up to timeout seconds for inotify events; drain them and return whether any arrived."""
+        readable, _, _ = select.select([self._inotify_fd], [], [], timeout)
+        if not readable:
+            return False
+        while True:
+            try:
+                if not os.read(self._inotify_fd, 65536):
+                    break
+            except BlockingIOError:
+                break
+        return True
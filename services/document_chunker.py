@@ -1,9 +1,10 @@
 """Document chunking service implementation."""
 from typing import List
+import numpy as np
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
 from interfaces import IDocumentChunker
-from models import Document, Chunk
+from models import Document, Chunk, ChunkBatch
 
 
 class DocumentChunker(IDocumentChunker):
@@ -26,12 +27,13 @@ class DocumentChunker(IDocumentChunker):
             separators=["\n\n", "\n", " ", ""]
         )
 
-    def chunk_document(self, document: Document) -> List[Chunk]:
+    def chunk_document(self, document: Document, start_index: int = 0) -> List[Chunk]:
         """
         Chunk a document into smaller pieces.
 
         Args:
             document: Document to chunk
+            start_index: chunk_index of the first chunk
 
         Returns:
             List of Chunk objects
@@ -42,7 +44,7 @@ class DocumentChunker(IDocumentChunker):
         for idx, text_chunk in enumerate(text_chunks):
             chunk = Chunk(
                 content=text_chunk,
-                chunk_index=idx,
+                chunk_index=start_index + idx,
                 source_file_path=document.file_path,
                 repository_url=document.repository_url,
                 document_type=document.document_type,
@@ -59,6 +61,9 @@ class DocumentChunker(IDocumentChunker):
         """
         Chunk multiple documents.
 
+        Documents sharing a file (e.g. the sheets of a workbook) number
+        their chunks consecutively, so (file_path, chunk_index) stays unique.
+
         Args:
             documents: List of documents to chunk
 
@@ -66,12 +71,57 @@ class DocumentChunker(IDocumentChunker):
             List of all chunks from all documents
         """
         all_chunks = []
+        next_index = {}
 
         for document in documents:
-            chunks = self.chunk_document(document)
+            key = (document.repository_url, document.file_path)
+            chunks = self.chunk_document(document, next_index.get(key, 0))
+            next_index[key] = next_index.get(key, 0) + len(chunks)
             all_chunks.extend(chunks)
             print(f"Chunked {document.file_path}: {len(chunks)} chunks")
 
         print(f"Total chunks created: {len(all_chunks)}")
         return all_chunks
 
+    def chunk_documents_to_batch(self, documents: List[Document]) -> ChunkBatch:
+        """
+        Chunk multiple documents straight into a columnar batch.
+
+        Chunk indices run on across documents sharing a file, as in
+        chunk_documents.
+
+        Args:
+            documents: List of documents to chunk
+
+        Returns:
+            ChunkBatch holding all chunks from all documents
+        """
+        contents = []
+        file_paths = []
+        repository_urls = []
+        chunk_indices = []
+        document_types = []
+        next_index = {}
+
+        for document in documents:
+            text_chunks = self.text_splitter.split_text(document.content)
+            count = len(text_chunks)
+            key = (document.repository_url, document.file_path)
+            start = next_index.get(key, 0)
+            next_index[key] = start + count
+
+            contents.extend(text_chunks)
+            file_paths.extend([document.file_path] * count)
+            repository_urls.extend([document.repository_url] * count)
+            chunk_indices.extend(range(start, start + count))
+            document_types.extend([document.document_type.value] * count)
+            print(f"Chunked {document.file_path}: {count} chunks")
+
+        print(f"Total chunks created: {len(contents)}")
+        return ChunkBatch(
+            contents=contents,
+            file_paths=file_paths,
+            repository_urls=repository_urls,
+            chunk_indices=np.asarray(chunk_indices, dtype=np.int64),
+            document_types=document_types
+        )
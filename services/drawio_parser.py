@@ -0,0 +1,205 @@
+"""Structured parser for draw.io (.drawio) diagram files."""
+import base64
+import html
+import io
+import re
+import zlib
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import unquote
+from xml.etree import ElementTree
+
+
+# Elements that wrap an mxCell and carry its id and label (custom properties)
+WRAPPER_TAGS = {"object", "UserObject"}
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_BREAK_RE = re.compile(r"<br\s*/?>|</div>|</p>|</li>", re.IGNORECASE)
+_SPACE_RE = re.compile(r"\s+")
+
+
+@dataclass
+class DrawioPage:
+    """Labels and connections of one diagram page."""
+    name: str
+    nodes: List[str] = field(default_factory=list)
+    edges: List[Tuple[str, str, str]] = field(default_factory=list)
+
+
+@dataclass
+class DrawioDiagram:
+    """Compact, retrieval-oriented view of a .drawio file."""
+    pages: List[DrawioPage] = field(default_factory=list)
+    raw_xml: Optional[str] = None
+
+    @property
+    def node_count(self) -> int:
+        return sum(len(page.nodes) for page in self.pages)
+
+    @property
+    def edge_count(self) -> int:
+        return sum(len(page.edges) for page in self.pages)
+
+    def to_text(self) -> str:
+        """Render pages, node labels and "A -> B" edges as plain text."""
+        lines = []
+        for page in self.pages:
+            lines.append(f"Page: {page.name}")
+            if page.nodes:
+                lines.append("Nodes:")
+                lines.extend(f"- {node}" for node in page.nodes)
+            if page.edges:
+                lines.append("Edges:")
+                for source, target, label in page.edges:
+                    lines.append(f"- {source} -> {target}" + (f" [{label}]" if label else ""))
+            lines.append("")
+        return "\n".join(lines).strip()
+
+
+def clean_label(value: str) -> str:
+    """Turn a (possibly HTML) mxCell value into plain single-line text."""
+    if not value:
+        return ""
+    text = _BREAK_RE.sub(" ", value)
+    text = _TAG_RE.sub("", text)
+    return _SPACE_RE.sub(" ", html.unescape(text)).strip()
+
+
+def decode_diagram_payload(payload: str) -> bytes:
+    """
+    Decode the text content of a compressed <diagram> element.
+
+    draw.io stores pages as base64(raw deflate(urlencode(xml))).
+
+    Args:
+        payload: Text content of the <diagram> element
+
+    Returns:
+        The page's mxGraphModel XML
+    """
+    payload = payload.strip()
+    try:
+        inflated = zlib.decompress(base64.b64decode(payload, validate=True), -zlib.MAX_WBITS)
+        return unquote(inflated.decode("utf-8")).encode("utf-8")
+    except (ValueError, zlib.error):
+        # Older files store URL-encoded but uncompressed XML
+        return unquote(payload).encode("utf-8")
+
+
+def parse_drawio(file_path: str, include_raw_xml: bool = False) -> DrawioDiagram:
+    """
+    Parse a .drawio file into page names, node labels and edges.
+
+    The file is read with an incremental parser and every element is
+    cleared once handled, so geometry and style data is never kept.
+
+    Args:
+        file_path: Path to the .drawio file
+        include_raw_xml: Also keep the original file content
+
+    Returns:
+        DrawioDiagram for the file
+    """
+    diagram = DrawioDiagram()
+    collector = None
+
+    with open(file_path, 'rb') as f:
+        for event, element in ElementTree.iterparse(f, events=("start", "end")):
+            if event == "start":
+                if element.tag == "diagram":
+                    collector = _PageCollector(element.get("name") or f"Page-{len(diagram.pages) + 1}")
+                elif collector is not None:
+                    collector.start(element)
+                elif element.tag == "mxGraphModel":
+                    # A bare mxGraphModel file without <mxfile>/<diagram> wrappers
+                    collector = _PageCollector(f"Page-{len(diagram.pages) + 1}", bare=True)
+                continue
+
+            if collector is None:
+                continue
+
+            if element.tag == "diagram":
+                if len(element) == 0 and element.text and element.text.strip():
+                    # Compressed page: inflate it and stream the inner model
+                    for inner_event, inner in ElementTree.iterparse(
+                        io.BytesIO(decode_diagram_payload(element.text)), events=("start", "end")
+                    ):
+                        if inner_event == "start":
+                            collector.start(inner)
+                        else:
+                            collector.end(inner)
+                            inner.clear()
+                diagram.pages.append(collector.finish())
+                collector = None
+            elif element.tag == "mxGraphModel" and collector.bare:
+                diagram.pages.append(collector.finish())
+                collector = None
+            else:
+                collector.end(element)
+
+            # Drop attributes and text (geometry, style) as soon as an element is handled
+            element.clear()
+
+    if include_raw_xml:
+        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+            diagram.raw_xml = f.read()
+
+    return diagram
+
+
+class _PageCollector:
+    """Collects labelled cells and edges of one page from streamed XML events."""
+
+    def __init__(self, name: str, bare: bool = False):
+        self.name = name
+        self.bare = bare
+        self.labels: Dict[str, str] = {}
+        self.order: List[str] = []
+        self.edges: List[Tuple[str, str, str, str]] = []
+        self.edge_labels: Dict[str, List[str]] = {}
+        self._wrappers: List[ElementTree.Element] = []
+
+    def start(self, element: ElementTree.Element) -> None:
+        if element.tag in WRAPPER_TAGS:
+            # Attributes are complete at the start event
+            self._wrappers.append(element)
+
+    def end(self, element: ElementTree.Element) -> None:
+        if element.tag in WRAPPER_TAGS:
+            if self._wrappers:
+                self._wrappers.pop()
+            return
+        if element.tag != "mxCell":
+            return
+
+        wrapper = self._wrappers[-1] if self._wrappers else None
+        cell_id = (wrapper.get("id") if wrapper is not None else None) or element.get("id") or ""
+        label = clean_label(wrapper.get("label", "") if wrapper is not None else element.get("value", ""))
+
+        if element.get("edge") == "1":
+            self.edges.append((cell_id, element.get("source", ""), element.get("target", ""), label))
+        elif element.get("vertex") == "1":
+            parent = element.get("parent", "")
+            if "edgeLabel" in (element.get("style") or ""):
+                # Free-standing label attached to an edge
+                if label:
+                    self.edge_labels.setdefault(parent, []).append(label)
+                return
+            if label and cell_id not in self.labels:
+                self.labels[cell_id] = label
+                self.order.append(cell_id)
+
+    def finish(self) -> DrawioPage:
+        page = DrawioPage(name=self.name)
+        page.nodes = list(dict.fromkeys(self.labels[cell_id] for cell_id in self.order))
+
+        for edge_id, source, target, label in self.edges:
+            source_label = self.labels.get(source, "")
+            target_label = self.labels.get(target, "")
+            if not source_label and not target_label:
+                continue
+            labels = [label] if label else []
+            labels.extend(self.edge_labels.get(edge_id, []))
+            page.edges.append((source_label or "?", target_label or "?", "; ".join(labels)))
+
+        return page
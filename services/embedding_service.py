@@ -1,19 +1,39 @@
 """Azure OpenAI embedding service implementation."""
-from typing import List
-from openai import AzureOpenAI
+import asyncio
+from typing import Iterator, List, Tuple
+import httpx
+import numpy as np
+from openai import AzureOpenAI, AsyncAzureOpenAI, DefaultHttpxClient, DefaultAsyncHttpxClient
 
 from interfaces import IEmbeddingService
+from models import ChunkBatch
+from services.metrics import metrics
+
+
+def _count_retry(request: httpx.Request) -> None:
+    """Count requests the OpenAI client re-sends after a failed attempt."""
+    if int(request.headers.get("x-stainless-retry-count", "0") or 0) > 0:
+        metrics.inc("rag_api_retries_total", api="embeddings")
+
+
+async def _acount_retry(request: httpx.Request) -> None:
+    """Async variant of _count_retry for the async client."""
+    _count_retry(request)
 
 
 class AzureOpenAIEmbeddingService(IEmbeddingService):
     """Service for creating embeddings using Azure OpenAI."""
 
+    # Azure OpenAI has a limit on batch size: texts sent per embeddings request
+    BATCH_SIZE = 16
+
     def __init__(
         self,
         api_key: str,
         endpoint: str,
         deployment_name: str,
-        api_version: str = "2024-02-15-preview"
+        api_version: str = "2024-02-15-preview",
+        max_concurrency: int = 8
     ):
         """
         Initialize the Azure OpenAI embedding service.
@@ -23,13 +43,34 @@ class AzureOpenAIEmbeddingService(IEmbeddingService):
             endpoint: Azure OpenAI endpoint
             deployment_name: Deployment name for embeddings
             api_version: API version
+            max_concurrency: Requests the async methods keep in flight at once
         """
         self.client = AzureOpenAI(
             api_key=api_key,
             api_version=api_version,
-            azure_endpoint=endpoint
+            azure_endpoint=endpoint,
+            # The SDK defaults (timeouts, connection limits, redirects) with a retry-counting hook
+            http_client=DefaultHttpxClient(event_hooks={"request": [_count_retry]})
+        )
+        self.async_client = AsyncAzureOpenAI(
+            api_key=api_key,
+            api_version=api_version,
+            azure_endpoint=endpoint,
+            http_client=DefaultAsyncHttpxClient(event_hooks={"request": [_acount_retry]})
         )
         self.deployment_name = deployment_name
+        self.max_concurrency = max(1, max_concurrency)
+
+    def _create(self, texts: List[str]):
+        """Call the embeddings API and record call, latency and token metrics."""
+        with metrics.api_call("embeddings"):
+            response = self.client.embeddings.create(
+                input=texts,
+                model=self.deployment_name
+            )
+        if response.usage is not None:
+            metrics.inc("rag_embedding_tokens_total", response.usage.total_tokens)
+        return response
 
     def create_embedding(self, text: str) -> List[float]:
         """
@@ -44,10 +85,7 @@ class AzureOpenAIEmbeddingService(IEmbeddingService):
         # Replace newlines with spaces for better embeddings
         text = text.replace("\n", " ")
 
-        response = self.client.embeddings.create(
-            input=[text],
-            model=self.deployment_name
-        )
+        response = self._create([text])
 
         return response.data[0].embedding
 
@@ -61,22 +99,108 @@ class AzureOpenAIEmbeddingService(IEmbeddingService):
         Returns:
             List of embedding vectors
         """
-        # Replace newlines with spaces
+        return [embedding for _, block in self._create_blocks(texts) for embedding in block]
+
+    def _create_blocks(self, texts: List[str]) -> Iterator[Tuple[int, List[List[float]]]]:
+        """Embed texts in request-sized batches, yielding (offset, embeddings) per batch in order."""
+        # Replace newlines with spaces for better embeddings
         texts = [text.replace("\n", " ") for text in texts]
 
-        # Azure OpenAI has a limit on batch size, process in batches
-        batch_size = 16
-        all_embeddings = []
+        batch_size = self.BATCH_SIZE
+        total_batches = (len(texts) - 1) // batch_size + 1
 
         for i in range(0, len(texts), batch_size):
-            batch = texts[i:i + batch_size]
-            response = self.client.embeddings.create(
-                input=batch,
+            response = self._create(texts[i:i + batch_size])
+            yield i, [item.embedding for item in response.data]
+            print(f"Created embeddings for batch {i // batch_size + 1}/{total_batches}")
+
+    def embed_batch(self, batch: ChunkBatch) -> ChunkBatch:
+        """
+        Embed the contents of a chunk batch.
+
+        Each API response is written straight into a float32 matrix, so no
+        per-row Python lists are kept around.
+
+        Args:
+            batch: Chunk batch to embed
+
+        Returns:
+            A copy of the batch carrying a (len(batch), dimension) float32 embedding matrix
+        """
+        if len(batch) == 0:
+            return batch.with_embeddings(np.empty((0, 0), dtype=np.float32))
+
+        matrix = None
+        for i, embeddings in self._create_blocks(batch.contents):
+            block = np.asarray(embeddings, dtype=np.float32)
+            if matrix is None:
+                matrix = np.empty((len(batch), block.shape[1]), dtype=np.float32)
+            matrix[i:i + len(block)] = block
+
+        return batch.with_embeddings(matrix)
+
+    async def _acreate(self, texts: List[str]):
+        """Async variant of _create."""
+        with metrics.api_call("embeddings"):
+            response = await self.async_client.embeddings.create(
+                input=texts,
                 model=self.deployment_name
             )
-            batch_embeddings = [item.embedding for item in response.data]
-            all_embeddings.extend(batch_embeddings)
-            print(f"Created embeddings for batch {i // batch_size + 1}/{(len(texts) - 1) // batch_size + 1}")
+        if response.usage is not None:
+            metrics.inc("rag_embedding_tokens_total", response.usage.total_tokens)
+        return response
+
+    async def _acreate_blocks(self, texts: List[str]) -> List[np.ndarray]:
+        """Embed texts in request-sized blocks, at most max_concurrency requests at a time."""
+        batch_size = self.BATCH_SIZE
+        slots = asyncio.Semaphore(self.max_concurrency)
+
+        async def embed_block(start: int) -> np.ndarray:
+            async with slots:
+                response = await self._acreate(texts[start:start + batch_size])
+            return np.asarray([item.embedding for item in response.data], dtype=np.float32)
 
-        return all_embeddings
+        return await asyncio.gather(*(embed_block(start) for start in range(0, len(texts), batch_size)))
+
+    async def acreate_embedding(self, text: str) -> List[float]:
+        """
+        Create an embedding for a text with the async client.
+
+        Args:
+            text: Text to embed
+
+        Returns:
+            Embedding vector
+        """
+        response = await self._acreate([text.replace("\n", " ")])
+        return response.data[0].embedding
+
+    async def acreate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """
+        Create embeddings for multiple texts with concurrent requests.
+
+        Args:
+            texts: List of texts to embed
+
+        Returns:
+            List of embedding vectors, in input order
+        """
+        blocks = await self._acreate_blocks([text.replace("\n", " ") for text in texts])
+        return [row.tolist() for block in blocks for row in block]
+
+    async def aembed_batch(self, batch: ChunkBatch) -> ChunkBatch:
+        """
+        Embed the contents of a chunk batch with concurrent requests.
+
+        Args:
+            batch: Chunk batch to embed
+
+        Returns:
+            A copy of the batch carrying a (len(batch), dimension) float32 embedding matrix
+        """
+        if len(batch) == 0:
+            return batch.with_embeddings(np.empty((0, 0), dtype=np.float32))
 
+        blocks = await self._acreate_blocks([text.replace("\n", " ") for text in batch.contents])
+        print(f"Created embeddings for {len(blocks)} batches concurrently")
+        return batch.with_embeddings(np.concatenate(blocks))
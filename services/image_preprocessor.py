@@ -0,0 +1,110 @@
+"""Image pre-processing applied before uploading images to the Vision API."""
+import io
+import os
+from PIL import Image, ImageOps
+
+try:
+    import cairosvg
+except (ImportError, OSError):
+    # cairosvg needs the native cairo library; without it SVG files cannot be rasterized
+    cairosvg = None
+
+
+class ImagePreprocessor:
+    """
+    Shrinks and normalizes images so Vision requests stay small.
+
+    Raster images larger than max_dimension are downscaled (keeping the
+    aspect ratio) and re-encoded; formats the Vision API handles poorly
+    (SVG, WebP, BMP, TIFF, ...) are converted to output_format. SVG files
+    are rasterized locally with cairosvg, which only resolves data: URLs,
+    so no network access happens during rendering.
+    """
+
+    # Formats that are uploaded unchanged when they already fit within max_dimension
+    PASSTHROUGH_FORMATS = {"PNG", "JPEG", "GIF"}
+
+    def __init__(
+        self,
+        max_dimension: int = 3072,
+        output_format: str = "PNG",
+        jpeg_quality: int = 90,
+        svg_min_dimension: int = 1024
+    ):
+        """
+        Initialize the image pre-processor.
+
+        Args:
+            max_dimension: Longest side in pixels after downscaling (keeps diagram text legible)
+            output_format: Format used when an image is re-encoded (PNG or JPEG)
+            jpeg_quality: Quality used when output_format is JPEG
+            svg_min_dimension: Longest side SVGs are rendered at, at least
+        """
+        self.max_dimension = max_dimension
+        self.output_format = output_format.upper()
+        self.jpeg_quality = jpeg_quality
+        self.svg_min_dimension = svg_min_dimension
+
+    def signature(self) -> str:
+        """Describe the settings that influence the output, e.g. for cache keys."""
+        return f"max={self.max_dimension};format={self.output_format};quality={self.jpeg_quality}"
+
+    def prepare(self, content: bytes, file_name: str) -> bytes:
+        """
+        Prepare image content for upload.
+
+        Args:
+            content: Raw image bytes as read from disk
+            file_name: Name of the image file, used to detect SVG
+
+        Returns:
+            Bytes to send to the Vision API
+        """
+        if os.path.splitext(file_name)[1].lower() == '.svg':
+            return self._encode(self._rasterize_svg(content))
+
+        with Image.open(io.BytesIO(content)) as image:
+            needs_resize = max(image.size) > self.max_dimension
+            if not needs_resize and image.format in self.PASSTHROUGH_FORMATS:
+                return content
+
+            # Animated images keep their first frame only
+            image.seek(0)
+            image = ImageOps.exif_transpose(image)
+            if needs_resize:
+                image.thumbnail((self.max_dimension, self.max_dimension), Image.LANCZOS)
+            return self._encode(image)
+
+    def _rasterize_svg(self, content: bytes) -> Image.Image:
+        """Render an SVG to a Pillow image, scaled to fit the configured dimensions."""
+        if cairosvg is None:
+            raise ValueError("SVG rasterization requires cairosvg and the cairo library")
+
+        image = Image.open(io.BytesIO(cairosvg.svg2png(bytestring=content)))
+        longest = max(image.size)
+        if longest and (longest < self.svg_min_dimension or longest > self.max_dimension):
+            # Re-render at the target scale instead of resampling the bitmap
+            target = min(max(longest, self.svg_min_dimension), self.max_dimension)
+            image = Image.open(io.BytesIO(cairosvg.svg2png(bytestring=content, scale=target / longest)))
+        return image
+
+    def _encode(self, image: Image.Image) -> bytes:
+        """Encode an image in the configured output format."""
+        buffer = io.BytesIO()
+
+        if self.output_format == "JPEG":
+            if image.mode in ("RGBA", "LA", "P"):
+                # JPEG has no alpha channel; flatten onto white like the diagram background
+                image = image.convert("RGBA")
+                background = Image.new("RGB", image.size, (255, 255, 255))
+                background.paste(image, mask=image.getchannel("A"))
+                image = background
+            elif image.mode != "RGB":
+                image = image.convert("RGB")
+            image.save(buffer, format="JPEG", quality=self.jpeg_quality, optimize=True)
+        else:
+            if image.mode not in ("RGB", "RGBA", "L", "LA", "P"):
+                image = image.convert("RGBA")
+            image.save(buffer, format=self.output_format, optimize=True)
+
+        return buffer.getvalue()
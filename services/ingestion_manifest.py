@@ -0,0 +1,374 @@
+"""Persistent manifest of indexed source files for incremental ingestion."""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+
+def hash_file(file_path: str, block_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a file's content, read in blocks."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@dataclass
+class ChangeSet:
+    """Files of one source grouped by what happened to them since the last run."""
+    source: str
+    added: List[str] = field(default_factory=list)
+    modified: List[str] = field(default_factory=list)
+    deleted: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+    # (size, mtime_ns, content_hash) of every added or modified file, recorded once it is stored
+    fingerprints: Dict[str, Tuple[int, int, str]] = field(default_factory=dict)
+    # Files already in the vector store before the manifest existed (chunk ids unknown)
+    adopted: List[str] = field(default_factory=list)
+    hashed: int = 0
+    # Source revision (e.g. commit) the files were read at, recorded once everything is stored
+    revision: str = ""
+
+    @property
+    def to_process(self) -> List[str]:
+        """Files that need to go through the read/chunk/embed/store stages."""
+        return self.added + self.modified
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.added or self.modified or self.deleted)
+
+    def print_summary(self) -> None:
+        """Print the change counts."""
+        print(f"Change set for {self.source}:")
+        print(f"  - Added: {len(self.added)}, modified: {len(self.modified)}, "
+              f"deleted: {len(self.deleted)}, unchanged: {len(self.unchanged)}")
+        print(f"  - Hashed {self.hashed} files whose size or mtime changed")
+
+
+class IngestionManifest:
+    """
+    SQLite record of every indexed source file.
+
+    For each (source, file_path) the manifest keeps size, mtime, content
+    hash, the vector store ids of its chunks and the embedding model that
+    produced them. Change detection compares size and mtime first and only
+    hashes a file when they differ, so an unchanged tree costs one stat per
+    file.
+    """
+
+    def __init__(self, manifest_path: str, embedding_model: str = ""):
+        """
+        Initialize the ingestion manifest.
+
+        Args:
+            manifest_path: Path to the SQLite manifest file
+            embedding_model: Embedding model (deployment) used for this run; files
+                             indexed with a different model count as modified
+        """
+        self.manifest_path = manifest_path
+        self.embedding_model = embedding_model
+        self._lock = threading.Lock()
+
+        manifest_dir = os.path.dirname(os.path.abspath(manifest_path))
+        os.makedirs(manifest_dir, exist_ok=True)
+
+        self._connection = sqlite3.connect(manifest_path, check_same_thread=False)
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS files (
+                source TEXT NOT NULL,
+                file_path TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                content_hash TEXT NOT NULL,
+                chunk_ids TEXT,
+                embedding_model TEXT NOT NULL,
+                indexed_at REAL NOT NULL,
+                PRIMARY KEY (source, file_path)
+            )
+            """
+        )
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS sources (
+                source TEXT PRIMARY KEY,
+                revision TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self._connection.commit()
+
+    def revision(self, source: str) -> str:
+        """Revision (e.g. commit SHA) a source was last fully indexed at, or empty string."""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT revision FROM sources WHERE source = ?", (source,)
+            ).fetchone()
+        return row[0] if row else ""
+
+    def set_revision(self, source: str, revision: str) -> None:
+        """Remember the revision a source has been fully indexed at."""
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO sources (source, revision, updated_at) VALUES (?, ?, ?)",
+                (source, revision, time.time())
+            )
+            self._connection.commit()
+
+    def has_entries(self, source: Optional[str] = None) -> bool:
+        """Whether anything (for the given source) has been recorded yet."""
+        with self._lock:
+            if source is None:
+                row = self._connection.execute("SELECT 1 FROM files LIMIT 1").fetchone()
+            else:
+                row = self._connection.execute(
+                    "SELECT 1 FROM files WHERE source = ? LIMIT 1", (source,)
+                ).fetchone()
+        return row is not None
+
+    def compute_changes(
+        self,
+        source: str,
+        files: Dict[str, str],
+        content_hashes: Optional[Dict[str, str]] = None,
+        force: bool = False,
+        deleted: Optional[Iterable[str]] = None,
+        refresh_stats: bool = True
+    ) -> ChangeSet:
+        """
+        Compare the current files of a source with the manifest.
+
+        Args:
+            source: Source the files belong to (repository URL or local directory)
+            files: Mapping of recorded file path to the path to stat/hash on disk
+            content_hashes: Hashes already known without reading the file (e.g. git blob
+                            SHAs); these files are compared by hash instead of stat
+            force: Treat every existing file as modified
+            deleted: Deleted files when they are known (e.g. from git diff); files then
+                     only needs the changed files. When None, every recorded file missing
+                     from files counts as deleted
+            refresh_stats: Store the new size/mtime of touched but identical files
+                           (False leaves the manifest untouched, e.g. for dry runs)
+
+        Returns:
+            ChangeSet for the source
+        """
+        content_hashes = content_hashes or {}
+        changes = ChangeSet(source=source)
+        recorded = self._entries(source)
+        refreshed = []
+
+        for file_path, disk_path in sorted(files.items()):
+            entry = recorded.get(file_path)
+            known_hash = content_hashes.get(file_path)
+
+            if known_hash is not None:
+                size, mtime_ns = 0, 0
+                content_hash = known_hash
+            else:
+                try:
+                    stat = os.stat(disk_path)
+                except OSError:
+                    continue
+                size, mtime_ns = stat.st_size, stat.st_mtime_ns
+                content_hash = None
+
+            if entry is None:
+                if content_hash is None:
+                    content_hash = self._hash(disk_path, changes)
+                if content_hash is not None:
+                    changes.added.append(file_path)
+                    changes.fingerprints[file_path] = (size, mtime_ns, content_hash)
+                continue
+
+            stale_model = entry["embedding_model"] != self.embedding_model
+            if not force and not stale_model:
+                if known_hash is not None and known_hash == entry["content_hash"]:
+                    changes.unchanged.append(file_path)
+                    continue
+                if known_hash is None and (size, mtime_ns) == (entry["size"], entry["mtime_ns"]):
+                    changes.unchanged.append(file_path)
+                    continue
+
+            if content_hash is None:
+                content_hash = self._hash(disk_path, changes)
+                if content_hash is None:
+                    continue
+            if not force and not stale_model and content_hash == entry["content_hash"]:
+                # Touched but identical: remember the new stat so it is not hashed again
+                changes.unchanged.append(file_path)
+                refreshed.append((size, mtime_ns, source, file_path))
+                continue
+
+            changes.modified.append(file_path)
+            changes.fingerprints[file_path] = (size, mtime_ns, content_hash)
+
+        if deleted is None:
+            changes.deleted = sorted(set(recorded) - set(files))
+        else:
+            changes.deleted = sorted(set(deleted) & set(recorded))
+
+        if refreshed and refresh_stats:
+            with self._lock:
+                self._connection.executemany(
+                    "UPDATE files SET size = ?, mtime_ns = ? WHERE source = ? AND file_path = ?",
+                    refreshed
+                )
+                self._connection.commit()
+
+        return changes
+
+    def chunk_ids(self, source: str, file_paths: Iterable[str]) -> Tuple[List[int], List[str]]:
+        """
+        Look up the stored chunk ids of files.
+
+        Returns:
+            (chunk ids, file paths whose chunk ids were never recorded)
+        """
+        ids = []
+        unknown = []
+        recorded = self._entries(source)
+        for file_path in file_paths:
+            entry = recorded.get(file_path)
+            if entry is None:
+                continue
+            if entry["chunk_ids"] is None:
+                unknown.append(file_path)
+            else:
+                ids.extend(entry["chunk_ids"])
+        return ids, unknown
+
+    def record(
+        self,
+        source: str,
+        file_path: str,
+        fingerprint: Tuple[int, int, str],
+        chunk_ids: Optional[List[int]]
+    ) -> None:
+        """
+        Record a file after its chunks have been stored.
+
+        Args:
+            source: Source the file belongs to
+            file_path: Recorded file path
+            fingerprint: (size, mtime_ns, content_hash) from the change set
+            chunk_ids: Vector store ids of the file's chunks, or None if unknown
+        """
+        size, mtime_ns, content_hash = fingerprint
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO files "
+                "(source, file_path, size, mtime_ns, content_hash, chunk_ids, embedding_model, indexed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    source, file_path, size, mtime_ns, content_hash,
+                    json.dumps(chunk_ids) if chunk_ids is not None else None,
+                    self.embedding_model, time.time()
+                )
+            )
+            self._connection.commit()
+
+    def remove(self, source: str, file_paths: Iterable[str]) -> None:
+        """Forget files that were deleted from a source."""
+        with self._lock:
+            self._connection.executemany(
+                "DELETE FROM files WHERE source = ? AND file_path = ?",
+                [(source, file_path) for file_path in file_paths]
+            )
+            self._connection.commit()
+
+    def merge(self, manifest_paths: List[str], keep: Optional[Callable[[str, str], bool]] = None) -> int:
+        """
+        Replace the sources found in other manifests (e.g. one per shard) with their merged files.
+
+        A source keeps its revision only when every manifest recorded the
+        same one (e.g. no shard failed); otherwise the next run compares
+        all files instead of diffing from that revision.
+
+        Args:
+            manifest_paths: Manifests to read
+            keep: Optional filter (source, file_path) -> bool of the files to copy
+
+        Returns:
+            Number of files recorded after the merge
+        """
+        files = []
+        revisions: Dict[str, List[str]] = {}
+        for manifest_path in manifest_paths:
+            connection = sqlite3.connect(manifest_path)
+            try:
+                files.extend(
+                    row for row in connection.execute(
+                        "SELECT source, file_path, size, mtime_ns, content_hash, chunk_ids, embedding_model, "
+                        "indexed_at FROM files"
+                    )
+                    if keep is None or keep(row[0], row[1])
+                )
+                for source, revision in connection.execute("SELECT source, revision FROM sources"):
+                    revisions.setdefault(source, []).append(revision)
+            finally:
+                connection.close()
+
+        sources = {row[0] for row in files} | set(revisions)
+        with self._lock:
+            for source in sources:
+                self._connection.execute("DELETE FROM files WHERE source = ?", (source,))
+                self._connection.execute("DELETE FROM sources WHERE source = ?", (source,))
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO files "
+                "(source, file_path, size, mtime_ns, content_hash, chunk_ids, embedding_model, indexed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                files
+            )
+            now = time.time()
+            self._connection.executemany(
+                "INSERT INTO sources (source, revision, updated_at) VALUES (?, ?, ?)",
+                [
+                    (source, values[0], now) for source, values in revisions.items()
+                    if len(values) == len(manifest_paths) and len(set(values)) == 1
+                ]
+            )
+            self._connection.commit()
+            return self._connection.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._connection.close()
+
+    def _entries(self, source: str) -> Dict[str, dict]:
+        """All recorded files of a source."""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT file_path, size, mtime_ns, content_hash, chunk_ids, embedding_model "
+                "FROM files WHERE source = ?",
+                (source,)
+            ).fetchall()
+        return {
+            file_path: {
+                "size": size,
+                "mtime_ns": mtime_ns,
+                "content_hash": content_hash,
+                "chunk_ids": json.loads(chunk_ids) if chunk_ids is not None else None,
+                "embedding_model": embedding_model
+            }
+            for file_path, size, mtime_ns, content_hash, chunk_ids, embedding_model in rows
+        }
+
+    @staticmethod
+    def _hash(disk_path: str, changes: ChangeSet) -> Optional[str]:
+        """Hash a file for the change set, or None if it cannot be read."""
+        try:
+            content_hash = hash_file(disk_path)
+        except OSError as e:
+            print(f"Warning: Cannot hash {disk_path}: {str(e)}")
+            return None
+        changes.hashed += 1
+        return content_hash
@@ -1,12 +1,68 @@
 """Local file reader service implementation."""
 import os
-from typing import List
+import time
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
 from pathlib import Path
 import docx
 import openpyxl
 
 from interfaces import ILocalFileReader, IVisionAnalyzer
 from models.data_models import Document, DocumentType
+from services.perceptual_hash import PerceptualHashIndex
+from services.drawio_parser import DrawioDiagram, parse_drawio
+from services.docx_reader import iter_docx_blocks
+from services.directory_scanner import DirectoryScanner
+from services.metrics import metrics
+from services.async_utils import to_thread
+
+
+def _parse_in_worker(file_path: str, reader_options: dict):
+    """
+    Process-pool entry point for CPU-bound parsing.
+
+    Builds a Vision-less reader in the worker process. Diagrams return their
+    source text only, since the Vision call for their PNG export runs on the
+    parent's thread pool.
+    """
+    reader = LocalFileReader(**reader_options)
+    if Path(file_path).suffix.lower() in LocalFileReader.DIAGRAM_EXTENSIONS:
+        return reader._read_diagram_source(file_path)
+    return reader.read_file_documents(file_path)
+
+
+class _ThroughputReport:
+    """Per file-type counters used to report read_directory throughput."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stats = {}
+        self._lock = threading.Lock()
+
+    def mark_done(self, file_type: str, failed: bool = False) -> None:
+        """Record one finished file of the given type."""
+        with self._lock:
+            stats = self.stats.setdefault(file_type, {"files": 0, "errors": 0, "elapsed": 0.0})
+            stats["files"] += 1
+            if failed:
+                stats["errors"] += 1
+            stats["elapsed"] = time.perf_counter() - self.started
+        metrics.inc("rag_files_read_total", file_type=file_type)
+        if failed:
+            metrics.inc("rag_file_errors_total", file_type=file_type)
+
+    def print_summary(self) -> None:
+        """Print files/sec per file type."""
+        if not self.stats:
+            return
+
+        print("Throughput by file type:")
+        for file_type, stats in sorted(self.stats.items()):
+            rate = stats["files"] / stats["elapsed"] if stats["elapsed"] > 0 else 0.0
+            errors = f", {stats['errors']} failed" if stats["errors"] else ""
+            print(f"  - {file_type}: {stats['files']} files in {stats['elapsed']:.1f}s ({rate:.2f} files/s{errors})")
 
 
 class LocalFileReader(ILocalFileReader):
@@ -18,14 +74,56 @@ class LocalFileReader(ILocalFileReader):
     DOCUMENT_EXTENSIONS = {'.docx', '.doc'}
     SPREADSHEET_EXTENSIONS = {'.xlsx', '.xls'}
 
-    def __init__(self, vision_analyzer: IVisionAnalyzer = None):
+    def __init__(
+        self,
+        vision_analyzer: IVisionAnalyzer = None,
+        parallel: bool = False,
+        parser_workers: int = 0,
+        vision_workers: int = 8,
+        spreadsheet_max_rows: int = 100,
+        vision_batch_size: int = 16,
+        phash_index: Optional[PerceptualHashIndex] = None,
+        drawio_include_raw_xml: bool = False,
+        docx_streaming: bool = True,
+        ignore_patterns: Optional[Sequence[str]] = None,
+        ignore_file: str = ".ragignore",
+        max_file_sizes_mb: Optional[Dict[str, float]] = None
+    ):
         """
         Initialize the local file reader.
 
         Args:
             vision_analyzer: Optional vision analyzer for processing images
+            parallel: Parse files in a process pool and run Vision calls in a thread pool
+            parser_workers: Number of parser processes (0 = one per CPU)
+            vision_workers: Maximum number of concurrent Vision API calls
+            spreadsheet_max_rows: Maximum number of data rows kept per spreadsheet sheet
+            vision_batch_size: Number of images sent per batched Vision request
+            phash_index: Optional perceptual hash index used to skip near-duplicate images
+            drawio_include_raw_xml: Append the raw .drawio XML after the extracted labels and edges
+            docx_streaming: Read .docx XML incrementally instead of building the python-docx object model
+            ignore_patterns: Extra .gitignore-style patterns excluded from directory scans
+            ignore_file: Name of the ignore file honoured in every scanned directory (besides .gitignore)
+            max_file_sizes_mb: Maximum file size in MB per file type label (e.g. {"image": 20}); larger files are skipped
         """
         self.vision_analyzer = vision_analyzer
+        self.parallel = parallel
+        self.parser_workers = parser_workers
+        self.vision_workers = vision_workers
+        self.spreadsheet_max_rows = spreadsheet_max_rows
+        self.vision_batch_size = max(1, vision_batch_size)
+        self.phash_index = phash_index
+        self.drawio_include_raw_xml = drawio_include_raw_xml
+        self.docx_streaming = docx_streaming
+        self.scanner = DirectoryScanner(
+            extensions=self._extension_types(),
+            ignore_patterns=ignore_patterns,
+            ignore_files=[".gitignore", ignore_file],
+            size_limits={
+                file_type: int(size_mb * 1024 * 1024)
+                for file_type, size_mb in (max_file_sizes_mb or {}).items()
+            }
+        )
 
     def read_directory(self, directory_path: str) -> List[Document]:
         """
@@ -37,29 +135,385 @@ class LocalFileReader(ILocalFileReader):
         Returns:
             List of Document objects
         """
-        documents = []
-        directory = Path(directory_path)
+        return self.read_files(self.list_files(directory_path))
+
+    def list_files(self, directory_path: str) -> List[str]:
+        """
+        List all supported files below a directory, honouring ignore rules and size limits.
 
-        if not directory.exists():
+        Args:
+            directory_path: Path to the directory
+
+        Returns:
+            Sorted file paths
+        """
+        if not Path(directory_path).exists():
             print(f"Warning: Directory {directory_path} does not exist")
-            return documents
+            return []
 
         print(f"Scanning directory: {directory_path}")
+        scan = self.scanner.scan(directory_path)
+        scan.print_summary()
+        return scan.file_paths
+
+    def read_files(self, file_paths: List[str]) -> List[Document]:
+        """
+        Read the given files.
+
+        Args:
+            file_paths: Paths of the files to read
+
+        Returns:
+            List of Document objects; files that could not be read or analysed
+            yield a Document with metadata["error"] (and metadata["failed_stage"]
+            when it was not the read itself that failed); skipped duplicate
+            images yield an empty Document, so they are recorded without chunks
+        """
+        file_paths, duplicates = self._plan_reads(file_paths)
+        report = _ThroughputReport()
+        documents = self._read_planned(file_paths, report)
+        return self._finish_reads(documents, duplicates, report)
+
+    async def aread_files(self, file_paths: List[str]) -> List[Document]:
+        """
+        Read the given files, analysing images with the Vision analyzer's async batching.
+
+        All Vision summaries are generated up front with agenerate_summaries
+        on the event loop; parsing then runs on a worker thread (and the
+        process pool when parallel). Returns the same documents as read_files.
+        """
+        file_paths, duplicates = await to_thread(self._plan_reads, file_paths)
+        report = _ThroughputReport()
+        summaries = await self._aprefetch_summaries(file_paths)
+        documents = await to_thread(self._read_planned, file_paths, report, summaries)
+        return self._finish_reads(documents, duplicates, report)
+
+    def _plan_reads(self, file_paths: List[str]) -> Tuple[List[str], Dict[str, str]]:
+        """Sort the files and set aside duplicate images; returns (files to read, {duplicate: original})."""
+        # Sorted so that output order does not depend on the filesystem or on worker timing
+        file_paths, dropped = self._drop_diagram_exports(sorted(file_paths))
+        if self.phash_index:
+            file_paths, duplicates = self._drop_duplicate_images(file_paths)
+            dropped.update(duplicates)
+        return file_paths, dropped
+
+    @classmethod
+    def diagram_source(cls, file_path: str) -> Optional[str]:
+        """The .drawio file a PNG export (e.g. "flow.drawio.png") belongs to by name, or None."""
+        if not file_path.lower().endswith('.png'):
+            return None
+        source = file_path[:-len('.png')]
+        return source if Path(source).suffix.lower() in cls.DIAGRAM_EXTENSIONS else None
+
+    def _drop_diagram_exports(self, file_paths: List[str]) -> Tuple[List[str], Dict[str, str]]:
+        """
+        Remove PNG exports of .drawio files that exist on disk.
+
+        An export is analysed as part of its diagram, also when only the
+        export is being read (e.g. it is the only changed file).
 
-        # Walk through all files recursively
-        for file_path in directory.rglob('*'):
-            if file_path.is_file():
+        Returns:
+            (remaining file paths, {export: .drawio file})
+        """
+        dropped = {}
+        for file_path in file_paths:
+            source = self.diagram_source(file_path)
+            if source and os.path.exists(source):
+                dropped[file_path] = source
+                print(f"Skipping diagram export (analysed with its .drawio): {os.path.basename(file_path)}")
+        return [file_path for file_path in file_paths if file_path not in dropped], dropped
+
+    def _read_planned(
+        self,
+        file_paths: List[str],
+        report: _ThroughputReport,
+        summaries: Optional[dict] = None
+    ) -> List[Document]:
+        """Read files sequentially or in parallel, reusing Vision summaries if already generated."""
+        if self.parallel:
+            return self._read_files_parallel(file_paths, report, summaries)
+        return self._read_files_sequential(file_paths, report, summaries)
+
+    def _finish_reads(
+        self,
+        documents: List[Document],
+        duplicates: Dict[str, str],
+        report: _ThroughputReport
+    ) -> List[Document]:
+        """Add the skipped duplicate images and print the totals."""
+        documents.extend(
+            self._duplicate_document(file_path, original) for file_path, original in sorted(duplicates.items())
+        )
+
+        print(f"Total files processed: {len(documents)}")
+        report.print_summary()
+        return documents
+
+    def _drop_duplicate_images(self, file_paths: List[str]) -> Tuple[List[str], Dict[str, str]]:
+        """
+        Remove standalone images that duplicate other content in this directory.
+
+        Images within the perceptual hash distance of an earlier image (or
+        of a diagram export) would only add duplicate Vision calls and
+        embedding rows.
+
+        Returns:
+            (remaining file paths, {dropped file path: file it duplicates})
+        """
+        exports = [
+            file_path + '.png' for file_path in file_paths
+            if self._file_type(file_path) == "drawio" and os.path.exists(file_path + '.png')
+        ]
+        images = [file_path for file_path in file_paths if self._file_type(file_path) == "image"]
+
+        duplicates = self.phash_index.find_duplicates(images, exclude=exports)
+        for file_path, original in sorted(duplicates.items()):
+            print(f"Skipping near-duplicate image: {os.path.basename(file_path)} (same as {os.path.basename(original)})")
+
+        if duplicates:
+            print(f"Skipped {len(duplicates)} duplicate images")
+        return [file_path for file_path in file_paths if file_path not in duplicates], duplicates
+
+    def _read_files_sequential(
+        self,
+        file_paths: List[str],
+        report: _ThroughputReport,
+        summaries: Optional[dict] = None
+    ) -> List[Document]:
+        """Read files one at a time in the current process."""
+        documents = []
+        if summaries is None:
+            summaries = self._prefetch_summaries(file_paths)
+
+        for file_path in file_paths:
+            file_type = self._file_type(file_path)
+            if file_type is None:
+                continue
+            try:
+                if file_type == "image":
+                    file_documents = [self._process_image(file_path, summaries.get(file_path))]
+                elif file_type == "drawio":
+                    file_documents = [self._process_diagram(file_path, summaries.get(file_path + '.png'))]
+                else:
+                    file_documents = self.read_file_documents(file_path)
+                if file_documents:
+                    documents.extend(file_documents)
+                    print(f"Processed: {os.path.basename(file_path)}")
+                report.mark_done(file_type)
+            except Exception as e:
+                report.mark_done(file_type, failed=True)
+                print(f"Error processing {file_path}: {str(e)}")
+                documents.append(self._failed_document(file_path, file_type, e))
+
+        return documents
+
+    def _read_files_parallel(
+        self,
+        file_paths: List[str],
+        report: _ThroughputReport,
+        summaries: Optional[dict] = None
+    ) -> List[Document]:
+        """
+        Read files concurrently.
+
+        CPU-bound parsers (python-docx, openpyxl, drawio XML) run in a process
+        pool, while batched Vision API calls run in a bounded thread pool
+        (unless the summaries were already generated). Results are collected
+        in input order and a failure only affects its own file.
+        """
+        pending = []
+        submitted = []
+        parser_options = self._parser_options()
+
+        # spawn avoids forking the gRPC channels held by the Vision client
+        parser_pool = ProcessPoolExecutor(
+            max_workers=self.parser_workers or None,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+        vision_pool = ThreadPoolExecutor(max_workers=max(1, self.vision_workers))
+
+        try:
+            # Submit the Vision batches first so network waits start as early as possible
+            summary_futures = {}
+            if summaries is not None:
+                analysed = Future()
+                analysed.set_result(list(summaries.values()))
+                summary_futures = {image_path: (analysed, position) for position, image_path in enumerate(summaries)}
+            elif self.vision_analyzer:
+                targets = self._vision_targets(file_paths)
+                for start in range(0, len(targets), self.vision_batch_size):
+                    group = targets[start:start + self.vision_batch_size]
+                    future = vision_pool.submit(self.vision_analyzer.generate_summaries, group)
+                    submitted.append(future)
+                    for position, image_path in enumerate(group):
+                        summary_futures[image_path] = (future, position)
+
+            for file_path in file_paths:
+                file_type = self._file_type(file_path)
+                if file_type is None:
+                    continue
+
+                future = None
+                if file_type == "image":
+                    summary_ref = summary_futures.get(file_path)
+                else:
+                    future = parser_pool.submit(_parse_in_worker, file_path, parser_options)
+                    submitted.append(future)
+                    summary_ref = summary_futures.get(file_path + '.png')
+
+                pending.append((file_path, file_type, future, summary_ref))
+
+            documents = []
+            for file_path, file_type, future, summary_ref in pending:
                 try:
-                    document = self.read_file(str(file_path))
-                    if document:
-                        documents.append(document)
-                        print(f"Processed: {file_path.name}")
+                    if file_type == "drawio":
+                        file_documents = [self._collect_diagram(file_path, future, summary_ref)]
+                    elif file_type == "image":
+                        file_documents = [self._process_image(file_path, self._summary_result(summary_ref))]
+                    else:
+                        file_documents = future.result()
+                    if file_documents:
+                        documents.extend(file_documents)
+                        print(f"Processed: {os.path.basename(file_path)}")
+                    report.mark_done(file_type)
                 except Exception as e:
+                    report.mark_done(file_type, failed=True)
                     print(f"Error processing {file_path}: {str(e)}")
+                    documents.append(self._failed_document(file_path, file_type, e))
+        finally:
+            # Drop queued work if reading stopped early (shutdown's cancel_futures needs Python 3.9)
+            for future in submitted:
+                future.cancel()
+            parser_pool.shutdown()
+            vision_pool.shutdown()
 
-        print(f"Total files processed: {len(documents)}")
         return documents
 
+    def _collect_diagram(self, file_path: str, source_future, summary_ref) -> Document:
+        """Combine the parsed diagram source and its Vision summary into a Document."""
+        try:
+            source = source_future.result()
+            vision_summary = self._summary_result(summary_ref)
+            return self._build_diagram_document(file_path, source, vision_summary)
+        except Exception as e:
+            return self._diagram_error_document(file_path, e)
+
+    @staticmethod
+    def _summary_result(summary_ref) -> Optional[str]:
+        """Resolve a (batch future, position) reference to its summary."""
+        if summary_ref is None:
+            return None
+        future, position = summary_ref
+        return future.result()[position]
+
+    def _vision_targets(self, file_paths: List[str]) -> List[str]:
+        """Images that need a Vision summary: standalone images plus PNG exports of diagrams."""
+        targets = []
+        for file_path in file_paths:
+            file_type = self._file_type(file_path)
+            if file_type == "image":
+                targets.append(file_path)
+            elif file_type == "drawio" and os.path.exists(file_path + '.png'):
+                targets.append(file_path + '.png')
+
+        # A diagram export can also be listed as a standalone image
+        return list(dict.fromkeys(targets))
+
+    def _prefetch_summaries(self, file_paths: List[str]) -> dict:
+        """Generate Vision summaries for all images up front using batched requests."""
+        if not self.vision_analyzer:
+            return {}
+
+        targets = self._vision_targets(file_paths)
+        if not targets:
+            return {}
+
+        print(f"Analyzing {len(targets)} images with Vision API (batches of up to {self.vision_batch_size})...")
+        summaries = {}
+        for start in range(0, len(targets), self.vision_batch_size):
+            group = targets[start:start + self.vision_batch_size]
+            try:
+                summaries.update(zip(group, self.vision_analyzer.generate_summaries(group)))
+            except Exception as e:
+                # Missing entries fall back to one request per image
+                print(f"Warning: Batched Vision analysis failed: {str(e)}")
+        return summaries
+
+    async def _aprefetch_summaries(self, file_paths: List[str]) -> dict:
+        """Generate Vision summaries for all images up front with the analyzer's async batching."""
+        if not self.vision_analyzer:
+            return {}
+
+        targets = self._vision_targets(file_paths)
+        if not targets:
+            return {}
+
+        print(f"Analyzing {len(targets)} images with Vision API (async batches)...")
+        try:
+            return dict(zip(targets, await self.vision_analyzer.agenerate_summaries(targets)))
+        except Exception as e:
+            # Missing entries fall back to one request per image
+            print(f"Warning: Batched Vision analysis failed: {str(e)}")
+            return {}
+
+    def _parser_options(self) -> dict:
+        """Constructor options forwarded to parser worker processes."""
+        return {
+            "spreadsheet_max_rows": self.spreadsheet_max_rows,
+            "drawio_include_raw_xml": self.drawio_include_raw_xml,
+            "docx_streaming": self.docx_streaming
+        }
+
+    @classmethod
+    def _extension_types(cls) -> Dict[str, str]:
+        """Map every supported extension to its file type label."""
+        extension_types = {}
+        for extensions, file_type in (
+            (cls.IMAGE_EXTENSIONS, "image"),
+            (cls.DIAGRAM_EXTENSIONS, "drawio"),
+            (cls.DOCUMENT_EXTENSIONS, "word_document"),
+            (cls.SPREADSHEET_EXTENSIONS, "spreadsheet")
+        ):
+            extension_types.update(dict.fromkeys(extensions, file_type))
+        return extension_types
+
+    def _file_type(self, file_path: str) -> Optional[str]:
+        """Return the file type label for a path, or None if it is not supported."""
+        extension = Path(file_path).suffix.lower()
+
+        if extension in self.IMAGE_EXTENSIONS:
+            return "image"
+        elif extension in self.DIAGRAM_EXTENSIONS:
+            return "drawio"
+        elif extension in self.DOCUMENT_EXTENSIONS:
+            return "word_document"
+        elif extension in self.SPREADSHEET_EXTENSIONS:
+            return "spreadsheet"
+        return None
+
+    def size_limit(self, file_path: str) -> Optional[int]:
+        """Maximum size in bytes of a file of this type (max_file_sizes_mb), or None if unlimited."""
+        return self.scanner.size_limits.get(self._file_type(file_path)) or None
+
+    def read_file_documents(self, file_path: str) -> List[Document]:
+        """
+        Read a single file into one or more documents.
+
+        Spreadsheets produce one Document per sheet so that sheets can be
+        chunked independently; every other type produces a single Document.
+
+        Args:
+            file_path: Path to the file
+
+        Returns:
+            List of Document objects (empty if file type not supported)
+        """
+        if Path(file_path).suffix.lower() in self.SPREADSHEET_EXTENSIONS:
+            return self._process_spreadsheet_sheets(file_path)
+
+        document = self.read_file(file_path)
+        return [document] if document else []
+
     def read_file(self, file_path: str) -> Document:
         """
         Read a single file.
@@ -86,8 +540,8 @@ class LocalFileReader(ILocalFileReader):
             # Skip unsupported file types
             return None
 
-    def _process_image(self, file_path: str) -> Document:
-        """Process image files using Vision API."""
+    def _process_image(self, file_path: str, summary: Optional[str] = None) -> Document:
+        """Process image files using Vision API, reusing an already generated summary if given."""
         if not self.vision_analyzer:
             return Document(
                 content=f"Image file: {os.path.basename(file_path)} (Vision API not configured)",
@@ -98,74 +552,127 @@ class LocalFileReader(ILocalFileReader):
             )
 
         # Use Vision API to analyze the image
-        summary = self.vision_analyzer.generate_summary(file_path)
+        if summary is None:
+            summary = self.vision_analyzer.generate_summary(file_path)
+
+        metadata = {
+            "source": "local_directory",
+            "file_type": "image",
+            "analyzed_by": "google_vision_api"
+        }
+        vision_error = self._vision_error(summary)
+        if vision_error is not None:
+            metadata.update(error=vision_error, failed_stage="vision")
 
         return Document(
             content=summary,
             file_path=file_path,
             repository_url="local",
             document_type=DocumentType.IMAGE,
-            metadata={
-                "source": "local_directory",
-                "file_type": "image",
-                "analyzed_by": "google_vision_api"
-            }
+            metadata=metadata
+        )
+
+    @staticmethod
+    def _vision_error(summary: Optional[str]) -> Optional[str]:
+        """Error message of a summary whose Vision analysis failed, or None."""
+        if summary is None:
+            return None
+        body = summary.rsplit("--- Image Analysis ---\n", 1)[-1]
+        if body.startswith(IVisionAnalyzer.ERROR_PREFIX):
+            return body[len(IVisionAnalyzer.ERROR_PREFIX):]
+        return None
+
+    def _failed_document(self, file_path: str, file_type: str, error: Exception) -> Document:
+        """Placeholder Document for a file whose reader raised; it is dead-lettered, not indexed."""
+        return Document(
+            content="",
+            file_path=file_path,
+            repository_url="local",
+            document_type=DocumentType(file_type),
+            metadata={"source": "local_directory", "file_type": file_type, "error": str(error)}
         )
 
-    def _process_diagram(self, file_path: str) -> Document:
-        """Process diagram files (.drawio)."""
-        # For .drawio files, try to read as XML text
+    def _duplicate_document(self, file_path: str, original: str) -> Document:
+        """Empty Document for a skipped duplicate image; it is recorded as processed but not indexed."""
+        return Document(
+            content="",
+            file_path=file_path,
+            repository_url="local",
+            document_type=DocumentType.IMAGE,
+            metadata={"source": "local_directory", "file_type": "image", "duplicate_of": original}
+        )
+
+    def _process_diagram(self, file_path: str, vision_summary: Optional[str] = None) -> Document:
+        """Process diagram files (.drawio), reusing an already generated PNG summary if given."""
         try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
+            source = self._read_diagram_source(file_path)
 
             # If there's a corresponding .png file, also analyze it
             png_path = file_path + '.png'
-            if os.path.exists(png_path) and self.vision_analyzer:
+            if vision_summary is None and os.path.exists(png_path) and self.vision_analyzer:
                 vision_summary = self.vision_analyzer.generate_summary(png_path)
-                content = f"Diagram File: {os.path.basename(file_path)}\n\n--- Visual Analysis ---\n{vision_summary}\n\n--- Source XML ---\n{content}"
-            else:
-                content = f"Diagram File: {os.path.basename(file_path)}\n\n{content}"
 
-            return Document(
-                content=content,
-                file_path=file_path,
-                repository_url="local",
-                document_type=DocumentType.DRAWIO,
-                metadata={
-                    "source": "local_directory",
-                    "file_type": "drawio",
-                    "has_png_export": os.path.exists(png_path)
-                }
-            )
+            return self._build_diagram_document(file_path, source, vision_summary)
         except Exception as e:
-            return Document(
-                content=f"Diagram file: {os.path.basename(file_path)} (Error reading: {str(e)})",
-                file_path=file_path,
-                repository_url="local",
-                document_type=DocumentType.DRAWIO,
-                metadata={"source": "local_directory", "file_type": "drawio", "error": str(e)}
-            )
+            return self._diagram_error_document(file_path, e)
+
+    def _read_diagram_source(self, file_path: str) -> DrawioDiagram:
+        """Parse a .drawio file into its pages, node labels and edges."""
+        return parse_drawio(file_path, include_raw_xml=self.drawio_include_raw_xml)
+
+    def _build_diagram_document(self, file_path: str, diagram: DrawioDiagram, vision_summary: Optional[str]) -> Document:
+        """Build the Document for a diagram from its parsed structure and optional Vision summary."""
+        png_path = file_path + '.png'
+
+        sections = [f"Diagram File: {os.path.basename(file_path)}"]
+        if vision_summary is not None:
+            sections.append(f"--- Visual Analysis ---\n{vision_summary}")
+        structure = diagram.to_text()
+        if structure:
+            sections.append(f"--- Diagram Structure ---\n{structure}")
+        if diagram.raw_xml:
+            sections.append(f"--- Source XML ---\n{diagram.raw_xml}")
+
+        metadata = {
+            "source": "local_directory",
+            "file_type": "drawio",
+            "has_png_export": os.path.exists(png_path),
+            "page_names": [page.name for page in diagram.pages],
+            "node_count": diagram.node_count,
+            "edge_count": diagram.edge_count
+        }
+        vision_error = self._vision_error(vision_summary)
+        if vision_error is not None:
+            # Retried as a whole so the diagram is indexed with its visual analysis
+            metadata.update(error=vision_error, failed_stage="vision")
+
+        return Document(
+            content="\n\n".join(sections),
+            file_path=file_path,
+            repository_url="local",
+            document_type=DocumentType.DRAWIO,
+            metadata=metadata
+        )
+
+    def _diagram_error_document(self, file_path: str, error: Exception) -> Document:
+        """Build the placeholder Document for a diagram that could not be read."""
+        return Document(
+            content=f"Diagram file: {os.path.basename(file_path)} (Error reading: {str(error)})",
+            file_path=file_path,
+            repository_url="local",
+            document_type=DocumentType.DRAWIO,
+            metadata={"source": "local_directory", "file_type": "drawio", "error": str(error)}
+        )
 
     def _process_word_document(self, file_path: str) -> Document:
         """Process Word documents (.docx, .doc)."""
         try:
-            # Only .docx is supported by python-docx
+            # Only .docx is supported
             if file_path.endswith('.docx'):
-                doc = docx.Document(file_path)
-                content = []
-
-                # Extract paragraphs
-                for paragraph in doc.paragraphs:
-                    if paragraph.text.strip():
-                        content.append(paragraph.text)
-
-                # Extract tables
-                for table in doc.tables:
-                    for row in table.rows:
-                        row_text = ' | '.join([cell.text for cell in row.cells])
-                        if row_text.strip():
-                            content.append(row_text)
+                if self.docx_streaming:
+                    content, stats = self._extract_docx_streaming(file_path)
+                else:
+                    content, stats = self._extract_docx_object_model(file_path)
 
                 full_content = f"Word Document: {os.path.basename(file_path)}\n\n" + "\n".join(content)
 
@@ -177,8 +684,8 @@ class LocalFileReader(ILocalFileReader):
                     metadata={
                         "source": "local_directory",
                         "file_type": "word_document",
-                        "paragraph_count": len(doc.paragraphs),
-                        "table_count": len(doc.tables)
+                        "paragraph_count": stats["paragraph_count"],
+                        "table_count": stats["table_count"]
                     }
                 )
             else:
@@ -198,46 +705,163 @@ class LocalFileReader(ILocalFileReader):
                 metadata={"source": "local_directory", "file_type": "word_document", "error": str(e)}
             )
 
+    @staticmethod
+    def _extract_docx_streaming(file_path: str) -> Tuple[List[str], dict]:
+        """Extract paragraphs and table rows in document order straight from word/document.xml."""
+        stats = {}
+        content = [block.text for block in iter_docx_blocks(file_path, stats)]
+        return content, stats
+
+    @staticmethod
+    def _extract_docx_object_model(file_path: str) -> Tuple[List[str], dict]:
+        """Extract paragraphs, then table rows, through the python-docx object model."""
+        doc = docx.Document(file_path)
+        content = []
+
+        # Extract paragraphs
+        for paragraph in doc.paragraphs:
+            if paragraph.text.strip():
+                content.append(paragraph.text)
+
+        # Extract tables
+        for table in doc.tables:
+            for row in table.rows:
+                row_text = ' | '.join([cell.text for cell in row.cells])
+                if row_text.strip():
+                    content.append(row_text)
+
+        return content, {"paragraph_count": len(doc.paragraphs), "table_count": len(doc.tables)}
+
     def _process_spreadsheet(self, file_path: str) -> Document:
-        """Process spreadsheet files (.xlsx, .xls)."""
-        try:
-            workbook = openpyxl.load_workbook(file_path, data_only=True)
-            content = [f"Spreadsheet: {os.path.basename(file_path)}\n"]
+        """Process spreadsheet files (.xlsx, .xls) into a single Document."""
+        sheet_documents = self._process_spreadsheet_sheets(file_path)
+        if len(sheet_documents) == 1:
+            return sheet_documents[0]
+
+        first_sheet = sheet_documents[0]
+        content = [f"Spreadsheet: {os.path.basename(file_path)}\n"]
+        for sheet_document in sheet_documents:
+            # Drop the per-sheet file heading, keep the sheet section
+            content.append(sheet_document.content.split("\n", 1)[1])
+
+        metadata = {
+            key: value for key, value in first_sheet.metadata.items()
+            if key not in ("sheet_name", "sheet_index", "header", "rows_included", "truncated")
+        }
+        return Document(
+            content="\n".join(content),
+            file_path=file_path,
+            repository_url="local",
+            document_type=DocumentType.SPREADSHEET,
+            metadata=metadata
+        )
 
-            for sheet_name in workbook.sheetnames:
-                sheet = workbook[sheet_name]
-                content.append(f"\n--- Sheet: {sheet_name} ---")
+    def _process_spreadsheet_sheets(self, file_path: str) -> List[Document]:
+        """
+        Process spreadsheet files (.xlsx, .xls) into one Document per sheet.
 
-                # Read up to 100 rows to avoid too much data
-                max_rows = min(sheet.max_row, 100)
-                for row_idx, row in enumerate(sheet.iter_rows(max_row=max_rows, values_only=True), 1):
-                    row_text = ' | '.join([str(cell) if cell is not None else '' for cell in row])
-                    if row_text.strip():
-                        content.append(row_text)
+        The workbook is opened in read-only mode and rows are streamed with
+        iter_rows, stopping as soon as the row budget is reached, so memory
+        and time do not depend on the size of the sheet. The first non-empty
+        row is treated as the header and its column names are repeated on
+        every data row, so each chunk keeps its column context.
+        """
+        try:
+            workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+        except Exception as e:
+            return [self._spreadsheet_error_document(file_path, e)]
 
-                if sheet.max_row > 100:
-                    content.append(f"... (Truncated, total rows: {sheet.max_row})")
+        try:
+            sheet_names = workbook.sheetnames
+            documents = []
 
-            full_content = "\n".join(content)
+            for sheet_index, sheet_name in enumerate(sheet_names):
+                sheet = workbook[sheet_name]
+                header = None
+                rows = []
+                truncated = False
+
+                for row in sheet.iter_rows(values_only=True):
+                    values = [str(cell) if cell is not None else '' for cell in row]
+                    if not any(value.strip() for value in values):
+                        continue
+                    if header is None:
+                        header = [value.strip() or f"Column {idx}" for idx, value in enumerate(values, 1)]
+                        continue
+                    if len(rows) >= self.spreadsheet_max_rows:
+                        truncated = True
+                        break
+                    rows.append(self._format_spreadsheet_row(header, values))
+
+                if header is None:
+                    continue  # Empty sheet
+
+                content = [
+                    f"Spreadsheet: {os.path.basename(file_path)}",
+                    f"\n--- Sheet: {sheet_name} ---",
+                    f"Columns: {' | '.join(header)}"
+                ]
+                content.extend(rows)
+                if truncated:
+                    # max_row comes from the sheet's dimension record and may be missing
+                    total = f"total rows: {sheet.max_row}" if sheet.max_row else "more rows not shown"
+                    content.append(f"... (Truncated after {self.spreadsheet_max_rows} rows, {total})")
+
+                documents.append(Document(
+                    content="\n".join(content),
+                    file_path=file_path,
+                    repository_url="local",
+                    document_type=DocumentType.SPREADSHEET,
+                    metadata={
+                        "source": "local_directory",
+                        "file_type": "spreadsheet",
+                        "sheet_count": len(sheet_names),
+                        "sheet_names": sheet_names,
+                        "sheet_name": sheet_name,
+                        "sheet_index": sheet_index,
+                        "header": header,
+                        "rows_included": len(rows),
+                        "truncated": truncated
+                    }
+                ))
 
-            return Document(
-                content=full_content,
-                file_path=file_path,
-                repository_url="local",
-                document_type=DocumentType.SPREADSHEET,
-                metadata={
-                    "source": "local_directory",
-                    "file_type": "spreadsheet",
-                    "sheet_count": len(workbook.sheetnames),
-                    "sheet_names": workbook.sheetnames
-                }
-            )
-        except Exception as e:
-            return Document(
-                content=f"Spreadsheet: {os.path.basename(file_path)} (Error reading: {str(e)})",
-                file_path=file_path,
-                repository_url="local",
-                document_type=DocumentType.SPREADSHEET,
-                metadata={"source": "local_directory", "file_type": "spreadsheet", "error": str(e)}
-            )
+            if not documents:
+                documents.append(Document(
+                    content=f"Spreadsheet: {os.path.basename(file_path)} (No data)",
+                    file_path=file_path,
+                    repository_url="local",
+                    document_type=DocumentType.SPREADSHEET,
+                    metadata={
+                        "source": "local_directory",
+                        "file_type": "spreadsheet",
+                        "sheet_count": len(sheet_names),
+                        "sheet_names": sheet_names
+                    }
+                ))
 
+            return documents
+        except Exception as e:
+            return [self._spreadsheet_error_document(file_path, e)]
+        finally:
+            workbook.close()
+
+    @staticmethod
+    def _format_spreadsheet_row(header: List[str], values: List[str]) -> str:
+        """Render a data row as 'column: value' pairs, skipping empty cells."""
+        cells = []
+        for idx, value in enumerate(values):
+            if not value.strip():
+                continue
+            column = header[idx] if idx < len(header) else f"Column {idx + 1}"
+            cells.append(f"{column}: {value}")
+        return ' | '.join(cells)
+
+    def _spreadsheet_error_document(self, file_path: str, error: Exception) -> Document:
+        """Build the placeholder Document for a spreadsheet that could not be read."""
+        return Document(
+            content=f"Spreadsheet: {os.path.basename(file_path)} (Error reading: {str(error)})",
+            file_path=file_path,
+            repository_url="local",
+            document_type=DocumentType.SPREADSHEET,
+            metadata={"source": "local_directory", "file_type": "spreadsheet", "error": str(error)}
+        )
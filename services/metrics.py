@@ -0,0 +1,238 @@
+"""Process-wide counters and timings with JSON and Prometheus output."""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+# Metric name -> (type, help) for the metrics recorded by the pipeline
+METRIC_HELP = {
+    "rag_stage_seconds": ("summary", "Wall time per workflow or pipeline stage"),
+    "rag_stage_items_total": ("counter", "Items (documents, chunks, files) processed per stage"),
+    "rag_api_calls_total": ("counter", "External API calls"),
+    "rag_api_call_seconds": ("summary", "Latency of external API calls"),
+    "rag_api_errors_total": ("counter", "External API calls that failed"),
+    "rag_api_retries_total": ("counter", "Retried external API requests"),
+    "rag_embedding_tokens_total": ("counter", "Tokens sent to the embedding model"),
+    "rag_vision_upload_bytes_total": ("counter", "Image bytes uploaded to the Vision API"),
+    "rag_files_read_total": ("counter", "Local files read per file type"),
+    "rag_file_errors_total": ("counter", "Local files that failed to read per file type"),
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class MetricsRegistry:
+    """
+    Thread-safe counters and summaries (count, sum, max) keyed by name and labels.
+
+    Services record into the shared `metrics` registry of the process; the
+    workflow turns it into a JSON run report and api_server.py serves it in
+    the Prometheus text format.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._summaries: Dict[str, Dict[LabelKey, List[float]]] = {}
+        self.started_at = time.time()
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        """Add value to a counter."""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels) -> None:
+        """Record one observation of a summary."""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._summaries.setdefault(name, {})
+            count, total, maximum = series.get(key, (0, 0.0, 0.0))
+            series[key] = (count + 1, total + seconds, max(maximum, seconds))
+
+    @contextmanager
+    def timer(self, name: str, **labels) -> Iterator[None]:
+        """Observe the wall time of the with block."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    @contextmanager
+    def api_call(self, api: str) -> Iterator[None]:
+        """Count an external API call, its latency and whether it failed."""
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.inc("rag_api_errors_total", api=api)
+            raise
+        finally:
+            self.inc("rag_api_calls_total", api=api)
+            self.observe("rag_api_call_seconds", time.perf_counter() - started, api=api)
+
+    def merge(self, other: "MetricsRegistry") -> None:
+        """Add the counters and summaries of another registry (e.g. of another shard) to this one."""
+        snapshot = other.snapshot()
+        with self._lock:
+            for name, samples in snapshot["counters"].items():
+                series = self._counters.setdefault(name, {})
+                for sample in samples:
+                    key = _label_key(sample["labels"])
+                    series[key] = series.get(key, 0) + sample["value"]
+            for name, samples in snapshot["summaries"].items():
+                series = self._summaries.setdefault(name, {})
+                for sample in samples:
+                    key = _label_key(sample["labels"])
+                    count, total, maximum = series.get(key, (0, 0.0, 0.0))
+                    series[key] = (count + sample["count"], total + sample["sum"], max(maximum, sample["max"]))
+
+    def reset(self) -> None:
+        """Forget everything recorded so far."""
+        with self._lock:
+            self._counters.clear()
+            self._summaries.clear()
+            self.started_at = time.time()
+
+    def snapshot(self) -> dict:
+        """All samples as plain JSON-serialisable data."""
+        with self._lock:
+            return {
+                "counters": {
+                    name: [{"labels": dict(key), "value": value} for key, value in sorted(series.items())]
+                    for name, series in sorted(self._counters.items())
+                },
+                "summaries": {
+                    name: [
+                        {"labels": dict(key), "count": count, "sum": total, "max": maximum}
+                        for key, (count, total, maximum) in sorted(series.items())
+                    ]
+                    for name, series in sorted(self._summaries.items())
+                }
+            }
+
+    @classmethod
+    def from_snapshot(cls, snapshot: dict) -> "MetricsRegistry":
+        """Rebuild a registry from snapshot() output (e.g. a run report)."""
+        registry = cls()
+        for name, samples in snapshot.get("counters", {}).items():
+            registry._counters[name] = {_label_key(sample["labels"]): sample["value"] for sample in samples}
+        for name, samples in snapshot.get("summaries", {}).items():
+            registry._summaries[name] = {
+                _label_key(sample["labels"]): (sample["count"], sample["sum"], sample["max"])
+                for sample in samples
+            }
+        return registry
+
+    def report(self, **run_info) -> dict:
+        """
+        Run report: per-stage time and throughput, per-API call counts and latency.
+
+        Args:
+            run_info: Extra fields stored at the top level (status, counts, ...)
+        """
+        snapshot = self.snapshot()
+        counters = {name: {_label_key(s["labels"]): s["value"] for s in samples}
+                    for name, samples in snapshot["counters"].items()}
+        summaries = {name: {_label_key(s["labels"]): s for s in samples}
+                     for name, samples in snapshot["summaries"].items()}
+
+        stages = {}
+        for key, sample in summaries.get("rag_stage_seconds", {}).items():
+            items = counters.get("rag_stage_items_total", {}).get(key, 0)
+            stages[dict(key).get("stage", "")] = {
+                "seconds": round(sample["sum"], 3),
+                "items": items,
+                "items_per_second": round(items / sample["sum"], 2) if sample["sum"] > 0 else 0.0
+            }
+
+        apis = {}
+        for key, sample in summaries.get("rag_api_call_seconds", {}).items():
+            apis[dict(key).get("api", "")] = {
+                "calls": sample["count"],
+                "errors": counters.get("rag_api_errors_total", {}).get(key, 0),
+                "retries": counters.get("rag_api_retries_total", {}).get(key, 0),
+                "latency_avg_seconds": round(sample["sum"] / sample["count"], 4) if sample["count"] else 0.0,
+                "latency_max_seconds": round(sample["max"], 4)
+            }
+
+        def total(name: str) -> float:
+            return sum(counters.get(name, {}).values())
+
+        return {
+            **run_info,
+            "started_at": self.started_at,
+            "finished_at": time.time(),
+            "stages": stages,
+            "apis": apis,
+            "embedding_tokens": total("rag_embedding_tokens_total"),
+            "vision_upload_bytes": total("rag_vision_upload_bytes_total"),
+            "files_read": {dict(key).get("file_type", ""): value
+                           for key, value in counters.get("rag_files_read_total", {}).items()},
+            "metrics": snapshot
+        }
+
+    def write_report(self, report_path: str, **run_info) -> dict:
+        """Write report() as JSON and return it."""
+        report = self.report(**run_info)
+        report_dir = os.path.dirname(os.path.abspath(report_path))
+        os.makedirs(report_dir, exist_ok=True)
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        return report
+
+
+def render_prometheus(registries: List[Tuple[MetricsRegistry, Optional[Dict[str, str]]]]) -> str:
+    """
+    Render registries in the Prometheus text exposition format.
+
+    Args:
+        registries: (registry, extra labels) pairs; the labels tell apart samples
+                    of the same metric coming from different registries
+    """
+    counters: Dict[str, List[Tuple[LabelKey, float]]] = {}
+    summaries: Dict[str, List[Tuple[LabelKey, dict]]] = {}
+    for registry, extra_labels in registries:
+        snapshot = registry.snapshot()
+        for name, samples in snapshot["counters"].items():
+            counters.setdefault(name, []).extend(
+                (_label_key({**sample["labels"], **(extra_labels or {})}), sample["value"]) for sample in samples
+            )
+        for name, samples in snapshot["summaries"].items():
+            summaries.setdefault(name, []).extend(
+                (_label_key({**sample["labels"], **(extra_labels or {})}), sample) for sample in samples
+            )
+
+    def labels_text(key: LabelKey) -> str:
+        if not key:
+            return ""
+        return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in key) + "}"
+
+    lines = []
+    for name in sorted(set(counters) | set(summaries)):
+        metric_type, help_text = METRIC_HELP.get(name, ("counter" if name in counters else "summary", name))
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        for key, value in counters.get(name, []):
+            lines.append(f"{name}{labels_text(key)} {value}")
+        for key, sample in summaries.get(name, []):
+            lines.append(f"{name}_count{labels_text(key)} {sample['count']}")
+            lines.append(f"{name}_sum{labels_text(key)} {sample['sum']}")
+    return "\n".join(lines) + "\n"
+
+
+# Registry shared by all services of the process
+metrics = MetricsRegistry()
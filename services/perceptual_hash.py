@@ -0,0 +1,332 @@
+"""Perceptual hashing of images for near-duplicate detection."""
+import hashlib
+import io
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from PIL import Image, ImageChops
+
+# Largest grayscale difference (0-255) of any pixel for two images to count as the same picture
+MAX_PIXEL_DIFFERENCE = 64
+# Images are compared pixel by pixel at most this large (long side)
+COMPARE_SIZE = 2048
+
+
+def _grayscale(image: Image.Image) -> Image.Image:
+    """Grayscale copy of an image, with transparent regions composited on white like exported diagrams."""
+    if image.mode in ("RGBA", "LA", "P"):
+        image = image.convert("RGBA")
+        background = Image.new("RGBA", image.size, (255, 255, 255, 255))
+        image = Image.alpha_composite(background, image)
+    return image.convert("L")
+
+
+def dhash(image: Image.Image, hash_size: int = 8) -> int:
+    """
+    Compute the difference hash (dHash) of an image.
+
+    The image is reduced to a (hash_size + 1) x hash_size grayscale
+    thumbnail and each bit records whether a pixel is brighter than its
+    right-hand neighbour. Rescaled or re-encoded copies of the same image
+    end up within a few bits of each other.
+
+    Args:
+        image: Pillow image
+        hash_size: Number of rows (and comparisons per row) in the hash
+
+    Returns:
+        Hash as an integer of hash_size * hash_size bits
+    """
+    # draft() lets JPEG decoding skip straight to a reduced size
+    image.draft("L", (hash_size * 16, hash_size * 16))
+    pixels = list(_grayscale(image).resize((hash_size + 1, hash_size), Image.LANCZOS).getdata())
+
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def hamming_distance(first: int, second: int) -> int:
+    """Number of differing bits between two hashes."""
+    return bin(first ^ second).count("1")
+
+
+def same_pixels(first: Image.Image, second: Image.Image) -> bool:
+    """
+    Whether two images show the same picture, possibly rescaled or re-encoded.
+
+    A dHash only sees a 9x8 thumbnail, so diagrams with the same box layout
+    but different labels get the same hash. This check requires the same
+    aspect ratio and compares every pixel at the smaller image's size (at
+    most COMPARE_SIZE): one differing label fails it.
+    """
+    (first_width, first_height), (second_width, second_height) = first.size, second.size
+    if abs(first_width * second_height - second_width * first_height) > 0.01 * max(
+        first_width * second_height, second_width * first_height
+    ):
+        return False
+
+    width, height = min(first.size, second.size, key=lambda size: size[0] * size[1])
+    scale = min(1.0, COMPARE_SIZE / max(width, height))
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    first, second = (
+        image if image.size == size else image.resize(size, Image.LANCZOS)
+        for image in (_grayscale(first), _grayscale(second))
+    )
+    return not any(ImageChops.difference(first, second).histogram()[MAX_PIXEL_DIFFERENCE + 1:])
+
+
+class PerceptualHashIndex:
+    """
+    Persistent index of image perceptual hashes and their Vision analyses.
+
+    Two things are stored in one SQLite file: a memo of file path, size
+    and mtime to hash (and SHA-256 of the bytes), so unchanged files are
+    not decoded again, and the analysis text recorded for each hash.
+
+    A stored analysis within max_distance bits is only reused for the same
+    bytes, or when the analysed file still holds them and its pixels match
+    (same_pixels): re-exported or resized copies of a diagram share one
+    Vision analysis, while a diagram with the same layout but other labels
+    is analysed on its own.
+    """
+
+    def __init__(self, index_path: str, max_distance: int = 5):
+        """
+        Initialize the perceptual hash index.
+
+        Args:
+            index_path: Path to the SQLite index file
+            max_distance: Maximum Hamming distance for two images to count as near-duplicates
+        """
+        self.index_path = index_path
+        self.max_distance = max_distance
+        self.reused = 0
+        self._lock = threading.Lock()
+
+        index_dir = os.path.dirname(os.path.abspath(index_path))
+        os.makedirs(index_dir, exist_ok=True)
+
+        # Shared between the Vision worker threads, guarded by self._lock
+        self._connection = sqlite3.connect(index_path, check_same_thread=False)
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS file_hashes (
+                file_path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                phash TEXT NOT NULL,
+                content_hash TEXT
+            )
+            """
+        )
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS analyses (
+                phash TEXT NOT NULL,
+                signature TEXT NOT NULL,
+                image_path TEXT NOT NULL,
+                summary TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                content_hash TEXT,
+                PRIMARY KEY (phash, signature)
+            )
+            """
+        )
+        # Indexes written before content hashes were recorded: their rows are never reused
+        for table in ("file_hashes", "analyses"):
+            columns = [row[1] for row in self._connection.execute(f"PRAGMA table_info({table})")]
+            if "content_hash" not in columns:
+                self._connection.execute(f"ALTER TABLE {table} ADD COLUMN content_hash TEXT")
+        self._connection.commit()
+
+        # Hashes are scanned in memory; a few thousand XOR/popcounts are cheap
+        self._analyses: Dict[str, List[Tuple[int, str]]] = {}
+        for phash, signature, image_path in self._connection.execute(
+            "SELECT phash, signature, image_path FROM analyses"
+        ):
+            self._analyses.setdefault(signature, []).append((int(phash, 16), image_path))
+
+    def hash_file(self, file_path: str, content: Optional[bytes] = None) -> Optional[int]:
+        """
+        Get the perceptual hash of an image file.
+
+        Args:
+            file_path: Path to the image
+            content: Image bytes if already read; read from disk on a memo miss otherwise
+
+        Returns:
+            Hash, or None if the image cannot be decoded (e.g. SVG)
+        """
+        fingerprint = self._fingerprint(file_path, content)
+        return fingerprint[0] if fingerprint else None
+
+    def same_image(self, first_path: str, second_path: str) -> bool:
+        """Whether two image files have the same bytes or show the same picture (same_pixels)."""
+        first, second = self._fingerprint(first_path), self._fingerprint(second_path)
+        if first is None or second is None:
+            return False
+        if first[1] == second[1]:
+            return True
+        try:
+            with Image.open(first_path) as first_image, Image.open(second_path) as second_image:
+                return same_pixels(first_image, second_image)
+        except Exception:
+            return False
+
+    def _fingerprint(self, file_path: str, content: Optional[bytes] = None) -> Optional[Tuple[int, str]]:
+        """(perceptual hash, SHA-256 of the bytes) of an image, memoized by size and mtime."""
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT size, mtime_ns, phash, content_hash FROM file_hashes WHERE file_path = ?",
+                (file_path,)
+            ).fetchone()
+        if row and row[0] == stat.st_size and row[1] == stat.st_mtime_ns and row[3]:
+            return int(row[2], 16), row[3]
+
+        try:
+            if content is None:
+                with open(file_path, 'rb') as image_file:
+                    content = image_file.read()
+            with Image.open(io.BytesIO(content)) as image:
+                value = dhash(image)
+        except Exception:
+            return None
+        content_hash = hashlib.sha256(content).hexdigest()
+
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO file_hashes (file_path, size, mtime_ns, phash, content_hash) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (file_path, stat.st_size, stat.st_mtime_ns, f"{value:016x}", content_hash)
+            )
+            self._connection.commit()
+        return value, content_hash
+
+    def find(self, phash: int, image_path: str, signature: str = "") -> Optional[Tuple[str, str]]:
+        """
+        Find a stored analysis of the same picture.
+
+        Args:
+            phash: Perceptual hash of the image
+            image_path: Path of the image (hashed with hash_file)
+            signature: Request settings the analysis must have been produced with
+
+        Returns:
+            (image_path, summary) of the closest confirmed match within max_distance, or None
+        """
+        with self._lock:
+            candidates = sorted(
+                (hamming_distance(phash, stored_hash), stored_hash)
+                for stored_hash, _ in self._analyses.get(signature, [])
+                if hamming_distance(phash, stored_hash) <= self.max_distance
+            )
+
+        fingerprint = self._fingerprint(image_path)
+        for _, stored_hash in candidates:
+            with self._lock:
+                row = self._connection.execute(
+                    "SELECT image_path, summary, content_hash FROM analyses WHERE phash = ? AND signature = ?",
+                    (f"{stored_hash:016x}", signature)
+                ).fetchone()
+            if row and fingerprint and self._confirms(image_path, fingerprint[1], row[0], row[2]):
+                self.reused += 1
+                return row[0], row[1]
+        return None
+
+    def _confirms(
+        self,
+        image_path: str,
+        content_hash: str,
+        stored_path: str,
+        stored_content_hash: Optional[str]
+    ) -> bool:
+        """Whether a stored analysis of stored_path describes the image."""
+        if not stored_content_hash:
+            return False
+        if stored_content_hash == content_hash:
+            return True
+        if stored_path == image_path:
+            # The file changed since it was analysed
+            return False
+        # The analysed file must still hold the analysed bytes to be compared
+        stored = self._fingerprint(stored_path)
+        return stored is not None and stored[1] == stored_content_hash and self.same_image(image_path, stored_path)
+
+    def add(self, phash: int, image_path: str, summary: str, signature: str = "") -> None:
+        """
+        Record the analysis of an image.
+
+        Args:
+            phash: Perceptual hash of the image
+            image_path: Path of the analysed image (hashed with hash_file)
+            summary: Analysis text to reuse for copies of the image
+            signature: Request settings the analysis was produced with
+        """
+        fingerprint = self._fingerprint(image_path)
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO analyses (phash, signature, image_path, summary, updated_at, content_hash) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (f"{phash:016x}", signature, image_path, summary, time.time(), fingerprint[1] if fingerprint else None)
+            )
+            self._connection.commit()
+            entries = self._analyses.setdefault(signature, [])
+            entries[:] = [entry for entry in entries if entry[0] != phash]
+            entries.append((phash, image_path))
+
+    def find_duplicates(self, image_paths: List[str], exclude: Optional[List[str]] = None) -> Dict[str, str]:
+        """
+        Group copies of the same picture among a set of files.
+
+        Images are considered in the given order and each one is compared
+        with the images kept before it, so the first of a group is kept.
+        Images within max_distance bits are only grouped when same_image
+        confirms them.
+
+        Args:
+            image_paths: Images to check
+            exclude: Images that are already covered elsewhere (e.g. diagram exports);
+                     images near them are reported as duplicates but they are never reported themselves
+
+        Returns:
+            Mapping of duplicate image path to the path it duplicates
+        """
+        kept: List[Tuple[int, str]] = []
+        for image_path in exclude or []:
+            phash = self.hash_file(image_path)
+            if phash is not None:
+                kept.append((phash, image_path))
+
+        duplicates = {}
+        for image_path in image_paths:
+            phash = self.hash_file(image_path)
+            if phash is None:
+                continue
+            match = next(
+                (kept_path for kept_hash, kept_path in kept
+                 if hamming_distance(phash, kept_hash) <= self.max_distance
+                 and self.same_image(image_path, kept_path)),
+                None
+            )
+            if match and match != image_path:
+                duplicates[image_path] = match
+            else:
+                kept.append((phash, image_path))
+
+        return duplicates
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._connection.close()
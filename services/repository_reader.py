@@ -1,9 +1,14 @@
 """GitHub repository reader service implementation."""
 import os
+import re
+import base64
+import fnmatch
+import hashlib
 import tempfile
 import shutil
-from typing import List
+from typing import Dict, List, Optional, Sequence, Tuple
 from pathlib import Path
+from urllib.parse import urlsplit
 import git
 
 from interfaces import IRepositoryReader
@@ -13,14 +18,39 @@ from models import Document
 class GitHubRepositoryReader(IRepositoryReader):
     """Service for reading markdown files from GitHub repositories."""
 
-    def __init__(self, github_token: str = ""):
+    def __init__(
+        self,
+        github_token: str = "",
+        cache_dir: str = "",
+        git_native: bool = True,
+        include_globs: Sequence[str] = ("*.md",),
+        partial_clone: bool = True
+    ):
         """
         Initialize the repository reader.
 
         Args:
             github_token: Optional GitHub token for private repositories
+            cache_dir: Directory for persistent clones reused across runs
+                       (empty = clone into a temporary directory every run)
+            git_native: List and read markdown through the git object database
+                        (ls-tree + cat-file) instead of walking the working tree
+            include_globs: Files to index, as .gitignore-style globs; also used as the
+                           sparse-checkout patterns
+            partial_clone: Clone with --filter=blob:none and a sparse checkout so only
+                           blobs matching include_globs are downloaded
         """
         self.github_token = github_token
+        self.cache_dir = cache_dir
+        self.git_native = git_native
+        self.include_globs = list(include_globs) or ["*.md"]
+        self.partial_clone = partial_clone
+        # Clone path -> repository URL, so documents name their repository rather than a local path
+        self._repository_urls: Dict[str, str] = {}
+        # Clone path -> (HEAD commit, markdown blobs), so a run lists each tree only once
+        self._blob_listings: Dict[str, Tuple[str, Dict[str, str]]] = {}
+        if github_token:
+            self._check_git_version()
 
     def clone_repository(self, repo_url: str) -> str:
         """
@@ -37,29 +67,266 @@ class GitHubRepositoryReader(IRepositoryReader):
             print("No repository URL provided - skipping repository cloning")
             return ""
 
+        if self.cache_dir:
+            repo_path = self._update_cached_clone(repo_url)
+            self._repository_urls[repo_path] = repo_url
+            return repo_path
+
         temp_dir = tempfile.mkdtemp(prefix="rag_repo_")
 
         try:
-            # Parse URL and insert token
-            if self.github_token and "https://" in repo_url:
-                repo_url = repo_url.replace("https://", f"https://{self.github_token}@")
-
-            print(f"Cloning repository: {repo_url.replace(self.github_token, '***') if self.github_token else repo_url}")
-            git.Repo.clone_from(repo_url, temp_dir, depth=1)
+            print(f"Cloning repository: {repo_url}")
+            self._clone(repo_url, temp_dir)
             print(f"Repository cloned to: {temp_dir}")
+            self._repository_urls[temp_dir] = repo_url
             return temp_dir
         except Exception as e:
             # Clean up on failure
             if os.path.exists(temp_dir):
                 shutil.rmtree(temp_dir)
-            raise Exception(f"Failed to clone repository: {str(e)}")
+            raise Exception(f"Failed to clone repository: {self._redact(str(e))}")
+
+    def _update_cached_clone(self, repo_url: str) -> str:
+        """
+        Bring the persistent clone of a repository up to date.
+
+        An existing clone is updated with a shallow fetch of the remote
+        HEAD and a hard reset to it; commits checked out earlier stay in
+        the object database, so they can still be diffed against.
+        """
+        repo_path = self._cache_path(repo_url)
+
+        try:
+            if os.path.isdir(os.path.join(repo_path, ".git")):
+                print(f"Updating cached clone: {repo_url}")
+                repo = git.Repo(repo_path)
+                repo.git.update_environment(**self._git_environment(repo_url))
+                if self.partial_clone:
+                    # Patterns may have changed since the clone was made
+                    repo.git.sparse_checkout("set", "--no-cone", *self.include_globs)
+                # A partial clone's promisor remote applies its blob filter to this fetch too
+                repo.git.fetch("origin", "HEAD", depth=1)
+                repo.git.reset("--hard", "FETCH_HEAD")
+                repo.git.clean("-fdx")
+            else:
+                print(f"Cloning repository into cache: {repo_url}")
+                if os.path.exists(repo_path):
+                    shutil.rmtree(repo_path)
+                os.makedirs(os.path.dirname(repo_path), exist_ok=True)
+                repo = self._clone(repo_url, repo_path)
+
+            print(f"Repository at {repo.head.commit.hexsha[:10]} in: {repo_path}")
+            return repo_path
+        except Exception as e:
+            raise Exception(f"Failed to update cached repository: {self._redact(str(e))}")
+
+    def _clone(self, repo_url: str, repo_path: str) -> git.Repo:
+        """
+        Shallow-clone a repository into repo_path.
+
+        With partial_clone, only commits and trees are downloaded up front;
+        the sparse checkout then fetches the blobs matching include_globs
+        in one batch, so transfer and disk usage follow the size of the
+        documentation rather than of the repository.
+        """
+        environment = self._git_environment(repo_url)
+        if not self.partial_clone:
+            return git.Repo.clone_from(repo_url, repo_path, env=environment, depth=1)
+
+        repo = git.Repo.clone_from(
+            repo_url, repo_path, env=environment,
+            depth=1, filter="blob:none", no_checkout=True
+        )
+        repo.git.update_environment(**environment)
+        repo.git.sparse_checkout("set", "--no-cone", *self.include_globs)
+        repo.git.reset("--hard", "HEAD")
+        return repo
+
+    def _git_environment(self, repo_url: str) -> Dict[str, str]:
+        """
+        Environment for git commands on a repository.
+
+        The token is sent as an HTTP header through environment-only git
+        config, so it never ends up in .git/config or on a command line,
+        and lazy blob fetches of partial clones are authenticated as well.
+        The header is scoped to the repository's https origin
+        (http.<origin>.extraHeader), so it is never sent to other hosts such
+        as redirects or submodules, and never over plain http or ssh.
+        GIT_CONFIG_COUNT needs git 2.31 or later; older versions ignore it.
+        """
+        environment = {"GIT_TERMINAL_PROMPT": "0"}
+        url = urlsplit(repo_url.strip())
+        if self.github_token and url.scheme == "https" and url.hostname:
+            credentials = base64.b64encode(f"x-access-token:{self.github_token}".encode("utf-8")).decode("ascii")
+            origin = f"https://{url.hostname}" + (f":{url.port}" if url.port else "") + "/"
+            environment.update({
+                "GIT_CONFIG_COUNT": "1",
+                "GIT_CONFIG_KEY_0": f"http.{origin}.extraHeader",
+                "GIT_CONFIG_VALUE_0": f"Authorization: Basic {credentials}"
+            })
+        return environment
+
+    @staticmethod
+    def _check_git_version() -> None:
+        """Warn when git is too old to pick up the token from GIT_CONFIG_* variables."""
+        try:
+            version = git.Git().version_info
+        except Exception:
+            return
+        if version < (2, 31):
+            print(
+                f"Warning: git {'.'.join(map(str, version))} ignores GIT_CONFIG_COUNT (needs git 2.31+); "
+                f"GITHUB_TOKEN will not be sent and private repositories will fail to clone"
+            )
+
+    def _cache_path(self, repo_url: str) -> str:
+        """Stable cache directory for a repository URL."""
+        name = repo_url.rstrip("/").split("/")[-1]
+        if name.endswith(".git"):
+            name = name[:-len(".git")]
+        name = re.sub(r"[^A-Za-z0-9._-]+", "_", name)
+        digest = hashlib.sha1(repo_url.strip().encode("utf-8")).hexdigest()[:12]
+        return os.path.join(os.path.abspath(self.cache_dir), f"{name}-{digest}")
+
+    def _redact(self, text: str) -> str:
+        """Hide the token in messages."""
+        return text.replace(self.github_token, "***") if self.github_token else text
+
+    def head_commit(self, repo_path: str) -> str:
+        """
+        Get the commit checked out in a clone.
+
+        Args:
+            repo_path: Path to the repository
+
+        Returns:
+            Commit SHA, or empty string if it cannot be determined
+        """
+        try:
+            return git.Repo(repo_path).head.commit.hexsha
+        except Exception:
+            return ""
+
+    def diff_markdown_files(self, repo_path: str, since_commit: str) -> Optional[Tuple[List[str], List[str]]]:
+        """
+        List markdown files changed between a commit and HEAD.
+
+        Args:
+            repo_path: Path to the repository
+            since_commit: Last indexed commit
+
+        Returns:
+            (added or modified paths, deleted paths) relative to the repository root,
+            or None if the commit is not available in the clone
+        """
+        try:
+            output = git.Repo(repo_path).git.diff(
+                "--name-status", "--no-renames", "-z", since_commit, "HEAD"
+            )
+        except Exception:
+            return None
+
+        changed, deleted = [], []
+        fields = output.split("\0")
+        for status, path in zip(fields[0::2], fields[1::2]):
+            if not self._is_markdown_path(path):
+                continue
+            if status.startswith("D"):
+                deleted.append(path)
+            else:
+                changed.append(path)
+        return sorted(changed), sorted(deleted)
+
+    def _is_markdown_path(self, relative_path: str) -> bool:
+        """Whether a repository path matches the include globs and should be indexed."""
+        # Skip files in the .git directory itself (not paths that merely contain ".git")
+        if ".git" in relative_path.split("/")[:-1]:
+            return False
+        file_name = relative_path.rsplit("/", 1)[-1]
+        return any(
+            # Globs without a slash match the file name at any depth, as in .gitignore
+            fnmatch.fnmatchcase(relative_path if "/" in pattern else file_name, pattern.lstrip("/"))
+            for pattern in self.include_globs
+        )
 
-    def get_markdown_files(self, repo_path: str) -> List[Document]:
+    def list_markdown_blobs(self, repo_path: str) -> Optional[Dict[str, str]]:
+        """
+        List markdown files of HEAD with their blob SHAs.
+
+        One `git ls-tree -r` call replaces walking and stat'ing the working
+        tree; the blob SHA identifies the content, so unchanged files can be
+        recognised without reading them. The listing is cached per clone and
+        HEAD commit, so planning and reading (or every micro-batch of a
+        streaming run) share it.
+
+        Args:
+            repo_path: Path to the repository
+
+        Returns:
+            Mapping of path (relative to the repository root) to blob SHA, or None
+            when git-native mode is off or the path is not a git repository
+        """
+        if not self.git_native or not repo_path or not os.path.isdir(os.path.join(repo_path, ".git")):
+            return None
+
+        head = self.head_commit(repo_path)
+        cached = self._blob_listings.get(repo_path)
+        if head and cached and cached[0] == head:
+            return cached[1]
+
+        try:
+            output = git.Repo(repo_path).git.ls_tree("-r", "-z", head or "HEAD")
+        except Exception as e:
+            print(f"Warning: git ls-tree failed, falling back to the working tree: {str(e)}")
+            return None
+
+        blobs = {}
+        for entry in output.split("\0"):
+            if not entry:
+                continue
+            info, path = entry.split("\t", 1)
+            _, object_type, sha = info.split()
+            if object_type == "blob" and self._is_markdown_path(path):
+                blobs[path] = sha
+        if head:
+            self._blob_listings[repo_path] = (head, blobs)
+        return blobs
+
+    def list_markdown_files(self, repo_path: str) -> List[str]:
+        """
+        List markdown files in the repository.
+
+        Args:
+            repo_path: Path to the repository
+
+        Returns:
+            Paths relative to the repository root (empty list if no repo path)
+        """
+        if not repo_path or repo_path.strip() == "":
+            return []
+
+        blobs = self.list_markdown_blobs(repo_path)
+        if blobs is not None:
+            return sorted(blobs)
+
+        file_paths = []
+        for directory, directory_names, file_names in os.walk(repo_path):
+            # Never descend into the repository's .git directory
+            directory_names[:] = [name for name in directory_names if name != ".git"]
+            relative_dir = Path(directory).relative_to(repo_path).as_posix()
+            for file_name in file_names:
+                relative_path = file_name if relative_dir == "." else f"{relative_dir}/{file_name}"
+                if self._is_markdown_path(relative_path):
+                    file_paths.append(relative_path)
+        return sorted(file_paths)
+
+    def get_markdown_files(self, repo_path: str, file_paths: Optional[List[str]] = None) -> List[Document]:
         """
         Get all markdown files from the repository.
 
         Args:
             repo_path: Path to the repository
+            file_paths: Only read these paths (relative to the repository root)
 
         Returns:
             List of Document objects (empty list if no repo path)
@@ -69,28 +336,27 @@ class GitHubRepositoryReader(IRepositoryReader):
             print("No repository path provided - skipping markdown extraction")
             return []
 
+        blobs = self.list_markdown_blobs(repo_path)
+        if blobs is not None:
+            return self._read_markdown_blobs(repo_path, blobs, file_paths)
+
         documents = []
         repo_path_obj = Path(repo_path)
-        md_files = list(repo_path_obj.rglob("*.md"))
+        if file_paths is None:
+            file_paths = self.list_markdown_files(repo_path)
 
-        print(f"Found {len(md_files)} markdown files")
+        print(f"Found {len(file_paths)} markdown files")
 
-        for md_file in md_files:
+        for relative_path in file_paths:
+            md_file = repo_path_obj / relative_path
             try:
-                # Skip files in .git directory
-                if ".git" in str(md_file):
-                    continue
-
                 with open(md_file, 'r', encoding='utf-8') as f:
                     content = f.read()
 
-                # Get relative path from repo root
-                relative_path = md_file.relative_to(repo_path_obj)
-
                 document = Document(
                     content=content,
                     file_path=str(relative_path),
-                    repository_url=repo_path,
+                    repository_url=self._repository_urls.get(repo_path, repo_path),
                     metadata={
                         "file_size": md_file.stat().st_size,
                         "file_name": md_file.name
@@ -103,6 +369,48 @@ class GitHubRepositoryReader(IRepositoryReader):
 
         return documents
 
+    def _read_markdown_blobs(
+        self,
+        repo_path: str,
+        blobs: Dict[str, str],
+        file_paths: Optional[List[str]] = None
+    ) -> List[Document]:
+        """Read markdown blobs through one persistent `git cat-file --batch` process."""
+        if file_paths is None:
+            file_paths = sorted(blobs)
+
+        print(f"Found {len(file_paths)} markdown files")
+
+        documents = []
+        repo = git.Repo(repo_path)
+        try:
+            for relative_path in file_paths:
+                sha = blobs.get(relative_path)
+                if sha is None:
+                    print(f"Error reading file {relative_path}: not in HEAD")
+                    continue
+                try:
+                    _, _, size, data = repo.git.get_object_data(sha)
+                    document = Document(
+                        content=data.decode("utf-8"),
+                        file_path=relative_path,
+                        repository_url=self._repository_urls.get(repo_path, repo_path),
+                        metadata={
+                            "file_size": size,
+                            "file_name": os.path.basename(relative_path)
+                        },
+                        content_hash=sha
+                    )
+                    documents.append(document)
+                    print(f"Loaded: {relative_path}")
+                except Exception as e:
+                    print(f"Error reading file {relative_path}: {str(e)}")
+        finally:
+            # Stops the cat-file process
+            repo.close()
+
+        return documents
+
     def cleanup(self, repo_path: str) -> None:
         """
         Clean up the cloned repository.
@@ -110,6 +418,11 @@ class GitHubRepositoryReader(IRepositoryReader):
         Args:
             repo_path: Path to the repository to clean up
         """
+        if self.cache_dir and os.path.abspath(repo_path).startswith(os.path.abspath(self.cache_dir) + os.sep):
+            # Cached clones are kept for the next run
+            return
+        self._repository_urls.pop(repo_path, None)
+        self._blob_listings.pop(repo_path, None)
         if os.path.exists(repo_path):
             shutil.rmtree(repo_path)
             print(f"Cleaned up repository at: {repo_path}")
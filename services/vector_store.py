@@ -1,5 +1,7 @@
 """Milvus Cloud vector store implementation."""
-from typing import List
+import asyncio
+import json
+from typing import Dict, List, Optional
 from pymilvus import (
     connections,
     Collection,
@@ -9,8 +11,16 @@ from pymilvus import (
     utility
 )
 
+try:
+    from pymilvus import AsyncMilvusClient
+except ImportError:
+    # pymilvus < 2.5 has no async client; the async methods then run the sync ones on a thread
+    AsyncMilvusClient = None
+
 from interfaces import IVectorStore
-from models import EmbeddedChunk
+from models import EmbeddedChunk, ChunkBatch
+from services.metrics import metrics
+from services.async_utils import to_thread
 
 
 class MilvusVectorStore(IVectorStore):
@@ -21,7 +31,9 @@ class MilvusVectorStore(IVectorStore):
         uri: str,
         token: str,
         collection_name: str,
-        embedding_dimension: int = 1536
+        embedding_dimension: int = 1536,
+        flush_writes: bool = True,
+        consistency_level: Optional[str] = None
     ):
         """
         Initialize the Milvus vector store.
@@ -31,12 +43,20 @@ class MilvusVectorStore(IVectorStore):
             token: Milvus Cloud token
             collection_name: Name of the collection
             embedding_dimension: Dimension of the embeddings
+            flush_writes: Flush after every insert and delete (rows are searchable
+                          without a flush; skipping it keeps single writes fast)
+            consistency_level: Consistency level of searches (e.g. "Session" to always
+                               see this client's own writes); collection default if None
         """
         self.uri = uri
         self.token = token
         self.collection_name = collection_name
         self.embedding_dimension = embedding_dimension
+        self.flush_writes = flush_writes
+        self.consistency_level = consistency_level
         self.collection = None
+        # (event loop, AsyncMilvusClient, collection loaded) - gRPC aio channels belong to one loop
+        self._async_state = None
 
         # Connect to Milvus Cloud
         self._connect()
@@ -99,6 +119,24 @@ class MilvusVectorStore(IVectorStore):
         Args:
             embedded_chunks: List of embedded chunks to insert
         """
+        self.insert_batch(ChunkBatch.from_embedded_chunks(embedded_chunks))
+
+    def insert_batch(self, batch: ChunkBatch) -> List[int]:
+        """
+        Insert an embedded chunk batch into the vector store.
+
+        The batch columns map directly onto the collection fields, so the
+        insert payload is assembled without touching per-row objects.
+
+        Args:
+            batch: Embedded chunk batch to insert
+
+        Returns:
+            Primary keys of the inserted rows, in batch order
+        """
+        if not batch.is_embedded:
+            raise ValueError("Chunk batch has no embeddings to insert")
+
         if not self.collection:
             self.collection = Collection(self.collection_name)
 
@@ -108,9 +146,6 @@ class MilvusVectorStore(IVectorStore):
 
         print(f"Collection schema fields: {field_names}")
 
-        # Prepare embeddings data
-        embeddings = [ec.embedding for ec in embedded_chunks]
-
         # Build data list based on actual schema fields
         data = []
 
@@ -128,36 +163,112 @@ class MilvusVectorStore(IVectorStore):
                     else:
                         # If ID is not auto-generated, we need to provide IDs
                         # This shouldn't happen in modern Milvus, but handle it
-                        ids = list(range(len(embedded_chunks)))
+                        ids = list(range(len(batch)))
                         data.append(ids)
                 elif field.name == "vector" or field.name == "embedding":
                     # Old schema might use 'vector' instead of 'embedding'
-                    data.append(embeddings)
+                    data.append(batch.embeddings)
         else:
             # New schema: id, embedding, content, file_path, repository_url, chunk_index
-            contents = [ec.chunk.content[:65535] for ec in embedded_chunks]  # Truncate if needed
-            file_paths = [ec.chunk.source_file_path for ec in embedded_chunks]
-            repository_urls = [ec.chunk.repository_url for ec in embedded_chunks]
-            chunk_indices = [ec.chunk.chunk_index for ec in embedded_chunks]
+            columns = {
+                "content": [content[:65535] for content in batch.contents],  # Truncate if needed
+                "file_path": batch.file_paths,
+                "repository_url": batch.repository_urls,
+                "chunk_index": batch.chunk_indices.tolist(),
+            }
 
             # Build data list based on actual schema fields (excluding auto_id primary key)
             for field in schema.fields:
                 if field.name == "id" and field.auto_id:
                     continue  # Skip auto-generated ID field
                 elif field.name == "embedding" or field.name == "vector":
-                    data.append(embeddings)
-                elif field.name == "content":
-                    data.append(contents)
-                elif field.name == "file_path":
-                    data.append(file_paths)
-                elif field.name == "repository_url":
-                    data.append(repository_urls)
-                elif field.name == "chunk_index":
-                    data.append(chunk_indices)
-
-        self.collection.insert(data)
-        self.collection.flush()
-        print(f"Inserted {len(embedded_chunks)} embeddings into Milvus")
+                    data.append(batch.embeddings)
+                elif field.name in columns:
+                    data.append(columns[field.name])
+
+        with metrics.api_call("milvus_insert"):
+            result = self.collection.insert(data)
+            if self.flush_writes:
+                self.collection.flush()
+        print(f"Inserted {len(batch)} embeddings into Milvus")
+        return list(result.primary_keys)
+
+    def delete_chunks(self, chunk_ids: List[int]) -> None:
+        """
+        Delete chunks by primary key.
+
+        Args:
+            chunk_ids: Primary keys returned by insert_batch
+        """
+        if not chunk_ids or not self.collection_exists():
+            return
+
+        if not self.collection:
+            self.collection = Collection(self.collection_name)
+
+        primary_field = self.collection.schema.primary_field.name
+        # Keep expressions well below the Milvus expression size limit
+        with metrics.api_call("milvus_delete"):
+            for start in range(0, len(chunk_ids), 1000):
+                ids = [int(chunk_id) for chunk_id in chunk_ids[start:start + 1000]]
+                self.collection.delete(f"{primary_field} in {ids}")
+            if self.flush_writes:
+                self.collection.flush()
+        print(f"Deleted {len(chunk_ids)} stale chunks from Milvus")
+
+    def delete_by_file_paths(
+        self,
+        file_paths: List[str],
+        repository_url: Optional[str] = None,
+        include_legacy: bool = False,
+        keep_ids: Optional[Dict[str, List[int]]] = None
+    ) -> int:
+        """
+        Delete all chunks of the given files.
+
+        Args:
+            file_paths: file_path values whose chunks should be removed
+            repository_url: Only delete chunks of this repository (paths are relative per repository)
+            include_legacy: With repository_url, also delete chunks stored before documents carried
+                            their repository URL, whose repository_url is the local clone directory
+            keep_ids: File path -> ids of chunks to keep (the ones just inserted to replace the others)
+
+        Returns:
+            Number of deleted chunks
+        """
+        if not file_paths or not self.collection_exists():
+            return 0
+
+        if not self.collection:
+            self.collection = Collection(self.collection_name)
+
+        field_names = [field.name for field in self.collection.schema.fields]
+        if "file_path" not in field_names:
+            print("Warning: Collection has no file_path field; cannot delete chunks by file")
+            return 0
+
+        scope = ""
+        if repository_url is not None and "repository_url" in field_names:
+            scope = f"repository_url == {json.dumps(repository_url)}"
+            if include_legacy:
+                # Clone directories are absolute paths; URLs, "local" and "api" never start with "/"
+                scope = f"({scope} or repository_url like \"/%\")"
+            scope = f" and {scope}"
+
+        primary_field = self.collection.schema.primary_field.name
+        deleted = 0
+        with metrics.api_call("milvus_delete"):
+            for start in range(0, len(file_paths), 100):
+                batch = file_paths[start:start + 100]
+                expression = f"file_path in {json.dumps(batch)}{scope}"
+                kept = [int(chunk_id) for file_path in batch for chunk_id in (keep_ids or {}).get(file_path, [])]
+                if kept:
+                    expression += f" and {primary_field} not in {kept}"
+                deleted += self.collection.delete(expression).delete_count
+            if self.flush_writes:
+                self.collection.flush()
+        print(f"Deleted {deleted} chunks of {len(file_paths)} files from Milvus")
+        return deleted
 
     def search(self, query_embedding: List[float], top_k: int = 5) -> List[dict]:
         """
@@ -191,14 +302,17 @@ class MilvusVectorStore(IVectorStore):
             "metric_type": "L2",
             "params": {"nprobe": 10}
         }
-
-        results = self.collection.search(
-            data=[query_embedding],
-            anns_field=vector_field,
-            param=search_params,
-            limit=top_k,
-            output_fields=available_output_fields if available_output_fields else None
-        )
+        consistency = {"consistency_level": self.consistency_level} if self.consistency_level else {}
+
+        with metrics.api_call("milvus_search"):
+            results = self.collection.search(
+                data=[query_embedding],
+                anns_field=vector_field,
+                param=search_params,
+                limit=top_k,
+                output_fields=available_output_fields if available_output_fields else None,
+                **consistency
+            )
 
         # Format results
         formatted_results = []
@@ -225,6 +339,121 @@ class MilvusVectorStore(IVectorStore):
 
         return formatted_results
 
+    async def _async_client(self, load: bool = False):
+        """AsyncMilvusClient for the running event loop, or None when pymilvus has none."""
+        if AsyncMilvusClient is None:
+            return None
+
+        loop = asyncio.get_running_loop()
+        if self._async_state is None or self._async_state[0] is not loop:
+            self._async_state = [loop, AsyncMilvusClient(uri=self.uri, token=self.token), False]
+        client = self._async_state[1]
+        if load and not self._async_state[2]:
+            await client.load_collection(self.collection_name)
+            self._async_state[2] = True
+        return client
+
+    def _schema_field_names(self) -> List[str]:
+        """Field names of the collection schema (fetched once per Collection object)."""
+        if not self.collection:
+            self.collection = Collection(self.collection_name)
+        return [field.name for field in self.collection.schema.fields]
+
+    async def ainsert_embeddings(self, embedded_chunks: List[EmbeddedChunk]) -> None:
+        """
+        Insert embeddings into the vector store without blocking the event loop.
+
+        Args:
+            embedded_chunks: List of embedded chunks to insert
+        """
+        await self.ainsert_batch(ChunkBatch.from_embedded_chunks(embedded_chunks))
+
+    async def ainsert_batch(self, batch: ChunkBatch) -> List[int]:
+        """
+        Insert an embedded chunk batch with the async Milvus client.
+
+        Rows are searchable without a flush, so unlike insert_batch (with
+        flush_writes) no flush is forced; Milvus seals the segments itself. Collections with
+        the old two-field schema, or pymilvus without AsyncMilvusClient,
+        fall back to insert_batch on a worker thread.
+
+        Args:
+            batch: Embedded chunk batch to insert
+
+        Returns:
+            Primary keys of the inserted rows, in batch order
+        """
+        if not batch.is_embedded:
+            raise ValueError("Chunk batch has no embeddings to insert")
+
+        field_names = await to_thread(self._schema_field_names)
+        client = await self._async_client()
+        if client is None or len(field_names) == 2:
+            return await to_thread(self.insert_batch, batch)
+
+        columns = {
+            "content": [content[:65535] for content in batch.contents],  # Truncate if needed
+            "file_path": batch.file_paths,
+            "repository_url": batch.repository_urls,
+            "chunk_index": batch.chunk_indices.tolist(),
+        }
+        vector_field = "embedding" if "embedding" in field_names else "vector"
+        rows = [
+            {vector_field: batch.embeddings[index].tolist(),
+             **{name: values[index] for name, values in columns.items() if name in field_names}}
+            for index in range(len(batch))
+        ]
+
+        with metrics.api_call("milvus_insert"):
+            result = await client.insert(self.collection_name, rows)
+        print(f"Inserted {len(batch)} embeddings into Milvus")
+        return list(result["ids"])
+
+    async def asearch(self, query_embedding: List[float], top_k: int = 5) -> List[dict]:
+        """
+        Search for similar embeddings with the async Milvus client.
+
+        Args:
+            query_embedding: Query embedding vector
+            top_k: Number of results to return
+
+        Returns:
+            List of search results, formatted like search()
+        """
+        field_names = await to_thread(self._schema_field_names)
+        client = await self._async_client(load=True)
+        if client is None:
+            return await to_thread(self.search, query_embedding, top_k)
+
+        vector_field = "embedding" if "embedding" in field_names else "vector"
+        output_fields = [name for name in ["content", "file_path", "repository_url", "chunk_index"] if name in field_names]
+        consistency = {"consistency_level": self.consistency_level} if self.consistency_level else {}
+
+        with metrics.api_call("milvus_search"):
+            results = await client.search(
+                self.collection_name,
+                data=[query_embedding],
+                anns_field=vector_field,
+                limit=top_k,
+                output_fields=output_fields or None,
+                search_params={"metric_type": "L2", "params": {"nprobe": 10}},
+                **consistency
+            )
+
+        formatted_results = []
+        for hits in results:
+            for hit in hits:
+                entity = hit.get("entity", {})
+                formatted_results.append({
+                    "id": hit.get("id"),
+                    "distance": hit.get("distance"),
+                    "content": entity.get("content"),
+                    "file_path": entity.get("file_path"),
+                    "repository_url": entity.get("repository_url"),
+                    "chunk_index": entity.get("chunk_index")
+                })
+        return formatted_results
+
     def delete_collection(self) -> None:
         """Delete the collection."""
         if utility.has_collection(self.collection_name):
@@ -242,10 +471,13 @@ class MilvusVectorStore(IVectorStore):
 
     def get_existing_file_paths(self) -> set:
         """
-        Get set of file paths that already exist in the collection.
+        Get the files that already exist in the collection.
+
+        Relative paths such as README.md repeat across repositories, so
+        every file is named together with its repository.
 
         Returns:
-            Set of file paths already indexed
+            Set of (repository_url, file_path) pairs already indexed
         """
         if not self.collection_exists():
             return set()
@@ -260,12 +492,14 @@ class MilvusVectorStore(IVectorStore):
             # Get all entities
             query_result = self.collection.query(
                 expr="id > 0",
-                output_fields=["file_path"],
+                output_fields=["repository_url", "file_path"],
                 limit=16384  # Milvus limit
             )
 
-            file_paths = set([item.get("file_path") for item in query_result if item.get("file_path")])
-            return file_paths
+            return {
+                (item.get("repository_url", ""), item.get("file_path"))
+                for item in query_result if item.get("file_path")
+            }
         except Exception as e:
             print(f"Warning: Could not retrieve existing file paths: {str(e)}")
             return set()
@@ -1,25 +1,59 @@
 """Google Vision API service implementation."""
+import asyncio
 import os
-from typing import List
+from typing import Iterator, List, Optional
 from google.cloud import vision
 from google.oauth2 import service_account
 
 from interfaces import IVisionAnalyzer
+from services.vision_cache import VisionCache
+from services.image_preprocessor import ImagePreprocessor
+from services.perceptual_hash import PerceptualHashIndex, hamming_distance
+from services.metrics import metrics
+from services.async_utils import to_thread
 
 
 class GoogleVisionAnalyzer(IVisionAnalyzer):
     """Service for analyzing images and diagrams using Google Vision API."""
 
-    def __init__(self, credentials_path: str, max_results: int = 10):
+    # Maximum number of images per batch_annotate_images request
+    MAX_BATCH_SIZE = 16
+
+    # Features requested by analyze_image; also part of the cache key
+    FEATURE_TYPES = [
+        "LABEL_DETECTION",
+        "TEXT_DETECTION",
+        "DOCUMENT_TEXT_DETECTION",
+        "OBJECT_LOCALIZATION",
+        "LOGO_DETECTION",
+    ]
+
+    def __init__(
+        self,
+        credentials_path: str,
+        max_results: int = 10,
+        cache: Optional[VisionCache] = None,
+        preprocessor: Optional[ImagePreprocessor] = None,
+        phash_index: Optional[PerceptualHashIndex] = None,
+        max_concurrency: int = 8
+    ):
         """
         Initialize the Google Vision analyzer.
 
         Args:
             credentials_path: Path to Google Cloud credentials JSON file
             max_results: Maximum number of results to return from Vision API
+            cache: Optional persistent cache of summaries keyed by image content
+            preprocessor: Optional pre-processor that shrinks/converts images before upload
+            phash_index: Optional perceptual hash index used to reuse analyses of near-identical images
+            max_concurrency: Batch requests the async methods keep in flight at once
         """
         self.credentials_path = credentials_path
         self.max_results = max_results
+        self.cache = cache
+        self.preprocessor = preprocessor
+        self.phash_index = phash_index
+        self.max_concurrency = max(1, max_concurrency)
 
         # Set environment variable for Google credentials
         os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = credentials_path
@@ -29,6 +63,9 @@ class GoogleVisionAnalyzer(IVisionAnalyzer):
             credentials_path
         )
         self.client = vision.ImageAnnotatorClient(credentials=credentials)
+        self._credentials = credentials
+        # (event loop, ImageAnnotatorAsyncClient) - gRPC aio channels belong to one loop
+        self._async_state = None
 
     def analyze_image(self, image_path: str) -> str:
         """
@@ -41,49 +78,99 @@ class GoogleVisionAnalyzer(IVisionAnalyzer):
             Comprehensive description of the image
         """
         try:
-            with open(image_path, 'rb') as image_file:
-                content = image_file.read()
-
-            image = vision.Image(content=content)
-
-            # Perform multiple types of detection
-            response = self.client.annotate_image({
-                'image': image,
-                'features': [
-                    {'type_': vision.Feature.Type.LABEL_DETECTION, 'max_results': self.max_results},
-                    {'type_': vision.Feature.Type.TEXT_DETECTION},
-                    {'type_': vision.Feature.Type.DOCUMENT_TEXT_DETECTION},
-                    {'type_': vision.Feature.Type.OBJECT_LOCALIZATION, 'max_results': self.max_results},
-                    {'type_': vision.Feature.Type.LOGO_DETECTION, 'max_results': self.max_results},
-                ],
-            })
-
-            analysis_parts = []
-
-            # Add labels
-            if response.label_annotations:
-                labels = [label.description for label in response.label_annotations]
-                analysis_parts.append(f"Labels detected: {', '.join(labels)}")
-
-            # Add detected objects
-            if response.localized_object_annotations:
-                objects = [obj.name for obj in response.localized_object_annotations]
-                analysis_parts.append(f"Objects detected: {', '.join(objects)}")
-
-            # Add detected logos
-            if response.logo_annotations:
-                logos = [logo.description for logo in response.logo_annotations]
-                analysis_parts.append(f"Logos detected: {', '.join(logos)}")
-
-            # Add text content
-            if response.text_annotations:
-                text_content = response.text_annotations[0].description
-                analysis_parts.append(f"Text content:\n{text_content}")
+            response = self._annotate(self._load_payload(image_path))
+            self._raise_for_error(response)
+            return self._describe_response(response)
+        except Exception as e:
+            return f"{self.ERROR_PREFIX}{str(e)}"
+
+    def _read_image(self, image_path: str) -> bytes:
+        """Read the raw image content from disk."""
+        with open(image_path, 'rb') as image_file:
+            return image_file.read()
+
+    def _prepare(self, content: bytes, image_path: str) -> bytes:
+        """Apply pre-processing (if configured) to raw image content."""
+        if self.preprocessor:
+            return self.preprocessor.prepare(content, os.path.basename(image_path))
+        return content
+
+    def _load_payload(self, image_path: str) -> bytes:
+        """Read an image and return the bytes that are sent to the Vision API."""
+        return self._prepare(self._read_image(image_path), image_path)
+
+    def _annotate(self, content: bytes):
+        """Run all configured detections on an image in a single request."""
+        metrics.inc("rag_vision_upload_bytes_total", len(content))
+        with metrics.api_call("vision"):
+            return self.client.annotate_image(self._annotate_request(content))
+
+    def _annotate_request(self, content: bytes) -> dict:
+        """Build an annotate request for one image."""
+        return {
+            'image': vision.Image(content=content),
+            'features': self._features(),
+        }
+
+    @staticmethod
+    def _raise_for_error(response) -> None:
+        """Raise if the Vision API reported an error for this image."""
+        if response.error and response.error.message:
+            raise Exception(response.error.message)
+
+    @staticmethod
+    def _describe_response(response) -> str:
+        """Build the description of an image from its annotate response."""
+        analysis_parts = []
+
+        # Add labels
+        if response.label_annotations:
+            labels = [label.description for label in response.label_annotations]
+            analysis_parts.append(f"Labels detected: {', '.join(labels)}")
+
+        # Add detected objects
+        if response.localized_object_annotations:
+            objects = [obj.name for obj in response.localized_object_annotations]
+            analysis_parts.append(f"Objects detected: {', '.join(objects)}")
+
+        # Add detected logos
+        if response.logo_annotations:
+            logos = [logo.description for logo in response.logo_annotations]
+            analysis_parts.append(f"Logos detected: {', '.join(logos)}")
+
+        # Add text content
+        if response.text_annotations:
+            text_content = response.text_annotations[0].description
+            analysis_parts.append(f"Text content:\n{text_content}")
+
+        return "\n\n".join(analysis_parts) if analysis_parts else "No significant content detected."
+
+    def _summarize_response(self, response) -> str:
+        """
+        Build the cacheable summary body from an annotate response.
 
-            return "\n\n".join(analysis_parts) if analysis_parts else "No significant content detected."
+        OCR text comes from the DOCUMENT_TEXT_DETECTION result already in the
+        response, so no second API call is needed.
+        """
+        analysis = self._describe_response(response)
+        summary_parts = [analysis]
 
-        except Exception as e:
-            return f"Error analyzing image: {str(e)}"
+        # Add extracted text separately for better context
+        text = response.full_text_annotation.text if response.full_text_annotation else ""
+        if text and text not in analysis:
+            summary_parts.append(f"\n--- Extracted Text ---\n{text}")
+
+        return "\n".join(summary_parts)
+
+    def _features(self) -> List[dict]:
+        """Build the feature list for an annotate request."""
+        features = []
+        for feature_type in self.FEATURE_TYPES:
+            feature = {'type_': getattr(vision.Feature.Type, feature_type)}
+            if feature_type not in ("TEXT_DETECTION", "DOCUMENT_TEXT_DETECTION"):
+                feature['max_results'] = self.max_results
+            features.append(feature)
+        return features
 
     def extract_text_from_image(self, image_path: str) -> str:
         """
@@ -96,11 +183,10 @@ class GoogleVisionAnalyzer(IVisionAnalyzer):
             Extracted text
         """
         try:
-            with open(image_path, 'rb') as image_file:
-                content = image_file.read()
-
-            image = vision.Image(content=content)
-            response = self.client.document_text_detection(image=image)
+            content = self._load_payload(image_path)
+            metrics.inc("rag_vision_upload_bytes_total", len(content))
+            with metrics.api_call("vision"):
+                response = self.client.document_text_detection(image=vision.Image(content=content))
 
             if response.text_annotations:
                 return response.text_annotations[0].description
@@ -120,23 +206,258 @@ class GoogleVisionAnalyzer(IVisionAnalyzer):
         Returns:
             Comprehensive summary
         """
+        return self.generate_summaries([image_path])[0]
+
+    def generate_summaries(self, image_paths: List[str]) -> List[str]:
+        """
+        Generate summaries for several images with batched requests.
+
+        Cached images are answered from the cache, and near-duplicates of an
+        already analysed image (perceptual hash index) reuse its analysis;
+        the rest are sent in batch_annotate_images requests of up to
+        MAX_BATCH_SIZE images. An error for one image only affects that
+        image's summary.
+
+        Args:
+            image_paths: Paths to the image files
+
+        Returns:
+            Summaries in the same order as image_paths
+        """
+        bodies = [None] * len(image_paths)
+        aliases = {}
+        signature = self._signature()
+
+        for group in self._pending_groups(image_paths, bodies, aliases, signature):
+            self._annotate_batch(group, bodies, image_paths, signature)
+
+        return self._finish_summaries(image_paths, bodies, aliases)
+
+    async def agenerate_summary(self, image_path: str) -> str:
+        """
+        Generate a comprehensive summary of an image or diagram with the async client.
+
+        Args:
+            image_path: Path to the image file
+
+        Returns:
+            Comprehensive summary
+        """
+        return (await self.agenerate_summaries([image_path]))[0]
+
+    async def agenerate_summaries(self, image_paths: List[str]) -> List[str]:
+        """
+        Generate summaries for several images with concurrent batched requests.
+
+        Works like generate_summaries, but up to max_concurrency batch
+        requests are in flight at once on the async Vision client. Reading,
+        cache lookups and pre-processing run on a worker thread one batch
+        ahead of the requests, so at most max_concurrency batches of image
+        bytes are held. Near-duplicates are only matched against analyses
+        that have finished before their batch is prepared.
+
+        Args:
+            image_paths: Paths to the image files
+
+        Returns:
+            Summaries in the same order as image_paths
+        """
+        bodies = [None] * len(image_paths)
+        aliases = {}
+        signature = self._signature()
+        groups = self._pending_groups(image_paths, bodies, aliases, signature)
+        slots = asyncio.Semaphore(self.max_concurrency)
+        requests = []
+
+        async def annotate(group: List[tuple]) -> None:
+            try:
+                await self._aannotate_batch(group, bodies, image_paths, signature)
+            finally:
+                slots.release()
+
+        while True:
+            await slots.acquire()
+            group = await to_thread(next, groups, None)
+            if group is None:
+                slots.release()
+                break
+            requests.append(asyncio.create_task(annotate(group)))
+        await asyncio.gather(*requests)
+
+        return self._finish_summaries(image_paths, bodies, aliases)
+
+    def _signature(self) -> str:
+        """Analysis variant recorded with perceptual hash entries."""
+        variant = self.preprocessor.signature() if self.preprocessor else ""
+        return f"{','.join(self.FEATURE_TYPES)}|max_results={self.max_results}|{variant}"
+
+    def _pending_groups(
+        self,
+        image_paths: List[str],
+        bodies: List[Optional[str]],
+        aliases: dict,
+        signature: str
+    ) -> Iterator[List[tuple]]:
+        """
+        Yield (index, content, cache_key, phash) groups of images that need an API call.
+
+        Cached images and near-duplicates get their body (or an alias to
+        their leader) filled in directly; groups are yielded as soon as they
+        reach MAX_BATCH_SIZE so only one group of image bytes is held.
+        """
+        pending = []
+        variant = self.preprocessor.signature() if self.preprocessor else ""
+
+        for index, image_path in enumerate(image_paths):
+            try:
+                content = self._read_image(image_path)
+            except Exception as e:
+                bodies[index] = f"{self.ERROR_PREFIX}{str(e)}"
+                continue
+
+            cache_key = None
+            if self.cache:
+                # The analysis body depends only on the image content, so it is what gets
+                # cached; the file header is rebuilt for every path
+                cache_key = VisionCache.make_key(content, self.FEATURE_TYPES, self.max_results, variant=variant)
+                cached_body = self.cache.get(cache_key)
+                if cached_body is not None:
+                    bodies[index] = cached_body
+                    continue
+
+            phash = None
+            if self.phash_index:
+                phash = self.phash_index.hash_file(image_path, content)
+                if phash is not None:
+                    match = self.phash_index.find(phash, image_path, signature)
+                    if match:
+                        if match[0] != image_path:
+                            print(f"Reusing Vision analysis of {os.path.basename(match[0])} for near-duplicate {os.path.basename(image_path)}")
+                        bodies[index] = match[1]
+                        if cache_key:
+                            self.cache.put(cache_key, match[1])
+                        continue
+
+                    leader = next(
+                        (entry[0] for entry in pending
+                         if entry[3] is not None and hamming_distance(phash, entry[3]) <= self.phash_index.max_distance
+                         and self.phash_index.same_image(image_path, image_paths[entry[0]])),
+                        None
+                    )
+                    if leader is not None:
+                        aliases[index] = leader
+                        continue
+
+            try:
+                payload = self._prepare(content, image_path)
+            except Exception as e:
+                bodies[index] = f"{self.ERROR_PREFIX}{str(e)}"
+                continue
+
+            pending.append((index, payload, cache_key, phash))
+            # Send full batches as they fill up so only one batch of image bytes is held
+            if len(pending) == self.MAX_BATCH_SIZE:
+                yield pending
+                pending = []
+
+        if pending:
+            yield pending
+
+    def _finish_summaries(self, image_paths: List[str], bodies: List[Optional[str]], aliases: dict) -> List[str]:
+        """Resolve near-duplicate aliases and add the per-file headers."""
+        for index, leader in aliases.items():
+            bodies[index] = bodies[leader]
+
+        return [
+            "\n".join(self._summary_header(image_path) + [body])
+            for image_path, body in zip(image_paths, bodies)
+        ]
+
+    def _annotate_batch(
+        self,
+        group: List[tuple],
+        bodies: List[Optional[str]],
+        image_paths: List[str],
+        signature: str
+    ) -> None:
+        """Annotate a group of (index, content, cache_key, phash) images and fill in their summary bodies."""
+        try:
+            if len(group) == 1:
+                responses = [self._annotate(group[0][1])]
+            else:
+                metrics.inc("rag_vision_upload_bytes_total", sum(len(content) for _, content, _, _ in group))
+                with metrics.api_call("vision"):
+                    batch_response = self.client.batch_annotate_images(
+                        requests=[self._annotate_request(content) for _, content, _, _ in group]
+                    )
+                responses = list(batch_response.responses)
+        except Exception as e:
+            for index, _, _, _ in group:
+                bodies[index] = f"{self.ERROR_PREFIX}{str(e)}"
+            return
+
+        self._apply_responses(group, responses, bodies, image_paths, signature)
+
+    async def _aannotate_batch(
+        self,
+        group: List[tuple],
+        bodies: List[Optional[str]],
+        image_paths: List[str],
+        signature: str
+    ) -> None:
+        """Async variant of _annotate_batch using the async Vision client."""
+        try:
+            metrics.inc("rag_vision_upload_bytes_total", sum(len(content) for _, content, _, _ in group))
+            with metrics.api_call("vision"):
+                batch_response = await self._async_client().batch_annotate_images(
+                    requests=[self._annotate_request(content) for _, content, _, _ in group]
+                )
+            responses = list(batch_response.responses)
+        except Exception as e:
+            for index, _, _, _ in group:
+                bodies[index] = f"{self.ERROR_PREFIX}{str(e)}"
+            return
+
+        self._apply_responses(group, responses, bodies, image_paths, signature)
+
+    def _async_client(self):
+        """ImageAnnotatorAsyncClient for the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._async_state is None or self._async_state[0] is not loop:
+            self._async_state = (loop, vision.ImageAnnotatorAsyncClient(credentials=self._credentials))
+        return self._async_state[1]
+
+    def _apply_responses(
+        self,
+        group: List[tuple],
+        responses: list,
+        bodies: List[Optional[str]],
+        image_paths: List[str],
+        signature: str
+    ) -> None:
+        """Fill in summary bodies from annotate responses and remember them in the cache and hash index."""
+        for (index, _, cache_key, phash), response in zip(group, responses):
+            try:
+                self._raise_for_error(response)
+                body = self._summarize_response(response)
+            except Exception as e:
+                bodies[index] = f"{self.ERROR_PREFIX}{str(e)}"
+                continue
+
+            bodies[index] = body
+            if cache_key:
+                self.cache.put(cache_key, body)
+            if phash is not None:
+                self.phash_index.add(phash, image_paths[index], body, signature)
+
+    @staticmethod
+    def _summary_header(image_path: str) -> List[str]:
+        """Build the per-file header lines of a summary."""
         file_name = os.path.basename(image_path)
         file_extension = os.path.splitext(file_name)[1].lower()
 
-        summary_parts = [
+        return [
             f"File: {file_name}",
             f"Type: {file_extension}",
             f"\n--- Image Analysis ---"
         ]
-
-        # Get full analysis
-        analysis = self.analyze_image(image_path)
-        summary_parts.append(analysis)
-
-        # Add extracted text separately for better context
-        text = self.extract_text_from_image(image_path)
-        if text and text not in analysis:
-            summary_parts.append(f"\n--- Extracted Text ---\n{text}")
-
-        return "\n".join(summary_parts)
-
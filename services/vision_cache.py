@@ -0,0 +1,187 @@
+"""Disk-backed cache for Google Vision analysis results."""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Iterable, Optional
+
+
+class VisionCache:
+    """
+    Persistent cache of Vision summaries keyed by image content.
+
+    Entries are keyed by the SHA-256 of the image bytes combined with the
+    requested feature set and max_results, so renamed, moved or copied
+    images hit the same entry. The cache is a single SQLite file with
+    least-recently-used eviction once it grows beyond max_bytes.
+    """
+
+    def __init__(self, cache_path: str, max_bytes: int = 512 * 1024 * 1024):
+        """
+        Initialize the Vision cache.
+
+        Args:
+            cache_path: Path to the SQLite cache file
+            max_bytes: Maximum total size of cached summaries before eviction
+        """
+        self.cache_path = cache_path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        cache_dir = os.path.dirname(os.path.abspath(cache_path))
+        os.makedirs(cache_dir, exist_ok=True)
+
+        # Shared between the Vision worker threads, guarded by self._lock
+        self._connection = sqlite3.connect(cache_path, check_same_thread=False)
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS vision_cache (
+                cache_key TEXT PRIMARY KEY,
+                summary TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS idx_vision_cache_last_access ON vision_cache (last_access)"
+        )
+        self._connection.commit()
+
+    @staticmethod
+    def make_key(image_bytes: bytes, features: Iterable[str], max_results: int, variant: str = "") -> str:
+        """
+        Build the cache key for an image and request parameters.
+
+        Args:
+            image_bytes: Raw image content
+            features: Names of the requested Vision features
+            max_results: max_results used for the request
+            variant: Any other setting that changes the result (e.g. pre-processing)
+
+        Returns:
+            Hex digest identifying the image content and request
+        """
+        digest = hashlib.sha256(image_bytes)
+        digest.update(f"|features={','.join(sorted(features))}|max_results={max_results}".encode("utf-8"))
+        if variant:
+            digest.update(f"|variant={variant}".encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, cache_key: str) -> Optional[str]:
+        """
+        Look up a cached summary.
+
+        Args:
+            cache_key: Key returned by make_key
+
+        Returns:
+            Cached summary text, or None on a miss
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT summary FROM vision_cache WHERE cache_key = ?",
+                (cache_key,)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._connection.execute(
+                "UPDATE vision_cache SET last_access = ? WHERE cache_key = ?",
+                (time.time(), cache_key)
+            )
+            self._connection.commit()
+            return row[0]
+
+    def peek(self, cache_key: str) -> Optional[str]:
+        """Look up a cached summary without counting it or touching its LRU position."""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT summary FROM vision_cache WHERE cache_key = ?",
+                (cache_key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def put(self, cache_key: str, summary: str) -> None:
+        """
+        Store a summary and evict least-recently-used entries if over budget.
+
+        Args:
+            cache_key: Key returned by make_key
+            summary: Summary text to cache
+        """
+        size = len(summary.encode("utf-8"))
+        now = time.time()
+
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO vision_cache (cache_key, summary, size, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (cache_key, summary, size, now, now)
+            )
+            self._evict()
+            self._connection.commit()
+
+    def _evict(self) -> None:
+        """Delete least-recently-used entries until the cache fits in max_bytes."""
+        total = self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM vision_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        rows = self._connection.execute(
+            "SELECT cache_key, size FROM vision_cache ORDER BY last_access ASC"
+        ).fetchall()
+
+        evicted = []
+        for cache_key, size in rows:
+            if total <= self.max_bytes:
+                break
+            evicted.append((cache_key,))
+            total -= size
+
+        self._connection.executemany("DELETE FROM vision_cache WHERE cache_key = ?", evicted)
+        self.evictions += len(evicted)
+
+    def stats(self) -> dict:
+        """
+        Get cache statistics for this session.
+
+        Returns:
+            Dictionary with hits, misses, hit rate, evictions, entries and size in bytes
+        """
+        with self._lock:
+            entries, total = self._connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM vision_cache"
+            ).fetchone()
+
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": entries,
+            "size_bytes": total
+        }
+
+    def print_stats(self) -> None:
+        """Print cache statistics."""
+        stats = self.stats()
+        print("\n📦 Vision Cache:")
+        print(f"   - Hits: {stats['hits']} / Misses: {stats['misses']} (hit rate {stats['hit_rate']:.0%})")
+        print(f"   - Entries: {stats['entries']} ({stats['size_bytes'] / (1024 * 1024):.1f} MB)")
+        if stats["evictions"]:
+            print(f"   - Evicted: {stats['evictions']}")
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,95 @@
+"""Partial clones of GitHubRepositoryReader only download the blobs matching the include globs."""
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from services.repository_reader import GitHubRepositoryReader
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+
+GIT_IDENTITY = ["-c", "user.name=Test", "-c", "user.email=test@example.com"]
+
+
+def git(cwd, *args):
+    """Run a git command and return its stdout."""
+    return subprocess.run(
+        ["git", *GIT_IDENTITY, *args], cwd=cwd, check=True, capture_output=True, text=True
+    ).stdout.strip()
+
+
+def commit_file(work_dir, relative_path, content, message):
+    """Write a file, commit it and push the commit to the bare origin."""
+    path = os.path.join(work_dir, relative_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(content)
+    git(work_dir, "add", relative_path)
+    git(work_dir, "commit", "-q", "-m", message)
+    git(work_dir, "push", "-q", "origin", "HEAD:main")
+
+
+def missing_objects(repo_path):
+    """Objects reachable from HEAD that are not in the clone (listed without fetching them)."""
+    output = git(repo_path, "rev-list", "--objects", "--missing=print", "HEAD")
+    return {line[1:] for line in output.splitlines() if line.startswith("?")}
+
+
+@pytest.fixture
+def origin(tmp_path):
+    """Bare repository serving filtered clones, with a markdown file and a large binary."""
+    bare = tmp_path / "origin.git"
+    work = tmp_path / "work"
+    git(tmp_path, "init", "-q", "--bare", "--initial-branch=main", str(bare))
+    git(bare, "config", "uploadpack.allowFilter", "true")
+    git(tmp_path, "clone", "-q", str(bare), str(work))
+
+    commit_file(str(work), "docs/README.md", b"# Project\n\nFirst version.\n", "Add readme")
+    commit_file(str(work), "assets/model.bin", os.urandom(2 * 1024 * 1024), "Add binary")
+    return {"url": f"file://{bare}", "work": str(work)}
+
+
+def test_partial_clone_skips_binary_blobs(origin, tmp_path):
+    reader = GitHubRepositoryReader(cache_dir=str(tmp_path / "cache"), partial_clone=True)
+    repo_path = reader.clone_repository(origin["url"])
+
+    binary_sha = git(origin["work"], "rev-parse", "HEAD:assets/model.bin")
+    readme_sha = git(origin["work"], "rev-parse", "HEAD:docs/README.md")
+    missing = missing_objects(repo_path)
+    assert binary_sha in missing
+    assert readme_sha not in missing
+    assert not os.path.exists(os.path.join(repo_path, "assets", "model.bin"))
+
+    documents = reader.get_markdown_files(repo_path)
+    assert [document.file_path for document in documents] == ["docs/README.md"]
+    assert documents[0].repository_url == origin["url"]
+    # Listing and reading markdown must not have fetched the binary lazily
+    assert binary_sha in missing_objects(repo_path)
+
+
+def test_diff_between_cached_commits(origin, tmp_path):
+    reader = GitHubRepositoryReader(cache_dir=str(tmp_path / "cache"), partial_clone=True)
+    repo_path = reader.clone_repository(origin["url"])
+    first_commit = reader.head_commit(repo_path)
+    binary_sha = git(origin["work"], "rev-parse", "HEAD:assets/model.bin")
+
+    commit_file(origin["work"], "docs/README.md", b"# Project\n\nSecond version.\n", "Update readme")
+    commit_file(origin["work"], "docs/guide.md", b"# Guide\n", "Add guide")
+    commit_file(origin["work"], "assets/model.bin", os.urandom(1024 * 1024), "Update binary")
+    git(origin["work"], "rm", "-q", "docs/README.md")
+    git(origin["work"], "commit", "-q", "-m", "Remove readme")
+    git(origin["work"], "push", "-q", "origin", "HEAD:main")
+
+    assert reader.clone_repository(origin["url"]) == repo_path
+    assert reader.head_commit(repo_path) == git(origin["work"], "rev-parse", "HEAD")
+
+    changed, deleted = reader.diff_markdown_files(repo_path, first_commit)
+    assert changed == ["docs/guide.md"]
+    assert deleted == ["docs/README.md"]
+
+    new_binary_sha = git(origin["work"], "rev-parse", "HEAD:assets/model.bin")
+    missing = missing_objects(repo_path)
+    assert new_binary_sha in missing
+    assert binary_sha not in git(repo_path, "cat-file", "--batch-all-objects", "--batch-check")
+    assert [document.file_path for document in reader.get_markdown_files(repo_path)] == ["docs/guide.md"]
@@ -1,5 +1,7 @@
 """Workflows package."""
 from .rag_workflow import RAGWorkflow, RAGState
+from .streaming_pipeline import StreamingPipeline, PipelineResult
+from .document_ingestor import DocumentIngestor
 
-__all__ = ["RAGWorkflow", "RAGState"]
+__all__ = ["RAGWorkflow", "RAGState", "StreamingPipeline", "PipelineResult", "DocumentIngestor"]
 
@@ -0,0 +1,91 @@
+"""Bisect failing embedding batches down to the inputs that poison them."""
+from typing import Dict, List, Tuple
+
+from models import ChunkBatch
+from interfaces import IEmbeddingService
+
+# Chunks per embeddings request of services that do not say (AzureOpenAIEmbeddingService.BATCH_SIZE)
+DEFAULT_REQUEST_CHUNKS = 16
+
+
+def _is_input_error(error: Exception) -> bool:
+    # HTTP 400 (openai.BadRequestError): the inputs were rejected, e.g. too many tokens or filtered content
+    return getattr(error, "status_code", None) == 400
+
+
+def _requests(embedding_service: IEmbeddingService, batch: ChunkBatch) -> List[ChunkBatch]:
+    size = max(1, getattr(embedding_service, "BATCH_SIZE", DEFAULT_REQUEST_CHUNKS))
+    return [batch.slice(start, min(start + size, len(batch))) for start in range(0, len(batch), size)]
+
+
+def _halves(part: ChunkBatch) -> Tuple[ChunkBatch, ChunkBatch]:
+    middle = len(part) // 2
+    return part.slice(0, middle), part.slice(middle, len(part))
+
+
+def _merge(parts: List[Tuple[List[ChunkBatch], Dict[str, str]]]) -> Tuple[List[ChunkBatch], Dict[str, str]]:
+    embedded, failed = [], {}
+    for part_embedded, part_failed in parts:
+        embedded.extend(part_embedded)
+        failed.update(part_failed)
+    return embedded, failed
+
+
+def _finish(embedded: List[ChunkBatch], failed: Dict[str, str]) -> Tuple[ChunkBatch, Dict[str, str]]:
+    # A file is stored completely or not at all
+    return ChunkBatch.concat(embedded).without_files(set(failed)), failed
+
+
+def embed_bisecting(embedding_service: IEmbeddingService, batch: ChunkBatch) -> Tuple[ChunkBatch, Dict[str, str]]:
+    """
+    Embed a batch, isolating the chunks whose input makes the request fail.
+
+    Only input errors (HTTP 400, e.g. openai.BadRequestError for too long
+    or filtered content) are bisected: the batch is embedded again one
+    request at a time, and a rejected request is split in half down to
+    single chunks, so poisoned inputs only cost their own files. Any other
+    error (connection, authentication, rate limit, server error) is
+    systemic and raised right away, as without bisection.
+
+    Returns:
+        (embedded chunks of all files that succeeded, failed file path -> reason)
+    """
+    def run(part: ChunkBatch) -> Tuple[List[ChunkBatch], Dict[str, str]]:
+        try:
+            return [embedding_service.embed_batch(part)], {}
+        except Exception as e:
+            if not _is_input_error(e):
+                raise
+            if len(part) == 1:
+                return [], {part.file_paths[0]: str(e)}
+            return _merge([run(half) for half in _halves(part)])
+
+    try:
+        return _finish([embedding_service.embed_batch(batch)], {})
+    except Exception as e:
+        if not _is_input_error(e):
+            raise
+    return _finish(*_merge([run(request) for request in _requests(embedding_service, batch)]))
+
+
+async def aembed_bisecting(
+    embedding_service: IEmbeddingService,
+    batch: ChunkBatch
+) -> Tuple[ChunkBatch, Dict[str, str]]:
+    """Async variant of embed_bisecting using aembed_batch."""
+    async def run(part: ChunkBatch) -> Tuple[List[ChunkBatch], Dict[str, str]]:
+        try:
+            return [await embedding_service.aembed_batch(part)], {}
+        except Exception as e:
+            if not _is_input_error(e):
+                raise
+            if len(part) == 1:
+                return [], {part.file_paths[0]: str(e)}
+            return _merge([await run(half) for half in _halves(part)])
+
+    try:
+        return _finish([await embedding_service.aembed_batch(batch)], {})
+    except Exception as e:
+        if not _is_input_error(e):
+            raise
+    return _finish(*_merge([await run(request) for request in _requests(embedding_service, batch)]))
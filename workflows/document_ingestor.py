@@ -0,0 +1,179 @@
+"""Synchronous upsert of single documents (API server)."""
+import hashlib
+import os
+import threading
+import time
+from typing import List, Optional
+
+from models import Document, DocumentType
+from interfaces import IDocumentChunker, IEmbeddingService, IVectorStore, ILocalFileReader
+from services.ingestion_manifest import IngestionManifest, hash_file
+from services.metrics import metrics
+
+
+class DocumentIngestor:
+    """
+    Upserts one document at a time through the pipeline's services.
+
+    Backs the API server's /api/documents endpoints. A posted text, or
+    an uploaded file read with the LocalFileReader, is chunked, embedded
+    and inserted within the request. There is no clone, directory scan or
+    batch run. Documents are stored with repository_url "api".
+
+    With a manifest, posting a document again replaces its chunks. The new
+    chunks are inserted before the old ones are deleted. An identical
+    document is not embedded again. Without a manifest, the old chunks are
+    deleted by file path before the insert.
+    """
+
+    # Manifest source and repository_url of documents ingested through the API
+    SOURCE = "api"
+    # Uploads with these extensions are indexed as markdown text
+    TEXT_EXTENSIONS = {'.md', '.markdown', '.txt'}
+
+    def __init__(
+        self,
+        document_chunker: IDocumentChunker,
+        embedding_service: IEmbeddingService,
+        vector_store: IVectorStore,
+        local_file_reader: Optional[ILocalFileReader] = None,
+        manifest: Optional[IngestionManifest] = None
+    ):
+        """
+        Initialize the document ingestor.
+
+        Args:
+            document_chunker: Service for chunking documents
+            embedding_service: Service for creating embeddings
+            vector_store: Service for storing embeddings
+            local_file_reader: Optional reader for uploaded images, diagrams and documents
+            manifest: Optional ingestion manifest recording the chunk ids of every document
+        """
+        self.document_chunker = document_chunker
+        self.embedding_service = embedding_service
+        self.vector_store = vector_store
+        self.local_file_reader = local_file_reader
+        self.manifest = manifest
+        # Upserts of the same file must not interleave their delete/insert pairs
+        self._lock = threading.Lock()
+        self._collection_ready = False
+
+    def ingest_text(self, file_path: str, text: str) -> dict:
+        """
+        Upsert a markdown/plain text document.
+
+        Args:
+            file_path: Identifier stored as the chunks' file_path (e.g. "design/payments.md")
+            text: Document content
+
+        Returns:
+            Outcome with file_path, status ("created", "replaced" or "unchanged"), chunks and seconds
+        """
+        document = Document(
+            content=text,
+            file_path=file_path,
+            repository_url=self.SOURCE,
+            document_type=DocumentType.MARKDOWN,
+            metadata={"source": "api"}
+        )
+        return self._upsert(file_path, [document], hashlib.sha256(text.encode("utf-8")).hexdigest())
+
+    def ingest_file(self, file_path: str, disk_path: str) -> dict:
+        """
+        Upsert an uploaded file.
+
+        Args:
+            file_path: Identifier stored as the chunks' file_path
+            disk_path: Where the upload was saved; its extension selects the reader
+
+        Returns:
+            Outcome like ingest_text
+
+        Raises:
+            ValueError: If the file type is not supported, the file is larger than the
+                        reader's limit for its type or it cannot be read
+        """
+        extension = os.path.splitext(disk_path)[1].lower()
+        if extension in self.TEXT_EXTENSIONS:
+            with open(disk_path, 'r', encoding='utf-8', errors='replace') as f:
+                return self.ingest_text(file_path, f.read())
+
+        if not self.local_file_reader:
+            raise ValueError("File uploads other than text need local file processing (PROCESS_LOCAL_FILES=true)")
+        size_limit = self.local_file_reader.size_limit(disk_path)
+        size = os.path.getsize(disk_path)
+        if size_limit and size > size_limit:
+            raise ValueError(
+                f"{file_path} is {size / 1024 / 1024:.1f} MB, above the {size_limit / 1024 / 1024:g} MB limit of its file type"
+            )
+        documents = self.local_file_reader.read_file_documents(disk_path)
+        if not documents:
+            raise ValueError(f"Unsupported file type: {extension or 'none'}")
+        errors = [document.metadata["error"] for document in documents if document.metadata.get("error")]
+        if errors:
+            raise ValueError(f"Could not read {file_path}: {errors[0]}")
+
+        for document in documents:
+            document.file_path = file_path
+            document.repository_url = self.SOURCE
+        return self._upsert(file_path, documents, hash_file(disk_path))
+
+    def delete(self, file_path: str) -> int:
+        """
+        Delete the chunks of a document ingested through the API.
+
+        Returns:
+            Number of deleted chunks (0 if the document is unknown)
+        """
+        with self._lock:
+            if not self.manifest:
+                return self.vector_store.delete_by_file_paths([file_path], self.SOURCE)
+
+            chunk_ids, _ = self.manifest.chunk_ids(self.SOURCE, [file_path])
+            self.vector_store.delete_chunks(chunk_ids)
+            self.manifest.remove(self.SOURCE, [file_path])
+            return len(chunk_ids)
+
+    def _upsert(self, file_path: str, documents: List[Document], content_hash: str) -> dict:
+        """Chunk, embed and store documents of one file, replacing its previous chunks."""
+        started = time.perf_counter()
+        with self._lock, metrics.timer("rag_stage_seconds", stage="api_document"):
+            changes = None
+            status = "created"
+            if self.manifest:
+                changes = self.manifest.compute_changes(
+                    self.SOURCE, {file_path: file_path}, content_hashes={file_path: content_hash}, deleted=[]
+                )
+                if file_path in changes.unchanged:
+                    return self._outcome(file_path, "unchanged", 0, started)
+                if file_path in changes.modified:
+                    status = "replaced"
+
+            chunk_batch = self.document_chunker.chunk_documents_to_batch(documents)
+            chunk_batch = self.embedding_service.embed_batch(chunk_batch)
+            if not self._collection_ready:
+                self.vector_store.initialize_or_load_collection()
+                self._collection_ready = True
+
+            if changes is None:
+                self.vector_store.delete_by_file_paths([file_path], self.SOURCE)
+            chunk_ids = self.vector_store.insert_batch(chunk_batch) if len(chunk_batch) else []
+
+            if changes is not None:
+                # Documents posted through the API always have their chunk ids recorded
+                stale_ids, _ = self.manifest.chunk_ids(self.SOURCE, changes.modified)
+                self.vector_store.delete_chunks(stale_ids)
+                self.manifest.record(self.SOURCE, file_path, changes.fingerprints[file_path], chunk_ids)
+
+        metrics.inc("rag_stage_items_total", len(chunk_batch), stage="api_document")
+        return self._outcome(file_path, status, len(chunk_batch), started)
+
+    @staticmethod
+    def _outcome(file_path: str, status: str, chunks: int, started: float) -> dict:
+        """Response body of an upsert."""
+        return {
+            "file_path": file_path,
+            "status": status,
+            "chunks": chunks,
+            "seconds": round(time.perf_counter() - started, 3)
+        }
@@ -0,0 +1,378 @@
+"""Dry run: size a run (files, chunks, tokens, API calls, wall time) without calling or writing anything."""
+import json
+import math
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from models import Document
+from interfaces import IRepositoryReader, IDocumentChunker, ILocalFileReader, IVisionAnalyzer
+from services.ingestion_manifest import IngestionManifest
+from services.vision_analyzer import GoogleVisionAnalyzer
+from services.vision_cache import VisionCache
+from .sharding import ShardSpec
+
+try:
+    import tiktoken
+except ImportError:
+    # Token counts fall back to an estimate of four characters per token
+    tiktoken = None
+
+
+# Seconds per API call used when no run report with recorded latencies exists yet
+DEFAULT_API_LATENCIES = {
+    "embeddings": 0.5,
+    "vision": 2.0,
+    "milvus_insert": 0.5,
+}
+
+# Texts per embeddings request and images per Vision request, as sent by the services
+EMBEDDING_REQUEST_TEXTS = 16
+VISION_REQUEST_IMAGES = GoogleVisionAnalyzer.MAX_BATCH_SIZE
+
+
+def load_api_latencies(report_path: str) -> Dict[str, tuple]:
+    """
+    Average latency per API from the last run report.
+
+    Returns:
+        API name -> (seconds per call, "recorded" or "default")
+    """
+    latencies = {api: (seconds, "default") for api, seconds in DEFAULT_API_LATENCIES.items()}
+    try:
+        with open(report_path, 'r', encoding='utf-8') as f:
+            apis = json.load(f).get("apis", {})
+    except (OSError, ValueError):
+        return latencies
+
+    for api in latencies:
+        stats = apis.get(api) or {}
+        if stats.get("calls") and stats.get("latency_avg_seconds"):
+            latencies[api] = (stats["latency_avg_seconds"], "recorded")
+    return latencies
+
+
+class DryRunVisionAnalyzer(IVisionAnalyzer):
+    """
+    Vision analyzer stub that counts the images a run would send.
+
+    Images found in the Vision cache count as cache hits and return the
+    cached summary (read without touching the cache); every other image
+    would cost an API call and gets a short placeholder summary instead.
+    """
+
+    def __init__(self, cache: Optional[VisionCache] = None, max_results: int = 10, variant: str = ""):
+        """
+        Initialize the stub analyzer.
+
+        Args:
+            cache: Optional Vision cache consulted read-only
+            max_results: max_results of the real analyzer (part of the cache key)
+            variant: Pre-processing signature of the real analyzer (part of the cache key)
+        """
+        self.cache = cache
+        self.max_results = max_results
+        self.variant = variant
+        self.images = 0
+        self.cached = 0
+        self._lock = threading.Lock()
+
+    def _summary(self, image_path: str) -> str:
+        cached_body = None
+        if self.cache:
+            try:
+                with open(image_path, 'rb') as f:
+                    content = f.read()
+                cache_key = VisionCache.make_key(
+                    content, GoogleVisionAnalyzer.FEATURE_TYPES, self.max_results, variant=self.variant
+                )
+                cached_body = self.cache.peek(cache_key)
+            except OSError:
+                pass
+
+        with self._lock:
+            self.images += 1
+            if cached_body is not None:
+                self.cached += 1
+        if cached_body is not None:
+            return cached_body
+        return f"Image: {os.path.basename(image_path)} (dry run - Vision API not called)"
+
+    def analyze_image(self, image_path: str) -> str:
+        return self._summary(image_path)
+
+    def extract_text_from_image(self, image_path: str) -> str:
+        return ""
+
+    def generate_summary(self, image_path: str) -> str:
+        return self._summary(image_path)
+
+    def generate_summaries(self, image_paths: List[str]) -> List[str]:
+        return [self._summary(image_path) for image_path in image_paths]
+
+    async def agenerate_summary(self, image_path: str) -> str:
+        return self._summary(image_path)
+
+    async def agenerate_summaries(self, image_paths: List[str]) -> List[str]:
+        return self.generate_summaries(image_paths)
+
+
+@dataclass
+class DryRunReport:
+    """What a run would read, embed and store, and how long it would take."""
+    # File type -> files that would be read
+    files_by_type: Dict[str, int] = field(default_factory=dict)
+    unchanged_files: int = 0
+    deleted_files: int = 0
+    documents: int = 0
+    chunks: int = 0
+    tokens: int = 0
+    # False when tiktoken was unavailable and tokens were estimated from characters
+    tokens_exact: bool = True
+    images: int = 0
+    cached_images: int = 0
+    embedding_requests: int = 0
+    vision_requests: int = 0
+    milvus_insert_calls: int = 0
+    # Seconds the dry run itself spent cloning, listing, reading and chunking
+    read_seconds: float = 0.0
+    # Stage -> estimated seconds, plus "total"
+    estimates: Dict[str, float] = field(default_factory=dict)
+    # API -> (seconds per call, "recorded" or "default")
+    latencies: Dict[str, tuple] = field(default_factory=dict)
+    notes: List[str] = field(default_factory=list)
+
+    def print_summary(self) -> None:
+        """Print the plan."""
+        print(f"\n{'='*60}")
+        print("Dry run (nothing was embedded, stored or sent to Vision)")
+        print(f"{'='*60}")
+        print(f"Files to process: {sum(self.files_by_type.values())}")
+        for file_type, count in sorted(self.files_by_type.items()):
+            print(f"  - {file_type}: {count}")
+        print(f"Unchanged: {self.unchanged_files}, deleted: {self.deleted_files}")
+        print(f"Documents: {self.documents}")
+        print(f"Chunks (Milvus rows): {self.chunks}")
+        print(f"Embedding tokens: {self.tokens}" + ("" if self.tokens_exact else " (approximate)"))
+        print(f"Vision images: {self.images} ({self.cached_images} cached)")
+        print(f"\nAPI calls:")
+        print(f"  - Embedding requests: {self.embedding_requests}")
+        print(f"  - Vision batch requests: {self.vision_requests}")
+        print(f"  - Milvus inserts: {self.milvus_insert_calls}")
+        print(f"\nEstimated wall time:")
+        for stage, seconds in self.estimates.items():
+            print(f"  - {stage}: {seconds:.1f}s")
+        for api, (seconds, origin) in self.latencies.items():
+            print(f"    {api}: {seconds * 1000:.0f} ms per call ({origin})")
+        for note in self.notes:
+            print(f"Note: {note}")
+        print(f"{'='*60}\n")
+
+
+class DryRunPlanner:
+    """
+    Runs discovery, change detection and chunking without side effects.
+
+    Repositories are cloned (or their cached clones fetched) and files are
+    read and chunked for real, so counts match what a run would produce;
+    Vision is replaced by DryRunVisionAnalyzer, the manifest is only read,
+    and the embedding service and Milvus are never used. API time is
+    estimated from the latencies of the last run report.
+    """
+
+    def __init__(
+        self,
+        repository_reader: IRepositoryReader,
+        document_chunker: IDocumentChunker,
+        local_file_reader: Optional[ILocalFileReader] = None,
+        vision_analyzer: Optional[DryRunVisionAnalyzer] = None,
+        manifest: Optional[IngestionManifest] = None,
+        embedding_model: str = "text-embedding-ada-002",
+        shard: Optional[ShardSpec] = None
+    ):
+        """
+        Initialize the dry run planner.
+
+        Args:
+            repository_reader: Service for reading repositories
+            document_chunker: Service for chunking documents
+            local_file_reader: Optional local file reader, built with vision_analyzer
+            vision_analyzer: Stub analyzer the local file reader uses
+            manifest: Optional ingestion manifest used for change detection (read-only)
+            embedding_model: Model whose tokenizer counts the tokens
+            shard: Optional shard; only its files are counted
+        """
+        self.repository_reader = repository_reader
+        self.document_chunker = document_chunker
+        self.local_file_reader = local_file_reader
+        self.vision_analyzer = vision_analyzer
+        self.manifest = manifest
+        self.embedding_model = embedding_model
+        self.shard = shard
+
+    def plan(
+        self,
+        repository_urls: List[str],
+        local_data_dir: str = "",
+        process_local_files: bool = False,
+        skip_existing_documents: bool = True,
+        force_reprocess: bool = False
+    ) -> DryRunReport:
+        """
+        Work out what a run over these sources would process.
+
+        Args:
+            repository_urls: URLs of the repositories to process
+            local_data_dir: Path to local data directory
+            process_local_files: Whether to process local files
+            skip_existing_documents: Skip documents already indexed
+            force_reprocess: Force reprocessing of all documents
+
+        Returns:
+            DryRunReport with counts; call estimate() to add wall time estimates
+        """
+        report = DryRunReport()
+        full_reindex = force_reprocess or not skip_existing_documents
+        if skip_existing_documents and not force_reprocess and not self.manifest:
+            report.notes.append("Milvus is not consulted, so files already in the collection are counted too")
+
+        started = time.perf_counter()
+        documents: List[Document] = []
+        for repository_url in dict.fromkeys(repository_urls):
+            if repository_url.strip():
+                documents.extend(self._repository_documents(repository_url, full_reindex, report))
+        if process_local_files and self.local_file_reader and local_data_dir:
+            documents.extend(self._local_documents(local_data_dir, full_reindex, report))
+
+        batch = self.document_chunker.chunk_documents_to_batch(documents)
+        report.read_seconds = time.perf_counter() - started
+
+        for file_type, file_paths in self._files_by_type(documents).items():
+            report.files_by_type[file_type] = len(file_paths)
+        report.documents = len(documents)
+        report.chunks = len(batch)
+        report.tokens, report.tokens_exact = self._count_tokens(batch.contents)
+        if not report.tokens_exact:
+            report.notes.append("tiktoken is unavailable; tokens are estimated at four characters per token")
+        if self.vision_analyzer:
+            report.images = self.vision_analyzer.images
+            report.cached_images = self.vision_analyzer.cached
+        return report
+
+    def _repository_documents(self, repository_url: str, full_reindex: bool, report: DryRunReport) -> List[Document]:
+        """Markdown documents of a repository that a run would read."""
+        repo_path = self.repository_reader.clone_repository(repository_url)
+        try:
+            blobs = self.repository_reader.list_markdown_blobs(repo_path)
+            file_paths = sorted(blobs) if blobs is not None else self.repository_reader.list_markdown_files(repo_path)
+            file_paths = self._changed_files(
+                repository_url, {file_path: os.path.join(repo_path, file_path) for file_path in file_paths},
+                blobs, full_reindex, report
+            )
+            return self.repository_reader.get_markdown_files(repo_path, file_paths)
+        finally:
+            self.repository_reader.cleanup(repo_path)
+
+    def _local_documents(self, local_dir: str, full_reindex: bool, report: DryRunReport) -> List[Document]:
+        """Local documents a run would read, with Vision summaries stubbed."""
+        file_paths = self.local_file_reader.list_files(local_dir)
+        file_paths = self._changed_files(
+            f"local:{local_dir}", {file_path: file_path for file_path in file_paths}, None, full_reindex, report
+        )
+        return self.local_file_reader.read_files(file_paths)
+
+    def _changed_files(
+        self,
+        source: str,
+        files: Dict[str, str],
+        content_hashes: Optional[Dict[str, str]],
+        full_reindex: bool,
+        report: DryRunReport
+    ) -> List[str]:
+        """Files of a source that the manifest does not have in their current version."""
+        root = source[len("local:"):] if source.startswith("local:") else ""
+        if self.shard:
+            files = {file_path: files[file_path] for file_path in self.shard.select(files, root)}
+        if not self.manifest:
+            return sorted(files)
+        changes = self.manifest.compute_changes(
+            source, files, content_hashes=content_hashes, force=full_reindex, refresh_stats=False
+        )
+        deleted = self.shard.select(changes.deleted, root) if self.shard else changes.deleted
+        report.unchanged_files += len(changes.unchanged)
+        report.deleted_files += len(deleted)
+        return changes.to_process
+
+    @staticmethod
+    def _files_by_type(documents: List[Document]) -> Dict[str, set]:
+        """File paths per document type (a spreadsheet yields one document per sheet)."""
+        files: Dict[str, set] = {}
+        for document in documents:
+            files.setdefault(document.document_type.value, set()).add(document.file_path)
+        return files
+
+    def _count_tokens(self, texts: List[str]) -> tuple:
+        """Total tokens of the texts and whether the count is exact."""
+        # The embedding service sends chunks with newlines replaced by spaces
+        texts = [text.replace("\n", " ") for text in texts]
+        encoding = None
+        if tiktoken is not None:
+            try:
+                try:
+                    encoding = tiktoken.encoding_for_model(self.embedding_model)
+                except KeyError:
+                    # Azure deployment names are not model names
+                    encoding = tiktoken.get_encoding("cl100k_base")
+            except Exception as e:
+                # The encoding files are downloaded on first use
+                print(f"Warning: Could not load tiktoken encoding: {str(e)}")
+
+        if encoding is None:
+            return sum(math.ceil(len(text) / 4) for text in texts), False
+        return sum(len(tokens) for tokens in encoding.encode_ordinary_batch(texts)), True
+
+
+def estimate(
+    report: DryRunReport,
+    latencies: Dict[str, tuple],
+    streaming: bool = False,
+    embed_concurrency: int = 1,
+    vision_concurrency: int = 1,
+    insert_batch_chunks: int = 0
+) -> DryRunReport:
+    """
+    Add API call counts and wall time estimates to a dry run report.
+
+    Args:
+        report: Report from DryRunPlanner.plan
+        latencies: API name -> (seconds per call, origin), see load_api_latencies
+        streaming: Whether stages overlap (streaming mode) or run one after the other
+        embed_concurrency: Embedding requests in flight at once
+        vision_concurrency: Vision batch requests in flight at once
+        insert_batch_chunks: Rows per Milvus insert (0 = one insert per run)
+
+    Returns:
+        The same report
+    """
+    uncached = report.images - report.cached_images
+    report.vision_requests = math.ceil(uncached / VISION_REQUEST_IMAGES)
+    report.embedding_requests = math.ceil(report.chunks / EMBEDDING_REQUEST_TEXTS)
+    if not report.chunks:
+        report.milvus_insert_calls = 0
+    elif insert_batch_chunks:
+        report.milvus_insert_calls = math.ceil(report.chunks / insert_batch_chunks)
+    else:
+        report.milvus_insert_calls = 1
+    report.latencies = latencies
+
+    read = report.read_seconds + (
+        math.ceil(report.vision_requests / max(1, vision_concurrency)) * latencies["vision"][0]
+    )
+    embed = math.ceil(report.embedding_requests / max(1, embed_concurrency)) * latencies["embeddings"][0]
+    store = report.milvus_insert_calls * latencies["milvus_insert"][0]
+    report.estimates = {"read + vision": read, "embed": embed, "store": store}
+    # Streaming overlaps the stages, so the slowest one sets the pace
+    report.estimates["total"] = max(read, embed, store) if streaming else read + embed + store
+    return report
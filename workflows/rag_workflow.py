@@ -1,9 +1,41 @@
 """LangGraph workflow for the RAG pipeline."""
-from typing import TypedDict, List, Optional
-from langgraph.graph import StateGraph, END
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict, TypedDict, List, Optional, Tuple
+from typing_extensions import Annotated
+from langchain_core.runnables import RunnableLambda
+from langgraph.graph import StateGraph, START, END
 
-from models import Document, Chunk, EmbeddedChunk
+from models import Document, ChunkBatch
 from interfaces import IRepositoryReader, IDocumentChunker, IEmbeddingService, IVectorStore, ILocalFileReader
+from services.ingestion_manifest import IngestionManifest, ChangeSet
+from services.local_file_reader import LocalFileReader
+from services.checkpoint_journal import CheckpointJournal
+from services.dead_letter_store import DeadLetterStore
+from services.metrics import metrics
+from services.async_utils import to_thread
+from .batch_bisection import embed_bisecting, aembed_bisecting
+from .streaming_pipeline import StreamingPipeline
+from .sharding import ShardSpec
+
+
+class Appended(list):
+    """List update that the RAGState reducers append to the current value instead of replacing it."""
+
+
+def append_or_replace(current: list, update: list) -> list:
+    """
+    Reducer of the list fields that parallel branches write.
+
+    Branches return their own items as Appended, which are added to what
+    the other branch produced; nodes that return the whole state hand
+    back a plain list, which replaces the value (e.g. after filtering).
+    """
+    if isinstance(update, Appended):
+        return list(current or []) + list(update)
+    return update
 
 
 class RAGState(TypedDict):
@@ -14,26 +46,64 @@ class RAGState(TypedDict):
     process_local_files: bool
     skip_existing_documents: bool
     force_reprocess: bool
-    documents: List[Document]
-    chunks: List[Chunk]
-    embedded_chunks: List[EmbeddedChunk]
+    # Merged from the repository and local-files branches, which run concurrently
+    documents: Annotated[List[Document], append_or_replace]
+    chunk_batch: ChunkBatch
     error: str
     status: str
+    # (repository_url, file_path) pairs already in the vector store
     existing_file_paths: set
+    # Chunks stored before documents carried their repository URL belong to this run's repository
+    owns_legacy_rows: bool
     skipped_count: int
     new_count: int
+    change_sets: Annotated[List[ChangeSet], append_or_replace]
+    chunk_ids: List[int]
+    deleted_count: int
+    # File path -> ids of its stored chunks, for every file stored in this run
+    stored_files: Dict[str, List[int]]
+    chunk_count: int
+    # Streaming mode: (kind, root, source, file paths) to read, kind is "repository" or "local"
+    read_plan: List[Tuple[str, str, str, List[str]]]
+    # Streaming mode: continue from the last committed batches of an interrupted run
+    resume: bool
+    # Source -> file path -> journal entry of files committed by an interrupted run
+    checkpoint_files: Dict[str, Dict[str, dict]]
+    resumed_count: int
+    # Source -> the only file paths to process (retry-failed, watch mode); empty for a normal run
+    only_files: Dict[str, List[str]]
+    # File path -> reason, for files left out of the vector store in this run
+    failed_files: Dict[str, str]
 
 
 class RAGWorkflow:
     """LangGraph workflow for processing documents and creating embeddings."""
 
+    # Items a node processed, from its returned state and the document count before it ran
+    STAGE_ITEMS = {
+        "extract_documents": lambda state, documents_before: len(state["documents"]),
+        "process_local_files": lambda state, documents_before: len(state["documents"]) - documents_before,
+        "chunk_documents": lambda state, documents_before: len(state["documents"]),
+        "create_embeddings": lambda state, documents_before: len(state["chunk_batch"]),
+        "store_embeddings": lambda state, documents_before: state["chunk_count"],
+        "plan_reads": lambda state, documents_before: state["new_count"],
+        "stream_documents": lambda state, documents_before: state["chunk_count"],
+        "update_manifest": lambda state, documents_before: len(state["stored_files"]),
+    }
+
     def __init__(
         self,
         repository_reader: IRepositoryReader,
         document_chunker: IDocumentChunker,
         embedding_service: IEmbeddingService,
         vector_store: IVectorStore,
-        local_file_reader: Optional[ILocalFileReader] = None
+        local_file_reader: Optional[ILocalFileReader] = None,
+        manifest: Optional[IngestionManifest] = None,
+        max_concurrent_clones: int = 2,
+        streaming_pipeline: Optional[StreamingPipeline] = None,
+        checkpoint_journal: Optional[CheckpointJournal] = None,
+        shard: Optional[ShardSpec] = None,
+        dead_letters: Optional[DeadLetterStore] = None
     ):
         """
         Initialize the RAG workflow.
@@ -44,22 +114,47 @@ class RAGWorkflow:
             embedding_service: Service for creating embeddings
             vector_store: Service for storing embeddings
             local_file_reader: Optional service for reading local files
+            manifest: Optional ingestion manifest; when set, only added, modified and
+                      deleted files go through the read/chunk/embed/store stages
+            max_concurrent_clones: Clones/fetches allowed in flight at once in run_many
+            streaming_pipeline: Optional pipeline; when set, files are read, chunked,
+                                embedded and stored concurrently in micro-batches
+                                instead of one stage after the other
+            checkpoint_journal: Optional journal the streaming pipeline commits every
+                                micro-batch to, so interrupted runs can be resumed
+            shard: Optional shard of the files this worker processes; other shards
+                   are left to other workers writing to the same collection
+            dead_letters: Optional store that files failing to read, analyse or embed
+                          are recorded in, for retry_failed
         """
         self.repository_reader = repository_reader
         self.document_chunker = document_chunker
         self.embedding_service = embedding_service
         self.vector_store = vector_store
         self.local_file_reader = local_file_reader
-        self.workflow = self._build_workflow()
+        self.manifest = manifest
+        self.streaming_pipeline = streaming_pipeline
+        self.checkpoint_journal = checkpoint_journal
+        self.shard = shard
+        self.dead_letters = dead_letters
+        self._clone_slots = threading.BoundedSemaphore(max(1, max_concurrent_clones))
+        # Collection creation and delete/insert pairs are not safe to interleave across runs
+        self._store_lock = streaming_pipeline.store_lock if streaming_pipeline else threading.Lock()
+        if streaming_pipeline:
+            self.workflow = self._build_streaming_workflow()
+        else:
+            self.workflow = self._build_workflow()
 
     def _clone_repository(self, state: RAGState) -> RAGState:
         """Clone the repository and check for existing documents."""
         print("\n=== Step 1: Cloning Repository & Checking Existing Data ===")
         try:
-            # Check for existing documents first
-            if state.get("skip_existing_documents") and not state.get("force_reprocess"):
+            # Check for existing documents first (with a manifest, only to adopt
+            # files indexed before the manifest existed)
+            use_milvus_check = not self.manifest or not self.manifest.has_entries()
+            if use_milvus_check and state.get("skip_existing_documents") and not state.get("force_reprocess"):
                 print("Checking vector store for existing documents...")
-                existing_paths = self.vector_store.get_existing_file_paths()
+                existing_paths = self._attribute_legacy_rows(state, self.vector_store.get_existing_file_paths())
                 state["existing_file_paths"] = existing_paths
                 if existing_paths:
                     print(f"Found {len(existing_paths)} existing documents in vector store")
@@ -69,7 +164,8 @@ class RAGWorkflow:
             # Clone repository (will return empty string if no URL provided)
             repo_url = state.get("repository_url", "")
             if repo_url and repo_url.strip():
-                repo_path = self.repository_reader.clone_repository(repo_url)
+                with self._clone_slots:
+                    repo_path = self.repository_reader.clone_repository(repo_url)
                 state["repo_path"] = repo_path
             else:
                 print("No repository URL provided - will process local files only")
@@ -83,6 +179,29 @@ class RAGWorkflow:
 
         return state
 
+    @staticmethod
+    def _attribute_legacy_rows(state: RAGState, existing_paths: set) -> set:
+        """
+        Name legacy rows of the vector store after this run's repository.
+
+        Chunks stored before documents carried their repository URL have the
+        clone directory (an absolute path) as repository_url. Only one
+        repository could be indexed then, so they are attributed to the run
+        that owns legacy rows and ignored by the others.
+        """
+        repository_url = state.get("repository_url", "")
+        if not repository_url or not state.get("owns_legacy_rows"):
+            return existing_paths
+        return {
+            (repository_url if str(url).startswith("/") else url, file_path)
+            for url, file_path in existing_paths
+        }
+
+    @staticmethod
+    def _source_repository_url(source: str) -> str:
+        """repository_url of the documents of a manifest source."""
+        return "local" if source.startswith("local:") else source
+
     def _extract_documents(self, state: RAGState) -> RAGState:
         """Extract markdown documents from the repository."""
         print("\n=== Step 2: Extracting Markdown Documents ===")
@@ -92,7 +211,16 @@ class RAGWorkflow:
         try:
             repo_path = state.get("repo_path", "")
             if repo_path and repo_path.strip():
-                documents = self.repository_reader.get_markdown_files(repo_path)
+                file_paths = None
+                if self.manifest:
+                    file_paths = self._repository_changes(state, repo_path).to_process
+                elif self._selects_files(state):
+                    file_paths = self._select_files(
+                        state, state["repository_url"], self.repository_reader.list_markdown_files(repo_path)
+                    )
+                documents = self.repository_reader.get_markdown_files(repo_path, file_paths)
+                if self.manifest:
+                    self._set_content_hashes(documents, state["change_sets"][-1])
                 state["documents"] = documents
                 print(f"Extracted {len(documents)} markdown documents from repository")
             else:
@@ -109,29 +237,66 @@ class RAGWorkflow:
 
     def _process_local_files(self, state: RAGState) -> RAGState:
         """Process local files (images, diagrams, etc) using Vision API."""
+        local_dir = self._local_files_directory(state)
+        if local_dir:
+            try:
+                file_paths, changes = self._plan_local_files(state, local_dir)
+                self._add_local_documents(state, self.local_file_reader.read_files(file_paths), changes)
+            except Exception as e:
+                # Don't fail the entire workflow if local processing fails
+                print(f"Warning: Failed to process local files: {str(e)}")
+
+        return state
+
+    async def _aprocess_local_files(self, state: RAGState) -> RAGState:
+        """Process local files like _process_local_files, with async Vision API batches."""
+        local_dir = self._local_files_directory(state)
+        if local_dir:
+            try:
+                file_paths, changes = await to_thread(self._plan_local_files, state, local_dir)
+                self._add_local_documents(state, await self.local_file_reader.aread_files(file_paths), changes)
+            except Exception as e:
+                # Don't fail the entire workflow if local processing fails
+                print(f"Warning: Failed to process local files: {str(e)}")
+
+        return state
+
+    def _local_files_directory(self, state: RAGState) -> Optional[str]:
+        """Directory whose files this run processes, or None if local file processing is skipped."""
         print("\n=== Step 3: Processing Local Files (Diagrams, Images, Documents) ===")
         if state.get("error"):
-            return state
+            return None
 
         if not state.get("process_local_files") or not self.local_file_reader:
             print("Skipping local file processing (disabled or not configured)")
-            return state
+            return None
 
-        try:
-            local_dir = state.get("local_data_dir")
-            if local_dir:
-                local_documents = self.local_file_reader.read_directory(local_dir)
-                # Append local documents to existing documents
-                state["documents"].extend(local_documents)
-                print(f"Processed {len(local_documents)} local files")
-                print(f"Total documents: {len(state['documents'])}")
-            else:
-                print("No local data directory specified")
-        except Exception as e:
-            # Don't fail the entire workflow if local processing fails
-            print(f"Warning: Failed to process local files: {str(e)}")
+        local_dir = state.get("local_data_dir")
+        if not local_dir:
+            print("No local data directory specified")
+            return None
+        return local_dir
 
-        return state
+    def _plan_local_files(self, state: RAGState, local_dir: str) -> Tuple[List[str], Optional[ChangeSet]]:
+        """Files of the directory to read, plus the manifest change set they came from."""
+        source = f"local:{local_dir}"
+        file_paths = self.local_file_reader.list_files(local_dir)
+        if self.manifest:
+            changes = self._compute_changes(state, source, {file_path: file_path for file_path in file_paths})
+            return changes.to_process, changes
+        return self._select_files(state, source, file_paths), None
+
+    def _add_local_documents(
+        self,
+        state: RAGState,
+        local_documents: List[Document],
+        changes: Optional[ChangeSet]
+    ) -> None:
+        """Add the documents read from the local directory to the state."""
+        if changes is not None:
+            self._set_content_hashes(local_documents, changes)
+        state["documents"].extend(local_documents)
+        print(f"Processed {len(local_documents)} local files")
 
     def _filter_existing_documents(self, state: RAGState) -> RAGState:
         """Filter out documents that are already in the vector store."""
@@ -139,6 +304,11 @@ class RAGWorkflow:
         if state.get("error"):
             return state
 
+        state["documents"] = self._drop_failed_documents(state, state["documents"])
+
+        if self.manifest:
+            return self._filter_with_manifest(state)
+
         # If force reprocess is enabled, skip filtering
         if state.get("force_reprocess"):
             print("Force reprocess enabled - will process all documents")
@@ -163,14 +333,14 @@ class RAGWorkflow:
                 state["new_count"] = len(state["documents"])
                 return state
 
-            print(f"Found {len(existing_paths)} unique file paths in vector store")
+            print(f"Found {len(existing_paths)} unique files in vector store")
 
             # Filter documents
             original_count = len(state["documents"])
             new_documents = []
 
             for doc in state["documents"]:
-                if doc.file_path not in existing_paths:
+                if (doc.repository_url, doc.file_path) not in existing_paths:
                     new_documents.append(doc)
                 else:
                     print(f"  Skipping (already indexed): {doc.file_path}")
@@ -196,6 +366,214 @@ class RAGWorkflow:
 
         return state
 
+    def _repository_changes(self, state: RAGState, repo_path: str) -> ChangeSet:
+        """
+        Work out which markdown files of the clone changed since the last run.
+
+        When the commit indexed last time is still in the clone, git diff
+        names the changed and deleted files directly; otherwise every file
+        is listed and compared with the manifest. In git-native mode the
+        blob SHAs serve as content hashes, so nothing has to be stat'ed or
+        read to tell unchanged files apart.
+        """
+        source = state["repository_url"]
+        head = self.repository_reader.head_commit(repo_path)
+        last_commit = self.manifest.revision(source)
+        blobs = self.repository_reader.list_markdown_blobs(repo_path)
+
+        diff = None
+        if last_commit and head and not self._full_reindex(state) and not state.get("only_files"):
+            if last_commit == head:
+                diff = ([], [])
+            else:
+                diff = self.repository_reader.diff_markdown_files(repo_path, last_commit)
+
+        if diff is not None:
+            changed, deleted = diff
+            print(f"Changes since last indexed commit {last_commit[:10]}: "
+                  f"{len(changed)} changed, {len(deleted)} deleted markdown files")
+            changes = self._compute_changes(
+                state, source, {file_path: os.path.join(repo_path, file_path) for file_path in changed},
+                deleted=deleted, content_hashes=blobs
+            )
+        else:
+            file_paths = sorted(blobs) if blobs is not None else self.repository_reader.list_markdown_files(repo_path)
+            changes = self._compute_changes(
+                state, source, {file_path: os.path.join(repo_path, file_path) for file_path in file_paths},
+                content_hashes=blobs
+            )
+
+        # A run over selected files does not mark the commit as indexed
+        if not state.get("only_files"):
+            changes.revision = head
+        return changes
+
+    @staticmethod
+    def _set_content_hashes(documents: List[Document], changes: ChangeSet) -> None:
+        """Attach the hash the manifest compared to documents that do not carry one yet."""
+        for document in documents:
+            fingerprint = changes.fingerprints.get(document.file_path)
+            if document.content_hash is None and fingerprint:
+                document.content_hash = fingerprint[2]
+
+    @staticmethod
+    def _full_reindex(state: RAGState) -> bool:
+        """Whether every recorded file should be replaced instead of diffed."""
+        return state.get("force_reprocess", False) or not state.get("skip_existing_documents", True)
+
+    def _compute_changes(
+        self,
+        state: RAGState,
+        source: str,
+        files: dict,
+        deleted: Optional[list] = None,
+        content_hashes: Optional[dict] = None
+    ) -> ChangeSet:
+        """Diff the current files of a source against the manifest and remember the change set."""
+        if self._selects_files(state):
+            files = {file_path: files[file_path] for file_path in self._select_files(state, source, list(files))}
+            if deleted is not None:
+                deleted = self._select_files(state, source, deleted)
+        # A full reindex replaces every recorded file's chunks instead of duplicating them
+        changes = self.manifest.compute_changes(
+            source, files, content_hashes=content_hashes, force=self._full_reindex(state), deleted=deleted
+        )
+        # Files of other shards (or not being retried) are not missing, just not this run's
+        changes.deleted = self._select_files(state, source, changes.deleted, resolve_missing=False)
+        if source.startswith("local:"):
+            self._refresh_diagram_sources(source, changes)
+        changes.print_summary()
+        state["change_sets"].append(changes)
+        return changes
+
+    def _refresh_diagram_sources(self, source: str, changes: ChangeSet) -> None:
+        """
+        Read diagrams again whose PNG export was added, modified or deleted.
+
+        An export is analysed as part of its .drawio file, so the diagram's
+        Vision summary is stale even when the .drawio file is unchanged.
+        """
+        diagrams = {
+            LocalFileReader.diagram_source(file_path) for file_path in changes.to_process + changes.deleted
+        } - {None} - set(changes.to_process)
+        diagrams = [file_path for file_path in sorted(diagrams) if os.path.exists(file_path)]
+        if not diagrams:
+            return
+
+        refreshed = self.manifest.compute_changes(
+            source, {file_path: file_path for file_path in diagrams}, force=True, deleted=[]
+        )
+        for file_path in refreshed.to_process:
+            if file_path in changes.unchanged:
+                changes.unchanged.remove(file_path)
+        changes.added.extend(refreshed.added)
+        changes.modified.extend(refreshed.modified)
+        changes.fingerprints.update(refreshed.fingerprints)
+        changes.hashed += refreshed.hashed
+
+    def _selects_files(self, state: RAGState) -> bool:
+        """Whether this run only covers some of the files of its sources."""
+        return bool(self.shard or state.get("only_files"))
+
+    def _select_files(
+        self,
+        state: RAGState,
+        source: str,
+        file_paths: List[str],
+        resolve_missing: bool = True
+    ) -> List[str]:
+        """
+        Files of a source this run covers.
+
+        That is the files of this worker's shard and, with only_files
+        (retry-failed, watch mode), only those; all of them otherwise. Dead
+        letters of selected files that no longer exist are resolved unless
+        resolve_missing is False.
+        """
+        if self.shard:
+            # Local files are hashed relative to the data directory, which may be mounted elsewhere on other hosts
+            root = source[len("local:"):] if source.startswith("local:") else ""
+            file_paths = self.shard.select(file_paths, root)
+        only_files = state.get("only_files")
+        if only_files:
+            selected = only_files.get(source, [])
+            listed = set(file_paths)
+            missing = [file_path for file_path in selected if file_path not in listed]
+            if missing and resolve_missing and self.dead_letters:
+                self.dead_letters.resolve(source, missing)
+            selected = set(selected)
+            file_paths = [file_path for file_path in file_paths if file_path in selected]
+        return file_paths
+
+    def _document_source(self, state: RAGState, document: Document) -> str:
+        """Manifest/journal source a document was read from."""
+        if document.repository_url == "local":
+            return f"local:{state['local_data_dir']}"
+        return state["repository_url"]
+
+    def _dead_letter(self, state: RAGState, failures: Dict[str, Tuple[str, str, str]]) -> None:
+        """
+        Leave files out of this run and record them in the dead-letter store.
+
+        Args:
+            state: Run state whose failed_files are updated
+            failures: File path -> (source, stage, reason)
+        """
+        for file_path, (source, stage, reason) in failures.items():
+            print(f"  Failed ({stage}): {file_path}: {reason}")
+            state["failed_files"][file_path] = reason
+            if self.dead_letters:
+                self.dead_letters.record(source, file_path, stage, reason)
+
+    def _drop_failed_documents(self, state: RAGState, documents: List[Document]) -> List[Document]:
+        """Dead-letter the files a reader could not read or analyse and return the other documents."""
+        failures = {
+            document.file_path: (
+                self._document_source(state, document),
+                document.metadata.get("failed_stage", "read"),
+                document.metadata["error"]
+            )
+            for document in documents if document.metadata.get("error")
+        }
+        if not failures:
+            return documents
+        self._dead_letter(state, failures)
+        # A file is stored completely or not at all (spreadsheets yield a document per sheet)
+        return [document for document in documents if document.file_path not in failures]
+
+    def _filter_with_manifest(self, state: RAGState) -> RAGState:
+        """Count manifest changes; only adopt files Milvus already has when the manifest is new."""
+        existing_paths = state.get("existing_file_paths", set())
+        if existing_paths:
+            # First run with a manifest: files indexed earlier are recorded, not re-embedded
+            adopted = {
+                (document.repository_url, document.file_path) for document in state["documents"]
+                if (document.repository_url, document.file_path) in existing_paths
+            }
+            for changes in state["change_sets"]:
+                repository_url = self._source_repository_url(changes.source)
+                changes.adopted = [file_path for file_path in changes.added if (repository_url, file_path) in adopted]
+            state["documents"] = [
+                document for document in state["documents"]
+                if (document.repository_url, document.file_path) not in adopted
+            ]
+
+        change_sets = state["change_sets"]
+        state["skipped_count"] = sum(len(changes.unchanged) + len(changes.adopted) for changes in change_sets)
+        state["new_count"] = len({document.file_path for document in state["documents"]})
+        state["deleted_count"] = sum(len(changes.deleted) for changes in change_sets)
+
+        print(f"\n📊 Document Status:")
+        print(f"  - Unchanged: {state['skipped_count']}")
+        print(f"  - Added or modified: {state['new_count']}")
+        print(f"  - Deleted: {state['deleted_count']}")
+
+        if state["new_count"] == 0 and state["deleted_count"] == 0:
+            print("\n✅ All documents are already indexed. Nothing to process!")
+            state["status"] = "no_new_documents"
+
+        return state
+
     def _chunk_documents(self, state: RAGState) -> RAGState:
         """Chunk the documents."""
         print("\n=== Step 5: Chunking Documents ===")
@@ -208,10 +586,10 @@ class RAGWorkflow:
             return state
 
         try:
-            chunks = self.document_chunker.chunk_documents(state["documents"])
-            state["chunks"] = chunks
+            chunk_batch = self.document_chunker.chunk_documents_to_batch(state["documents"])
+            state["chunk_batch"] = chunk_batch
             state["status"] = "documents_chunked"
-            print(f"Created {len(chunks)} chunks")
+            print(f"Created {len(chunk_batch)} chunks")
         except Exception as e:
             state["error"] = f"Failed to chunk documents: {str(e)}"
             state["status"] = "error"
@@ -229,26 +607,44 @@ class RAGWorkflow:
             return state
 
         try:
-            chunks = state["chunks"]
-            texts = [chunk.content for chunk in chunks]
-            embeddings = self.embedding_service.create_embeddings(texts)
-
-            embedded_chunks = []
-            for chunk, embedding in zip(chunks, embeddings):
-                embedded_chunk = EmbeddedChunk(
-                    chunk=chunk,
-                    embedding=embedding
-                )
-                embedded_chunks.append(embedded_chunk)
+            chunk_batch, failed = embed_bisecting(self.embedding_service, state["chunk_batch"])
+            self._embedded(state, chunk_batch, failed)
+        except Exception as e:
+            state["error"] = f"Failed to create embeddings: {str(e)}"
+            state["status"] = "error"
+        return state
+
+    async def _acreate_embeddings(self, state: RAGState) -> RAGState:
+        """Create embeddings for chunks with concurrent requests (arun)."""
+        print("\n=== Step 6: Creating Embeddings ===")
+        if state.get("error"):
+            return state
 
-            state["embedded_chunks"] = embedded_chunks
-            state["status"] = "embeddings_created"
-            print(f"Created {len(embedded_chunks)} embeddings")
+        # Skip if no new documents
+        if state.get("status") == "no_new_documents":
+            print("No new documents to embed")
+            return state
+
+        try:
+            chunk_batch, failed = await aembed_bisecting(self.embedding_service, state["chunk_batch"])
+            self._embedded(state, chunk_batch, failed)
         except Exception as e:
             state["error"] = f"Failed to create embeddings: {str(e)}"
             state["status"] = "error"
         return state
 
+    def _embedded(self, state: RAGState, chunk_batch: ChunkBatch, failed: Dict[str, str]) -> None:
+        """Keep the embedded chunks and dead-letter the files whose chunks could not be embedded."""
+        if failed:
+            sources = {document.file_path: self._document_source(state, document) for document in state["documents"]}
+            self._dead_letter(
+                state, {file_path: (sources[file_path], "embed", reason) for file_path, reason in failed.items()}
+            )
+            state["documents"] = [document for document in state["documents"] if document.file_path not in failed]
+        state["chunk_batch"] = chunk_batch
+        state["status"] = "embeddings_created"
+        print(f"Created {len(chunk_batch)} embeddings")
+
     def _store_embeddings(self, state: RAGState) -> RAGState:
         """Store embeddings in Milvus."""
         print("\n=== Step 7: Storing Embeddings in Milvus ===")
@@ -263,18 +659,433 @@ class RAGWorkflow:
         try:
             # Use initialize_or_load_collection instead of initialize_collection
             # This will preserve existing documents
-            self.vector_store.initialize_or_load_collection()
-            self.vector_store.insert_embeddings(state["embedded_chunks"])
-            state["status"] = "embeddings_stored"
-            print("Successfully stored embeddings in Milvus")
+            with self._store_lock:
+                self.vector_store.initialize_or_load_collection()
+                if len(state["chunk_batch"]):
+                    state["chunk_ids"] = self.vector_store.insert_batch(state["chunk_batch"])
+                    print("Successfully stored embeddings in Milvus")
+                else:
+                    print("No new embeddings to store")
+
+            self._record_stored(state)
+        except Exception as e:
+            state["error"] = f"Failed to store embeddings: {str(e)}"
+            state["status"] = "error"
+        return state
+
+    async def _astore_embeddings(self, state: RAGState) -> RAGState:
+        """Store embeddings in Milvus with the async client (arun)."""
+        print("\n=== Step 7: Storing Embeddings in Milvus ===")
+        if state.get("error"):
+            return state
+
+        # Skip if no new documents
+        if state.get("status") == "no_new_documents":
+            print("No new embeddings to store")
+            return state
+
+        try:
+            # The store lock is shared with threaded runs, so it is taken without blocking the loop
+            await to_thread(self._store_lock.acquire)
+            try:
+                await to_thread(self.vector_store.initialize_or_load_collection)
+                if len(state["chunk_batch"]):
+                    state["chunk_ids"] = await self.vector_store.ainsert_batch(state["chunk_batch"])
+                    print("Successfully stored embeddings in Milvus")
+                else:
+                    print("No new embeddings to store")
+            finally:
+                self._store_lock.release()
+
+            self._record_stored(state)
         except Exception as e:
             state["error"] = f"Failed to store embeddings: {str(e)}"
             state["status"] = "error"
         return state
 
+    @staticmethod
+    def _record_stored(state: RAGState) -> None:
+        """Map every stored document's file to the ids of its inserted chunks."""
+        stored_files = {document.file_path: [] for document in state["documents"]}
+        for file_path, chunk_id in zip(state["chunk_batch"].file_paths, state["chunk_ids"]):
+            stored_files[file_path].append(chunk_id)
+        state["stored_files"] = stored_files
+        state["chunk_count"] = len(state["chunk_batch"])
+        state["status"] = "embeddings_stored"
+
+    def _update_manifest(self, state: RAGState) -> RAGState:
+        """Remove stale chunks of modified and deleted files and record what was stored."""
+        print("\n=== Step 8: Updating Ingestion Manifest ===")
+        if state.get("error"):
+            return state
+
+        if not self.manifest:
+            print("No ingestion manifest configured")
+            return state
+
+        try:
+            # Chunk ids per file path, from the rows inserted in this run
+            ids_by_path = state.get("stored_files", {})
+            stored_paths = set(ids_by_path)
+
+            for changes in state.get("change_sets", []):
+                # Files that failed to read stay unrecorded (and keep their old chunks) until the next run
+                replaced = [file_path for file_path in changes.modified if file_path in stored_paths]
+                stale_ids, unknown_paths = self.manifest.chunk_ids(changes.source, replaced + changes.deleted)
+                repository_url = self._source_repository_url(changes.source)
+                # Files adopted from legacy rows may still be stored under their clone directory
+                include_legacy = bool(state.get("owns_legacy_rows")) and repository_url != "local"
+                # New chunks are inserted before old ones are removed, so a failed run never loses a file
+                with self._store_lock:
+                    self.vector_store.delete_chunks(stale_ids)
+                    # Chunks inserted for these files in this run match the same file paths
+                    self.vector_store.delete_by_file_paths(
+                        unknown_paths, repository_url, include_legacy, keep_ids=ids_by_path
+                    )
+
+                for file_path in changes.to_process:
+                    if file_path in stored_paths:
+                        self.manifest.record(
+                            changes.source, file_path, changes.fingerprints[file_path],
+                            ids_by_path.get(file_path, [])
+                        )
+                for file_path in changes.adopted:
+                    self.manifest.record(changes.source, file_path, changes.fingerprints[file_path], None)
+                self.manifest.remove(changes.source, changes.deleted)
+
+                # Only advance the revision when nothing is left to retry
+                if changes.revision and all(
+                    file_path in stored_paths or file_path in changes.adopted for file_path in changes.to_process
+                ):
+                    self.manifest.set_revision(changes.source, changes.revision)
+
+            print(f"Manifest updated: {self.manifest.manifest_path}")
+        except Exception as e:
+            state["error"] = f"Failed to update ingestion manifest: {str(e)}"
+            state["status"] = "error"
+
+        return state
+
+    def _recover_checkpoints(self, state: RAGState) -> RAGState:
+        """Roll back chunks of an interrupted run that cannot be resumed."""
+        print("\n=== Step 0: Recovering Checkpoints ===")
+        if not self.checkpoint_journal:
+            print("No checkpoint journal configured")
+            return state
+
+        try:
+            for source in self._run_sources(state):
+                entries = self.checkpoint_journal.entries(source)
+                if not entries:
+                    continue
+                resumable = {
+                    file_path: entry for file_path, entry in entries.items()
+                    if state.get("resume") and entry["committed"]
+                }
+                # Inserted but uncommitted chunks (or everything, without --resume) are orphans
+                self._discard_checkpoints(source, entries, [path for path in entries if path not in resumable])
+                state["checkpoint_files"][source] = resumable
+                print(f"{source}: {len(resumable)} committed files to resume, "
+                      f"{len(entries) - len(resumable)} rolled back")
+        except Exception as e:
+            state["error"] = f"Failed to recover checkpoints: {str(e)}"
+            state["status"] = "error"
+
+        return state
+
+    def _discard_checkpoints(self, source: str, entries: Dict[str, dict], file_paths: List[str]) -> None:
+        """
+        Delete the journaled chunks of files from the vector store and forget them.
+
+        Uncommitted files may also have chunks of an insert that was cut
+        short before its ids were journaled. Those are deleted by file
+        path, keeping the chunks the manifest records for the file's
+        previous version. Files adopted without chunk ids are skipped; the
+        run that stores them again deletes all their older chunks by path.
+        """
+        if not file_paths:
+            return
+        chunk_ids = [chunk_id for file_path in file_paths for chunk_id in entries[file_path]["chunk_ids"]]
+        uncommitted = [file_path for file_path in file_paths if not entries[file_path]["committed"]]
+        keep_ids = {}
+        if uncommitted and self.manifest:
+            for file_path in list(uncommitted):
+                recorded_ids, unknown = self.manifest.chunk_ids(source, [file_path])
+                if unknown:
+                    uncommitted.remove(file_path)
+                else:
+                    keep_ids[file_path] = recorded_ids
+        if chunk_ids or uncommitted:
+            with self._store_lock:
+                self.vector_store.initialize_or_load_collection()
+                self.vector_store.delete_chunks(chunk_ids)
+                if uncommitted:
+                    self.vector_store.delete_by_file_paths(
+                        uncommitted, self._source_repository_url(source), keep_ids=keep_ids
+                    )
+        self.checkpoint_journal.discard(source, file_paths)
+
+    def _run_sources(self, state: RAGState) -> List[str]:
+        """Journal/manifest sources this run writes to."""
+        sources = []
+        if state.get("repository_url", "").strip():
+            sources.append(state["repository_url"])
+        if state.get("process_local_files") and self.local_file_reader and state.get("local_data_dir"):
+            sources.append(f"local:{state['local_data_dir']}")
+        return sources
+
+    def _plan_reads(self, state: RAGState) -> RAGState:
+        """List the files to stream, without reading them yet."""
+        print("\n=== Step 2-4: Listing Files & Checking for Existing Documents ===")
+        if state.get("error"):
+            return state
+
+        plan = []
+        try:
+            repo_path = state.get("repo_path", "")
+            if repo_path:
+                source = state["repository_url"]
+                if self.manifest:
+                    file_paths = self._repository_changes(state, repo_path).to_process
+                else:
+                    file_paths = self._select_files(state, source, self.repository_reader.list_markdown_files(repo_path))
+                plan.append(("repository", repo_path, source, file_paths))
+        except Exception as e:
+            state["error"] = f"Failed to list repository files: {str(e)}"
+            state["status"] = "error"
+            return state
+
+        local_dir = state.get("local_data_dir")
+        if state.get("process_local_files") and self.local_file_reader and local_dir:
+            try:
+                source = f"local:{local_dir}"
+                file_paths = self.local_file_reader.list_files(local_dir)
+                if self.manifest:
+                    file_paths = self._compute_changes(
+                        state, source, {file_path: file_path for file_path in file_paths}
+                    ).to_process
+                else:
+                    file_paths = self._select_files(state, source, file_paths)
+                plan.append(("local", local_dir, source, file_paths))
+            except Exception as e:
+                # Don't fail the entire workflow if local processing fails
+                print(f"Warning: Failed to list local files: {str(e)}")
+
+        state["read_plan"] = self._filter_planned_reads(state, plan)
+        return state
+
+    def _filter_planned_reads(self, state: RAGState, plan: list) -> list:
+        """Drop files that are already indexed from the read plan and count the rest."""
+        existing_paths = state.get("existing_file_paths", set())
+        skip_existing = existing_paths and state.get("skip_existing_documents") and not state.get("force_reprocess")
+        change_sets = {changes.source: changes for changes in state["change_sets"]}
+        skipped = sum(len(changes.unchanged) for changes in change_sets.values())
+
+        filtered = []
+        resumed = 0
+        for kind, root, source, file_paths in plan:
+            checkpoints = state["checkpoint_files"].get(source, {})
+            if checkpoints:
+                file_paths = self._resume_files(state, source, file_paths, checkpoints, change_sets.get(source))
+                resumed += len(checkpoints)
+            if skip_existing:
+                repository_url = self._source_repository_url(source)
+                indexed = [file_path for file_path in file_paths if (repository_url, file_path) in existing_paths]
+                if source in change_sets:
+                    # First run with a manifest: files indexed earlier are recorded, not re-embedded
+                    change_sets[source].adopted = indexed
+                skipped += len(indexed)
+                indexed_set = set(indexed)
+                file_paths = [file_path for file_path in file_paths if file_path not in indexed_set]
+            filtered.append((kind, root, source, file_paths))
+
+        state["skipped_count"] = skipped
+        state["resumed_count"] = resumed
+        state["new_count"] = sum(len(file_paths) for _, _, _, file_paths in filtered) + resumed
+        state["deleted_count"] = sum(len(changes.deleted) for changes in change_sets.values())
+
+        print(f"\n📊 Document Status:")
+        print(f"  - Unchanged: {state['skipped_count']}")
+        print(f"  - Added or modified: {state['new_count']}")
+        if self.manifest:
+            print(f"  - Deleted: {state['deleted_count']}")
+        if resumed:
+            print(f"  - Already stored by the interrupted run: {resumed}")
+
+        if state["new_count"] == 0 and state["deleted_count"] == 0:
+            print("\n✅ All documents are already indexed. Nothing to process!")
+            state["status"] = "no_new_documents"
+
+        return filtered
+
+    def _resume_files(
+        self,
+        state: RAGState,
+        source: str,
+        file_paths: List[str],
+        checkpoints: Dict[str, dict],
+        changes: Optional[ChangeSet]
+    ) -> List[str]:
+        """
+        Take over files committed by the interrupted run and return the ones left to read.
+
+        A committed file is only reused while it is still planned and, with
+        a manifest, still has the content hash it was stored with; other
+        checkpoints are rolled back. Reused files keep their chunks and are
+        passed on to the manifest step as stored.
+        """
+        planned = set(file_paths)
+        reused = {}
+        for file_path, entry in checkpoints.items():
+            fingerprint = changes.fingerprints.get(file_path) if changes else None
+            if file_path in planned and (fingerprint is None or fingerprint[2] == entry["content_hash"]):
+                reused[file_path] = entry
+        self._discard_checkpoints(source, checkpoints, [path for path in checkpoints if path not in reused])
+
+        checkpoints.clear()
+        checkpoints.update(reused)
+        for file_path, entry in reused.items():
+            state["stored_files"][file_path] = entry["chunk_ids"]
+        return [file_path for file_path in file_paths if file_path not in reused]
+
+    def _stream_documents(self, state: RAGState) -> RAGState:
+        """Read, chunk, embed and store the planned files through the streaming pipeline."""
+        print("\n=== Step 5-7: Streaming Documents into Milvus ===")
+        if state.get("error"):
+            return state
+
+        change_sets = {changes.source: changes for changes in state["change_sets"]}
+        batch_files = self.streaming_pipeline.read_batch_files
+        read_tasks = []
+        task_sources = []
+        for kind, root, source, file_paths in state["read_plan"]:
+            changes = change_sets.get(source)
+            for batch in self._read_batches(file_paths, batch_files):
+                read_tasks.append(partial(self._read_micro_batch, state, kind, root, batch, changes))
+                task_sources.append((source, changes))
+
+        if state.get("status") == "no_new_documents" or not read_tasks:
+            print("No new documents to stream")
+            return state
+
+        on_inserting = on_inserted = on_committed = None
+        if self.checkpoint_journal:
+            def on_inserting(index: int, files: Dict[str, List[int]]) -> None:
+                self.checkpoint_journal.record_intent(task_sources[index][0], files)
+
+            def on_inserted(index: int, files: Dict[str, List[int]]) -> None:
+                self.checkpoint_journal.record_inserted(task_sources[index][0], files)
+
+            def on_committed(index: int, files: Dict[str, List[int]]) -> None:
+                source, changes = task_sources[index]
+                content_hashes = {
+                    file_path: changes.fingerprints[file_path][2]
+                    for file_path in files if file_path in changes.fingerprints
+                } if changes else {}
+                self.checkpoint_journal.commit(source, files, content_hashes)
+
+        try:
+            with self._store_lock:
+                self.vector_store.initialize_or_load_collection()
+            result = self.streaming_pipeline.run(read_tasks, on_inserted, on_committed, on_inserting)
+            result.print_summary()
+        except Exception as e:
+            state["error"] = f"Failed to stream documents: {str(e)}"
+            state["status"] = "error"
+            return state
+
+        try:
+            self._discard_failed_stream_files(state, result)
+        except Exception as e:
+            state["error"] = f"Failed to discard chunks of failed files: {str(e)}"
+            state["status"] = "error"
+            return state
+
+        if result.error:
+            state["error"] = f"Failed to stream documents: {result.error}"
+            if self.checkpoint_journal:
+                state["error"] += f" (committed batches are kept; rerun with --resume to continue)"
+            state["status"] = "error"
+            return state
+
+        state["stored_files"].update(result.stored_files)
+        state["chunk_count"] = result.chunks
+        state["status"] = "embeddings_stored"
+        return state
+
+    @staticmethod
+    def _read_batches(file_paths: List[str], batch_files: int) -> List[List[str]]:
+        """
+        Split file_paths into micro-batches of about batch_files files.
+
+        A diagram and its PNG export (X.drawio, X.drawio.png) always go to the
+        same batch, so the reader sees both and analyses the export with its
+        diagram; such a batch may hold one file more than batch_files.
+        """
+        groups: Dict[str, List[str]] = {}
+        for file_path in file_paths:
+            groups.setdefault(LocalFileReader.diagram_source(file_path) or file_path, []).append(file_path)
+
+        batches: List[List[str]] = []
+        batch: List[str] = []
+        for group in groups.values():
+            if batch and len(batch) + len(group) > batch_files:
+                batches.append(batch)
+                batch = []
+            batch.extend(group)
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _discard_failed_stream_files(self, state: RAGState, result) -> None:
+        """Dead-letter files whose chunks failed to embed and delete the chunks already inserted for them."""
+        if not result.failed_files:
+            return
+        sources = {
+            file_path: source
+            for _, _, source, file_paths in state["read_plan"] for file_path in file_paths
+        }
+        self._dead_letter(
+            state,
+            {file_path: (sources[file_path], "embed", reason) for file_path, reason in result.failed_files.items()}
+        )
+        if result.orphan_chunk_ids:
+            with self._store_lock:
+                self.vector_store.delete_chunks(result.orphan_chunk_ids)
+        if self.checkpoint_journal:
+            failed_by_source: Dict[str, List[str]] = {}
+            for file_path in result.failed_files:
+                failed_by_source.setdefault(sources[file_path], []).append(file_path)
+            for source, file_paths in failed_by_source.items():
+                self.checkpoint_journal.discard(source, file_paths)
+
+    def _read_micro_batch(
+        self,
+        state: RAGState,
+        kind: str,
+        root: str,
+        file_paths: List[str],
+        changes: Optional[ChangeSet]
+    ) -> List[Document]:
+        """Read one micro-batch of planned files (a read task of the streaming pipeline)."""
+        if kind == "repository":
+            documents = self.repository_reader.get_markdown_files(root, file_paths)
+        else:
+            try:
+                documents = self.local_file_reader.read_files(file_paths)
+            except Exception as e:
+                # Unread local files stay unrecorded and are retried on the next run
+                print(f"Warning: Failed to process local files: {str(e)}")
+                return []
+        # Read tasks run one at a time on the pipeline's read thread
+        documents = self._drop_failed_documents(state, documents)
+        if changes is not None:
+            self._set_content_hashes(documents, changes)
+        return documents
+
     def _cleanup(self, state: RAGState) -> RAGState:
         """Cleanup temporary files."""
-        print("\n=== Step 8: Cleanup ===")
+        print("\n=== Step 9: Cleanup ===")
         try:
             if state.get("repo_path"):
                 self.repository_reader.cleanup(state["repo_path"])
@@ -282,6 +1093,23 @@ class RAGWorkflow:
         except Exception as e:
             print(f"Cleanup warning: {str(e)}")
 
+        try:
+            # A completed run leaves nothing to resume
+            if self.checkpoint_journal and self.streaming_pipeline and not state.get("error"):
+                for source in self._run_sources(state):
+                    self.checkpoint_journal.discard(source)
+        except Exception as e:
+            print(f"Cleanup warning: {str(e)}")
+
+        try:
+            # Files stored in this run no longer need a retry
+            if self.dead_letters and not state.get("error"):
+                stored = list(state.get("stored_files", {}))
+                for source in self._run_sources(state):
+                    self.dead_letters.resolve(source, stored)
+        except Exception as e:
+            print(f"Cleanup warning: {str(e)}")
+
         # Set final status
         if state.get("status") == "no_new_documents":
             state["status"] = "completed_no_changes"
@@ -292,29 +1120,147 @@ class RAGWorkflow:
 
         return state
 
+    def _instrumented(self, stage: str, node, anode=None):
+        """
+        Wrap a node so its wall time and processed items are recorded.
+
+        With anode, the node runs anode under ainvoke (arun) and node under
+        invoke (run); nodes without an async variant run on a worker thread
+        under ainvoke.
+        """
+        def record(state: RAGState, documents_before: int) -> None:
+            items = self.STAGE_ITEMS.get(stage)
+            if items and not state.get("error"):
+                metrics.inc("rag_stage_items_total", items(state, documents_before), stage=stage)
+
+        def run_node(state: RAGState) -> RAGState:
+            documents_before = len(state.get("documents", []))
+            with metrics.timer("rag_stage_seconds", stage=stage):
+                state = node(state)
+            record(state, documents_before)
+            return state
+
+        if anode is None:
+            return run_node
+
+        async def arun_node(state: RAGState) -> RAGState:
+            documents_before = len(state.get("documents", []))
+            with metrics.timer("rag_stage_seconds", stage=stage):
+                state = await anode(state)
+            record(state, documents_before)
+            return state
+
+        return RunnableLambda(run_node, afunc=arun_node, name=stage)
+
+    def _branch(self, name: str, node, owned_keys: Tuple[str, ...], anode=None) -> RunnableLambda:
+        """
+        Wrap a parallel branch so it runs on its own copy of the state.
+
+        Both branches start from the same state; the branch returns only
+        owned_keys plus the documents and change sets it produced, which
+        the RAGState reducers append to those of the other branch.
+        """
+        def start(state: RAGState) -> RAGState:
+            return {**state, "documents": [], "change_sets": []}
+
+        def update(branch_state: RAGState) -> dict:
+            changes = {key: branch_state[key] for key in owned_keys}
+            changes["documents"] = Appended(branch_state["documents"])
+            changes["change_sets"] = Appended(branch_state["change_sets"])
+            return changes
+
+        def run_branch(state: RAGState) -> dict:
+            return update(node(start(state)))
+
+        async def arun_branch(state: RAGState) -> dict:
+            return update(await anode(start(state)))
+
+        return RunnableLambda(run_branch, afunc=arun_branch if anode else None, name=name)
+
+    def _build_repository_branch(self) -> StateGraph:
+        """Build the clone -> extract branch as a graph of its own."""
+        branch = StateGraph(RAGState)
+        branch.add_node("clone_repository", self._instrumented("clone_repository", self._clone_repository))
+        branch.add_node("extract_documents", self._instrumented("extract_documents", self._extract_documents))
+        branch.set_entry_point("clone_repository")
+        branch.add_edge("clone_repository", "extract_documents")
+        branch.add_edge("extract_documents", END)
+        return branch.compile()
+
     def _build_workflow(self) -> StateGraph:
-        """Build the LangGraph workflow."""
+        """
+        Build the LangGraph workflow.
+
+        The repository branch (clone, extract markdown) is network and disk
+        bound and the local-files branch is Vision API bound, so both start
+        together and join before filtering; the run takes about as long as
+        the longer branch instead of their sum.
+        """
         workflow = StateGraph(RAGState)
+        repository_branch = self._build_repository_branch()
+        local_files_node = self._instrumented(
+            "process_local_files", self._process_local_files, self._aprocess_local_files
+        )
 
         # Add nodes
-        workflow.add_node("clone_repository", self._clone_repository)
-        workflow.add_node("extract_documents", self._extract_documents)
-        workflow.add_node("process_local_files", self._process_local_files)
-        workflow.add_node("filter_existing_documents", self._filter_existing_documents)
-        workflow.add_node("chunk_documents", self._chunk_documents)
-        workflow.add_node("create_embeddings", self._create_embeddings)
-        workflow.add_node("store_embeddings", self._store_embeddings)
-        workflow.add_node("cleanup", self._cleanup)
+        workflow.add_node(
+            "repository",
+            self._branch(
+                "repository", repository_branch.invoke, ("repo_path", "existing_file_paths", "status", "error"),
+                repository_branch.ainvoke
+            )
+        )
+        workflow.add_node(
+            "process_local_files",
+            self._branch(
+                "process_local_files", local_files_node.invoke, (), local_files_node.ainvoke
+            )
+        )
+        workflow.add_node("filter_existing_documents", self._instrumented("filter_existing_documents", self._filter_existing_documents))
+        workflow.add_node("chunk_documents", self._instrumented("chunk_documents", self._chunk_documents))
+        workflow.add_node(
+            "create_embeddings",
+            self._instrumented("create_embeddings", self._create_embeddings, self._acreate_embeddings)
+        )
+        workflow.add_node(
+            "store_embeddings",
+            self._instrumented("store_embeddings", self._store_embeddings, self._astore_embeddings)
+        )
+        workflow.add_node("update_manifest", self._instrumented("update_manifest", self._update_manifest))
+        workflow.add_node("cleanup", self._instrumented("cleanup", self._cleanup))
 
         # Define the flow
-        workflow.set_entry_point("clone_repository")
-        workflow.add_edge("clone_repository", "extract_documents")
-        workflow.add_edge("extract_documents", "process_local_files")
-        workflow.add_edge("process_local_files", "filter_existing_documents")
+        workflow.add_edge(START, "repository")
+        workflow.add_edge(START, "process_local_files")
+        workflow.add_edge(["repository", "process_local_files"], "filter_existing_documents")
         workflow.add_edge("filter_existing_documents", "chunk_documents")
         workflow.add_edge("chunk_documents", "create_embeddings")
         workflow.add_edge("create_embeddings", "store_embeddings")
-        workflow.add_edge("store_embeddings", "cleanup")
+        workflow.add_edge("store_embeddings", "update_manifest")
+        workflow.add_edge("update_manifest", "cleanup")
+        workflow.add_edge("cleanup", END)
+
+        return workflow.compile()
+
+    def _build_streaming_workflow(self) -> StateGraph:
+        """Build the LangGraph workflow whose read/chunk/embed/store stages run as one pipeline."""
+        workflow = StateGraph(RAGState)
+
+        # Add nodes
+        workflow.add_node("recover_checkpoints", self._instrumented("recover_checkpoints", self._recover_checkpoints))
+        workflow.add_node("clone_repository", self._instrumented("clone_repository", self._clone_repository))
+        workflow.add_node("plan_reads", self._instrumented("plan_reads", self._plan_reads))
+        workflow.add_node("stream_documents", self._instrumented("stream_documents", self._stream_documents))
+        workflow.add_node("update_manifest", self._instrumented("update_manifest", self._update_manifest))
+        workflow.add_node("cleanup", self._instrumented("cleanup", self._cleanup))
+
+        # Define the flow
+        workflow.set_entry_point("recover_checkpoints")
+        workflow.add_edge("recover_checkpoints", "clone_repository")
+        workflow.add_edge("clone_repository", "plan_reads")
+        workflow.add_edge("plan_reads", "stream_documents")
+        workflow.add_edge("stream_documents", "update_manifest")
+        workflow.add_edge("update_manifest", "cleanup")
         workflow.add_edge("cleanup", END)
 
         return workflow.compile()
@@ -325,7 +1271,10 @@ class RAGWorkflow:
         local_data_dir: str = "",
         process_local_files: bool = False,
         skip_existing_documents: bool = True,
-        force_reprocess: bool = False
+        force_reprocess: bool = False,
+        resume: bool = False,
+        only_files: Optional[Dict[str, List[str]]] = None,
+        owns_legacy_rows: bool = True
     ) -> RAGState:
         """
         Run the RAG workflow.
@@ -336,10 +1285,79 @@ class RAGWorkflow:
             process_local_files: Whether to process local files
             skip_existing_documents: Skip documents already in vector store
             force_reprocess: Force reprocessing of all documents (overrides skip_existing)
+            resume: Keep the batches an interrupted streaming run committed and
+                    only process the rest (otherwise they are rolled back)
+            only_files: Source -> file paths; only these files are processed
+                        (deleted ones are removed), the others are left as they are
+            owns_legacy_rows: Chunks stored with a clone directory as repository_url
+                              (before repository URLs were recorded) belong to this repository
+
+        Returns:
+            Final state of the workflow
+        """
+        initial_state = self._start_run(
+            repository_url, local_data_dir, process_local_files, skip_existing_documents, force_reprocess, resume,
+            only_files, owns_legacy_rows
+        )
+        final_state = self.workflow.invoke(initial_state)
+        self._print_run_result(final_state)
+        return final_state
+
+    async def arun(
+        self,
+        repository_url: str,
+        local_data_dir: str = "",
+        process_local_files: bool = False,
+        skip_existing_documents: bool = True,
+        force_reprocess: bool = False,
+        resume: bool = False,
+        only_files: Optional[Dict[str, List[str]]] = None,
+        owns_legacy_rows: bool = True
+    ) -> RAGState:
+        """
+        Run the RAG workflow on the running event loop.
+
+        Uses LangGraph's ainvoke: embedding and storing use the async
+        Azure OpenAI and Milvus clients, so many requests are in flight
+        without a thread each, and several runs can share one loop through
+        asyncio.gather. Nodes without async I/O run on worker threads.
+
+        Args:
+            repository_url: URL of the repository to process
+            local_data_dir: Path to local data directory
+            process_local_files: Whether to process local files
+            skip_existing_documents: Skip documents already in vector store
+            force_reprocess: Force reprocessing of all documents (overrides skip_existing)
+            resume: Keep the batches an interrupted streaming run committed and
+                    only process the rest (otherwise they are rolled back)
+            only_files: Source -> file paths; only these files are processed
+                        (deleted ones are removed), the others are left as they are
+            owns_legacy_rows: Chunks stored with a clone directory as repository_url
+                              (before repository URLs were recorded) belong to this repository
 
         Returns:
             Final state of the workflow
         """
+        initial_state = self._start_run(
+            repository_url, local_data_dir, process_local_files, skip_existing_documents, force_reprocess, resume,
+            only_files, owns_legacy_rows
+        )
+        final_state = await self.workflow.ainvoke(initial_state)
+        self._print_run_result(final_state)
+        return final_state
+
+    def _start_run(
+        self,
+        repository_url: str,
+        local_data_dir: str = "",
+        process_local_files: bool = False,
+        skip_existing_documents: bool = True,
+        force_reprocess: bool = False,
+        resume: bool = False,
+        only_files: Optional[Dict[str, List[str]]] = None,
+        owns_legacy_rows: bool = True
+    ) -> RAGState:
+        """Build the initial state of a run and print the run header."""
         initial_state: RAGState = {
             "repository_url": repository_url,
             "repo_path": "",
@@ -348,13 +1366,24 @@ class RAGWorkflow:
             "skip_existing_documents": skip_existing_documents,
             "force_reprocess": force_reprocess,
             "documents": [],
-            "chunks": [],
-            "embedded_chunks": [],
+            "chunk_batch": ChunkBatch(),
             "error": "",
             "status": "initialized",
             "existing_file_paths": set(),
+            "owns_legacy_rows": owns_legacy_rows,
             "skipped_count": 0,
-            "new_count": 0
+            "new_count": 0,
+            "change_sets": [],
+            "chunk_ids": [],
+            "deleted_count": 0,
+            "stored_files": {},
+            "chunk_count": 0,
+            "read_plan": [],
+            "resume": resume,
+            "checkpoint_files": {},
+            "resumed_count": 0,
+            "only_files": only_files or {},
+            "failed_files": {}
         }
 
         print(f"\n{'='*60}")
@@ -365,14 +1394,26 @@ class RAGWorkflow:
             print(f"Local data directory: {local_data_dir}")
         if force_reprocess:
             print(f"Mode: FORCE REPROCESS (will process all documents)")
+        elif self.manifest:
+            print(f"Mode: INCREMENTAL (manifest: {self.manifest.manifest_path})")
         elif skip_existing_documents:
             print(f"Mode: INCREMENTAL (will skip existing documents)")
         else:
             print(f"Mode: FULL REINDEX (will process all documents)")
+        if self.shard:
+            print(f"Shard: {self.shard} (files partitioned by path hash)")
+        if only_files:
+            print(f"Selected files: {sum(len(paths) for paths in only_files.values())}")
+        if self.streaming_pipeline:
+            print(f"Execution: STREAMING (bounded queues of {self.streaming_pipeline.queue_size} micro-batches)")
+            if resume and self.checkpoint_journal:
+                print(f"Resume: continuing from checkpoints in {self.checkpoint_journal.journal_path}")
         print(f"{'='*60}")
 
-        final_state = self.workflow.invoke(initial_state)
+        return initial_state
 
+    def _print_run_result(self, final_state: RAGState) -> None:
+        """Print the outcome of a run."""
         print(f"\n{'='*60}")
         print(f"Workflow Status: {final_state['status']}")
         print(f"{'='*60}")
@@ -389,10 +1430,145 @@ class RAGWorkflow:
             print(f"   - Total documents found: {final_state.get('skipped_count', 0) + final_state.get('new_count', 0)}")
             print(f"   - Already indexed (skipped): {final_state.get('skipped_count', 0)}")
             print(f"   - Newly processed: {final_state.get('new_count', 0)}")
-            print(f"   - Chunks created: {len(final_state['chunks'])}")
-            print(f"   - Embeddings stored: {len(final_state['embedded_chunks'])}")
+            if self.manifest:
+                print(f"   - Deleted: {final_state.get('deleted_count', 0)}")
+            print(f"   - Chunks created: {final_state.get('chunk_count', 0)}")
+            print(f"   - Embeddings stored: {final_state.get('chunk_count', 0)}")
+            if final_state.get("failed_files"):
+                print(f"   - Failed (left for retry-failed): {len(final_state['failed_files'])}")
 
         print(f"{'='*60}\n")
 
-        return final_state
+    def run_many(
+        self,
+        repository_urls: List[str],
+        local_data_dir: str = "",
+        process_local_files: bool = False,
+        skip_existing_documents: bool = True,
+        force_reprocess: bool = False,
+        max_workers: int = 4,
+        resume: bool = False
+    ) -> Dict[str, RAGState]:
+        """
+        Run the workflow for several repositories concurrently.
+
+        Every repository gets its own workflow run on a thread pool, sharing
+        this workflow's embedding, vector store and manifest clients; at
+        most max_concurrent_clones clones or fetches are in flight at once.
+        Local files are processed once, as a run of their own. A failing
+        repository is reported and does not stop the others.
+
+        Args:
+            repository_urls: URLs of the repositories to process
+            local_data_dir: Path to local data directory
+            process_local_files: Whether to process local files
+            skip_existing_documents: Skip documents already in vector store
+            force_reprocess: Force reprocessing of all documents (overrides skip_existing)
+            max_workers: Number of repositories processed at the same time
+            resume: Continue interrupted streaming runs from their committed batches
+
+        Returns:
+            Final state per repository URL ("local" for the local files run)
+        """
+        urls = [url for url in dict.fromkeys(repository_urls) if url.strip()]
+        # Before repository URLs were recorded, only the first repository (GITHUB_REPO_URL) could be indexed
+        jobs = {url: dict(repository_url=url, owns_legacy_rows=index == 0) for index, url in enumerate(urls)}
+        if process_local_files and local_data_dir:
+            jobs["local"] = dict(repository_url="", local_data_dir=local_data_dir, process_local_files=True)
+
+        print(f"\nProcessing {len(jobs)} sources with up to {max_workers} in parallel...")
+
+        # Create the collection once up front instead of racing on it from every run
+        try:
+            self.vector_store.initialize_or_load_collection()
+        except Exception as e:
+            print(f"Warning: Could not prepare collection: {str(e)}")
 
+        results: Dict[str, RAGState] = {}
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+            futures = {
+                name: pool.submit(
+                    self.run,
+                    skip_existing_documents=skip_existing_documents,
+                    force_reprocess=force_reprocess,
+                    resume=resume,
+                    **job
+                )
+                for name, job in jobs.items()
+            }
+            for name, future in futures.items():
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    results[name] = {"repository_url": name, "status": "failed", "error": str(e)}
+
+        self._print_run_many_summary(results)
+        return results
+
+    def retry_failed(self) -> Dict[str, RAGState]:
+        """
+        Reprocess only the files recorded in the dead-letter store.
+
+        Every source with failed files gets a run limited to those files;
+        each file goes through the whole read/chunk/embed/store path again
+        (replacing chunks an earlier version left behind) and its entry is
+        resolved once it is stored. Files that fail again stay recorded
+        with an increased attempt count.
+
+        Returns:
+            Final state per source ("local:<dir>" for local files)
+        """
+        if not self.dead_letters:
+            raise ValueError("retry_failed needs a dead-letter store")
+
+        results: Dict[str, RAGState] = {}
+        failed_files = self.dead_letters.files_by_source()
+        repository_sources = [source for source in failed_files if not source.startswith("local:")]
+        for source, file_paths in failed_files.items():
+            if source.startswith("local:"):
+                job = dict(repository_url="", local_data_dir=source[len("local:"):], process_local_files=True)
+            else:
+                # With several repositories it is unknown which one legacy rows belong to
+                job = dict(repository_url=source, owns_legacy_rows=len(repository_sources) == 1)
+            try:
+                results[source] = self.run(skip_existing_documents=False, only_files={source: file_paths}, **job)
+            except Exception as e:
+                results[source] = {"repository_url": source, "status": "failed", "error": str(e)}
+
+        if results:
+            self._print_run_many_summary(results)
+        else:
+            print("No failed files to retry")
+        return results
+
+    @staticmethod
+    def run_summary(state: RAGState) -> dict:
+        """Counts and outcome of one run, for the JSON run report."""
+        return {
+            "status": state.get("status", "unknown"),
+            "error": state.get("error", ""),
+            "new": state.get("new_count", 0),
+            "skipped": state.get("skipped_count", 0),
+            "deleted": state.get("deleted_count", 0),
+            "chunks": state.get("chunk_count", 0),
+            "failed": len(state.get("failed_files", {}))
+        }
+
+    @staticmethod
+    def _print_run_many_summary(results: Dict[str, RAGState]) -> None:
+        """Print one status line per repository."""
+        print(f"\n{'='*60}")
+        print("Per-repository status")
+        print(f"{'='*60}")
+        for name, state in results.items():
+            chunks = state.get("chunk_count", 0)
+            line = (f"{state.get('status', 'unknown'):<22} {name}  "
+                    f"(new {state.get('new_count', 0)}, skipped {state.get('skipped_count', 0)}, "
+                    f"deleted {state.get('deleted_count', 0)}, chunks {chunks})")
+            print(("❌ " if state.get("error") else "✅ ") + line)
+            if state.get("error"):
+                print(f"     {state['error']}")
+
+        failed = sum(1 for state in results.values() if state.get("error"))
+        print(f"\n{len(results) - failed} succeeded, {failed} failed")
+        print(f"{'='*60}\n")
@@ -0,0 +1,170 @@
+"""Sharded ingestion: partition files across worker processes and merge their results."""
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from typing import Iterable, List, Optional
+
+from services.ingestion_manifest import IngestionManifest
+from services.local_file_reader import LocalFileReader
+from services.metrics import MetricsRegistry
+
+
+@dataclass(frozen=True)
+class ShardSpec:
+    """
+    One shard out of count, selected with `main.py --shard index/count`.
+
+    Files are assigned by a stable hash of their path (relative to the
+    local data directory for local files), so every worker, on any host,
+    agrees on the partition without talking to the others.
+    """
+    index: int
+    count: int
+
+    def __post_init__(self):
+        if self.count < 1 or not 0 <= self.index < self.count:
+            raise ValueError(f"Invalid shard {self.index}/{self.count}: expected 0 <= index < count")
+
+    @classmethod
+    def parse(cls, text: str) -> "ShardSpec":
+        """Parse "index/count", e.g. "0/4" for the first of four shards."""
+        try:
+            index, count = (int(part) for part in text.split("/"))
+        except ValueError:
+            raise ValueError(f"Invalid shard '{text}': expected index/count, e.g. 0/4")
+        return cls(index, count)
+
+    def __str__(self) -> str:
+        return f"{self.index}/{self.count}"
+
+    def owns(self, file_path: str, root: str = "") -> bool:
+        """Whether a file belongs to this shard."""
+        # A diagram export (X.drawio.png) is read with its X.drawio, so both go to the same shard
+        file_path = LocalFileReader.diagram_source(file_path) or file_path
+        key = os.path.relpath(file_path, root) if root else file_path
+        digest = hashlib.sha1(key.replace(os.sep, "/").encode("utf-8")).digest()
+        return int.from_bytes(digest[:8], "big") % self.count == self.index
+
+    def select(self, file_paths: Iterable[str], root: str = "") -> List[str]:
+        """The files of this shard, in their original order."""
+        return [file_path for file_path in file_paths if self.owns(file_path, root)]
+
+    def path_for(self, path: str) -> str:
+        """Per-shard variant of a manifest, checkpoint or report path."""
+        base, extension = os.path.splitext(path)
+        return f"{base}.shard-{self.index}-of-{self.count}{extension}"
+
+
+def shard_paths(path: str, count: int) -> List[str]:
+    """The per-shard variants of path for all shards."""
+    return [ShardSpec(index, count).path_for(path) for index in range(count)]
+
+
+def merge_manifests(manifest_path: str, shard_manifest_paths: List[str], embedding_model: str = "") -> int:
+    """
+    Merge per-shard manifests into one manifest.
+
+    Args:
+        manifest_path: Manifest to write (e.g. the unsharded MANIFEST_PATH)
+        shard_manifest_paths: Manifests written by the shard workers
+        embedding_model: Embedding model recorded by the manifest
+
+    Returns:
+        Number of files in the merged manifest
+    """
+    manifest = IngestionManifest(manifest_path, embedding_model=embedding_model)
+    try:
+        return manifest.merge([path for path in shard_manifest_paths if os.path.exists(path)])
+    finally:
+        manifest.close()
+
+
+def seed_shard_manifest(
+    shard: ShardSpec,
+    manifest_path: str,
+    shard_manifest_path: str,
+    embedding_model: str = ""
+) -> Optional[int]:
+    """
+    Start a shard's manifest from the merged manifest.
+
+    Without it, a shard worker whose manifest file is missing (first
+    sharded run, or a new shard count) would see every file as new and
+    embed it again next to its existing chunks. A shard manifest older
+    than the merged manifest (e.g. after an unsharded run) is reseeded
+    too, since its files may have been re-embedded under new chunk ids
+    since. Only the files of this shard are copied.
+
+    Args:
+        shard: Shard of the worker
+        manifest_path: Merged (unsharded) MANIFEST_PATH
+        shard_manifest_path: Manifest of the shard worker
+        embedding_model: Embedding model recorded by the manifest
+
+    Returns:
+        Number of files copied, or None if the shard manifest is up to date or there is nothing to seed it from
+    """
+    if not os.path.exists(manifest_path):
+        return None
+    if os.path.exists(shard_manifest_path) and (
+        os.stat(shard_manifest_path).st_mtime_ns >= os.stat(manifest_path).st_mtime_ns
+    ):
+        return None
+
+    def owned(source: str, file_path: str) -> bool:
+        # Local files are assigned relative to their data directory, like RAGWorkflow._select_files
+        root = source[len("local:"):] if source.startswith("local:") else ""
+        return shard.owns(file_path, root)
+
+    manifest = IngestionManifest(shard_manifest_path, embedding_model=embedding_model)
+    try:
+        return manifest.merge([manifest_path], keep=owned)
+    finally:
+        manifest.close()
+
+
+def merge_reports(report_path: str, shard_report_paths: List[str]) -> dict:
+    """
+    Merge per-shard run reports into one report.
+
+    Counters and API latencies are combined; stage seconds are summed over
+    the shards (worker time), while wall_seconds spans from the first shard
+    start to the last shard finish.
+
+    Args:
+        report_path: Report to write (e.g. the unsharded RUN_REPORT_PATH)
+        shard_report_paths: Reports written by the shard workers
+
+    Returns:
+        The merged report
+    """
+    registry = MetricsRegistry()
+    shards = {}
+    started_at = []
+    finished_at = []
+    for path in shard_report_paths:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                report = json.load(f)
+        except (OSError, ValueError) as e:
+            shards[path] = {"status": "missing", "error": str(e)}
+            continue
+        registry.merge(MetricsRegistry.from_snapshot(report.get("metrics", {})))
+        shards[report.get("shard", path)] = {
+            "status": report.get("status", "unknown"),
+            "sources": report.get("sources", {})
+        }
+        started_at.append(report.get("started_at", 0))
+        finished_at.append(report.get("finished_at", 0))
+
+    if started_at:
+        registry.started_at = min(started_at)
+    completed = all(shard["status"].startswith("completed") for shard in shards.values())
+    merged = registry.write_report(
+        report_path,
+        status="completed" if shards and completed else "failed",
+        shards=shards,
+        wall_seconds=round(max(finished_at) - min(started_at), 3) if started_at else 0.0
+    )
+    return merged
@@ -0,0 +1,287 @@
+"""Pipelined read -> chunk -> embed -> store execution on micro-batches."""
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from models import Document
+from interfaces import IDocumentChunker, IEmbeddingService, IVectorStore
+from services.metrics import metrics
+from .batch_bisection import embed_bisecting
+
+
+# A read task returns the documents of one micro-batch of files
+ReadTask = Callable[[], List[Document]]
+# Checkpoint hook: (read task index, file path -> chunk ids)
+BatchHook = Callable[[int, Dict[str, List[int]]], None]
+
+_DONE = object()
+
+
+@dataclass
+class PipelineResult:
+    """Outcome of a pipelined run."""
+    # File path -> ids of its stored chunks, for every file of a committed read micro-batch
+    stored_files: Dict[str, List[int]] = field(default_factory=dict)
+    documents: int = 0
+    chunks: int = 0
+    elapsed: float = 0.0
+    # Stage name -> seconds spent working (excluding queue waits)
+    busy: Dict[str, float] = field(default_factory=dict)
+    error: str = ""
+    # File path -> reason, for files left out because their chunks failed to embed
+    failed_files: Dict[str, str] = field(default_factory=dict)
+    # Ids already inserted for chunks of failed files, to be deleted by the caller
+    orphan_chunk_ids: List[int] = field(default_factory=list)
+
+    def print_summary(self) -> None:
+        """Print counts and per-stage busy time (summed over a stage's workers)."""
+        print(f"Pipelined {self.documents} documents / {self.chunks} chunks in {self.elapsed:.1f}s")
+        for stage, seconds in self.busy.items():
+            share = seconds / self.elapsed if self.elapsed > 0 else 0.0
+            print(f"  - {stage}: busy {seconds:.1f}s ({share:.0%} of wall time)")
+
+
+class StreamingPipeline:
+    """
+    Runs the read, chunk, embed and store stages concurrently.
+
+    Stages are threads connected by bounded queues and exchange small
+    micro-batches, so at most a few batches are held in memory at any
+    time and network-bound embedding and inserts overlap with parsing.
+    With enough embed workers the end-to-end time approaches that of the
+    slowest stage. The first failure stops all stages, except for chunks
+    that fail to embed on their own: a failing embed batch is bisected and
+    only the files of the poisoned chunks are left out (see failed_files).
+
+    A read micro-batch is committed once every chunk of its documents has
+    been stored; the optional hooks of run() make that durable so an
+    interrupted run can be resumed batch by batch.
+    """
+
+    def __init__(
+        self,
+        document_chunker: IDocumentChunker,
+        embedding_service: IEmbeddingService,
+        vector_store: IVectorStore,
+        queue_size: int = 4,
+        read_batch_files: int = 16,
+        embed_batch_chunks: int = 64,
+        embed_workers: int = 2,
+        store_lock: Optional[threading.Lock] = None
+    ):
+        """
+        Initialize the streaming pipeline.
+
+        Args:
+            document_chunker: Service for chunking documents
+            embedding_service: Service for creating embeddings
+            vector_store: Service for storing embeddings
+            queue_size: Micro-batches buffered between two stages
+            read_batch_files: Files per read micro-batch (used by callers to build read tasks)
+            embed_batch_chunks: Chunks per embed/insert micro-batch
+            embed_workers: Concurrent embedding calls
+            store_lock: Lock held around vector store writes (shared with other runs)
+        """
+        self.document_chunker = document_chunker
+        self.embedding_service = embedding_service
+        self.vector_store = vector_store
+        self.queue_size = max(1, queue_size)
+        self.read_batch_files = max(1, read_batch_files)
+        self.embed_batch_chunks = max(1, embed_batch_chunks)
+        self.embed_workers = max(1, embed_workers)
+        self.store_lock = store_lock or threading.Lock()
+
+    def run(
+        self,
+        read_tasks: List[ReadTask],
+        on_inserted: Optional[BatchHook] = None,
+        on_committed: Optional[BatchHook] = None,
+        on_inserting: Optional[BatchHook] = None
+    ) -> PipelineResult:
+        """
+        Stream the documents produced by read_tasks into the vector store.
+
+        Args:
+            read_tasks: Callables that each read one micro-batch of files
+            on_inserted: Called with the ids of every insert, before its read batch is complete
+            on_committed: Called once all chunks of a read batch are stored, with every
+                          file of the batch (files without chunks map to an empty list)
+                          except those that failed to embed
+            on_inserting: Called before every insert with the files it writes (mapped to
+                          empty lists), so a crash during the insert can be rolled back
+
+        Returns:
+            PipelineResult with the stored chunk ids per file of every committed batch
+        """
+        result = PipelineResult(busy={"read": 0.0, "chunk": 0.0, "embed": 0.0, "store": 0.0})
+        stop = threading.Event()
+        lock = threading.Lock()
+        documents_queue = queue.Queue(maxsize=self.queue_size)
+        chunks_queue = queue.Queue(maxsize=self.queue_size)
+        embedded_queue = queue.Queue(maxsize=self.queue_size)
+        # Read task index -> chunk slices still to store, chunk ids per file so far and failed files
+        pending: Dict[int, dict] = {}
+
+        def fail(stage: str, error: Exception) -> None:
+            with lock:
+                if not result.error:
+                    result.error = f"{stage} stage failed: {str(error)}"
+            stop.set()
+
+        def put(target: queue.Queue, item) -> bool:
+            # Re-check the stop flag while waiting so a failed stage never blocks the others
+            while not stop.is_set():
+                try:
+                    target.put(item, timeout=0.2)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def get(source: queue.Queue):
+            while not stop.is_set():
+                try:
+                    return source.get(timeout=0.2)
+                except queue.Empty:
+                    continue
+            return _DONE
+
+        def timed(stage: str, started: float, items: int) -> None:
+            seconds = time.perf_counter() - started
+            with lock:
+                result.busy[stage] += seconds
+            metrics.observe("rag_stage_seconds", seconds, stage=f"pipeline_{stage}")
+            metrics.inc("rag_stage_items_total", items, stage=f"pipeline_{stage}")
+
+        def commit(index: int) -> None:
+            # Called with lock held once the last slice of a read batch is stored
+            state = pending.pop(index)
+            failed = state["failed"]
+            files = {file_path: ids for file_path, ids in state["files"].items() if file_path not in failed}
+            for file_path in failed:
+                result.orphan_chunk_ids.extend(state["files"].get(file_path, []))
+            result.failed_files.update(failed)
+            if on_committed:
+                on_committed(index, files)
+            result.stored_files.update(files)
+
+        def read_stage() -> None:
+            try:
+                for index, task in enumerate(read_tasks):
+                    if stop.is_set():
+                        return
+                    started = time.perf_counter()
+                    documents = task()
+                    timed("read", started, len(documents))
+                    if documents and not put(documents_queue, (index, documents)):
+                        return
+            except Exception as e:
+                fail("read", e)
+            finally:
+                put(documents_queue, _DONE)
+
+        def chunk_stage() -> None:
+            try:
+                while True:
+                    item = get(documents_queue)
+                    if item is _DONE:
+                        return
+                    index, documents = item
+                    started = time.perf_counter()
+                    batch = self.document_chunker.chunk_documents_to_batch(documents)
+                    slices = range(0, len(batch), self.embed_batch_chunks)
+                    with lock:
+                        result.documents += len(documents)
+                        # Files without chunks are still recorded as stored
+                        pending[index] = {
+                            "remaining": len(slices),
+                            "files": {document.file_path: [] for document in documents},
+                            "failed": {}
+                        }
+                        if not slices:
+                            commit(index)
+                    timed("chunk", started, len(batch))
+                    for start in slices:
+                        if not put(chunks_queue, (index, batch.slice(start, start + self.embed_batch_chunks))):
+                            return
+            except Exception as e:
+                fail("chunk", e)
+            finally:
+                for _ in range(self.embed_workers):
+                    put(chunks_queue, _DONE)
+
+        def embed_stage() -> None:
+            try:
+                while True:
+                    item = get(chunks_queue)
+                    if item is _DONE:
+                        return
+                    index, batch = item
+                    started = time.perf_counter()
+                    embedded, failed = embed_bisecting(self.embedding_service, batch)
+                    if failed:
+                        with lock:
+                            pending[index]["failed"].update(failed)
+                    timed("embed", started, len(batch))
+                    if not put(embedded_queue, (index, embedded)):
+                        return
+            except Exception as e:
+                fail("embed", e)
+            finally:
+                put(embedded_queue, _DONE)
+
+        def store_stage() -> None:
+            finished_workers = 0
+            try:
+                while finished_workers < self.embed_workers:
+                    item = get(embedded_queue)
+                    if item is _DONE:
+                        if stop.is_set():
+                            return
+                        finished_workers += 1
+                        continue
+                    index, batch = item
+                    started = time.perf_counter()
+                    with lock:
+                        # Another slice may have failed for the same file since this one was embedded
+                        batch = batch.without_files(set(pending[index]["failed"]))
+                    chunk_ids = []
+                    if len(batch) and on_inserting:
+                        on_inserting(index, {file_path: [] for file_path in batch.file_paths})
+                    if len(batch):
+                        with self.store_lock:
+                            chunk_ids = self.vector_store.insert_batch(batch)
+                    inserted: Dict[str, List[int]] = {}
+                    for file_path, chunk_id in zip(batch.file_paths, chunk_ids):
+                        inserted.setdefault(file_path, []).append(chunk_id)
+                    if on_inserted and inserted:
+                        on_inserted(index, inserted)
+                    timed("store", started, len(batch))
+                    with lock:
+                        result.chunks += len(batch)
+                        state = pending[index]
+                        for file_path, file_ids in inserted.items():
+                            state["files"][file_path].extend(file_ids)
+                        state["remaining"] -= 1
+                        if state["remaining"] == 0:
+                            commit(index)
+            except Exception as e:
+                fail("store", e)
+
+        threads = [threading.Thread(target=read_stage, name="pipeline-read"),
+                   threading.Thread(target=chunk_stage, name="pipeline-chunk"),
+                   threading.Thread(target=store_stage, name="pipeline-store")]
+        threads.extend(
+            threading.Thread(target=embed_stage, name=f"pipeline-embed-{index}")
+            for index in range(self.embed_workers)
+        )
+
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        result.elapsed = time.perf_counter() - started
+        return result